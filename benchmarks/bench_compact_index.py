@@ -0,0 +1,70 @@
+"""
+Benchmark memori: set of str (representasi lama mode in-memory) vs CompactEventIndex.
+
+    python -m benchmarks.bench_compact_index --events 200000
+"""
+import argparse
+import time
+import tracemalloc
+import uuid
+
+from src.compact_index import CompactEventIndex
+from src.dedup_cache import DedupCache
+
+
+def measure(build):
+    """Return (bytes teralokasi, detik build); waktu diukur terpisah karena tracemalloc lambat"""
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    start = time.perf_counter()
+    build()
+    return current, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--topics", type=int, default=10)
+    args = parser.parse_args()
+
+    # event_id disimpan sebagai bytes agar str baru dibuat di dalam build (seperti parsing request)
+    keys = [(f"topic.{i % args.topics}", str(uuid.uuid4()).encode()) for i in range(args.events)]
+
+    def build_sets():
+        store = {}
+        for topic, event_id in keys:
+            store.setdefault(topic, set()).add(event_id.decode())
+        return store
+
+    def build_cache():
+        cache = DedupCache()
+        for topic, event_id in keys:
+            cache.add(topic, event_id.decode())
+        return cache
+
+    def build_index(bits):
+        def build():
+            index = CompactEventIndex(digest_bits=bits)
+            for topic, event_id in keys:
+                index.add(topic, event_id.decode())
+            return index
+        return build
+
+    results = [
+        ("dict[topic, set[str]]", *measure(build_sets)),
+        ("DedupCache (LRU)", *measure(build_cache)),
+        ("CompactEventIndex 128-bit", *measure(build_index(128))),
+        ("CompactEventIndex 64-bit", *measure(build_index(64))),
+    ]
+    baseline = results[0][1]
+    print(f"{args.events} events, {args.topics} topics")
+    print(f"{'structure':<28}{'bytes/event':>12}{'vs sets':>10}{'build s':>10}")
+    for name, size, elapsed in results:
+        print(f"{name:<28}{size / args.events:>12.1f}{baseline / size:>9.1f}x{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Micro-benchmark hot path DedupStore / EventProcessor pada berbagai ukuran tabel.
+
+    python -m benchmarks.bench_hot_paths                          # skala 10^3, 10^4
+    python -m benchmarks.bench_hot_paths --scales 3,4,5,6,7 --output results.json
+    python -m benchmarks.bench_hot_paths --baseline benchmarks/baseline_hot_paths.json
+
+Setiap kasus dijalankan pada store yang sudah berisi 10^k event (k dari --scales).
+Hasil disimpan sebagai JSON; dengan --baseline, kasus yang mean-nya lebih lambat dari
+baseline melebihi --threshold ditandai REGRESSION dan exit code = 1.
+Skala besar (10^6-10^7) butuh waktu prefill beberapa menit dan beberapa GB disk/memori.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from src.dedup_store import DedupStore
+from src.event_processor import EventProcessor
+from src.models import Event
+from src.stats import Stats
+
+TOPICS = 10
+PREFILL_BATCH = 10_000
+
+
+def make_row(i: int, prefix: str = "evt") -> tuple:
+    return (f"topic.{i % TOPICS}", f"{prefix}-{i}", "2025-10-22T10:00:00Z", "bench", '{"value": 1}')
+
+
+def prefill(store: DedupStore, count: int):
+    for start in range(0, count, PREFILL_BATCH):
+        store.store_events([make_row(i) for i in range(start, min(count, start + PREFILL_BATCH))])
+
+
+def timed(fn: Callable[[int], object], ops: int) -> dict:
+    """Jalankan fn(i) sebanyak ops kali; latency per operasi dalam mikrodetik"""
+    samples = []
+    perf_counter = time.perf_counter
+    for i in range(ops):
+        start = perf_counter()
+        fn(i)
+        samples.append(perf_counter() - start)
+    samples.sort()
+    total = sum(samples)
+    return {
+        "ops": ops,
+        "ops_per_sec": round(ops / total, 1) if total else 0.0,
+        "mean_us": round(total / ops * 1e6, 3),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 3),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 3),
+    }
+
+
+# =========================
+# Cases
+# =========================
+def bench_store(store: DedupStore, scale: int, ops: int, label: str) -> dict:
+    results = {}
+    # prefill mengisi cache memori, jadi hit pertama = hit cache
+    results[f"is_duplicate_hit[{label}]"] = timed(
+        lambda i: store.is_duplicate(*make_row((i * 7919) % scale)[:2]), ops)
+    # cache dikosongkan agar hit benar-benar menyentuh SQLite
+    if store.db_path:
+        store.store.clear()
+        results[f"is_duplicate_hit_uncached[{label}]"] = timed(
+            lambda i: store.is_duplicate(*make_row((i * 7919) % scale)[:2]), ops)
+    results[f"is_duplicate_miss[{label}]"] = timed(
+        lambda i: store.is_duplicate(*make_row(i, "miss")[:2]), ops)
+    results[f"store_event[{label}]"] = timed(
+        lambda i: store.store_event(*make_row(i, "single")), ops)
+    batch_ops = max(1, ops // 100)
+    results[f"store_events_x100[{label}]"] = timed(
+        lambda i: store.store_events([make_row(i * 100 + j, "batch") for j in range(100)]), batch_ops)
+    results[f"get_all_topics[{label}]"] = timed(lambda i: store.get_all_topics(), min(ops, 50))
+    if store.db_path:
+        results[f"get_events_topic[{label}]"] = timed(lambda i: store.get_events(f"topic.{i % TOPICS}"), 3)
+        results[f"get_events_page_100[{label}]"] = timed(
+            lambda i: store.get_events_page(f"topic.{i % TOPICS}", (i * 7919) % scale, 100), min(ops, 200))
+    return results
+
+
+def bench_publish(store: DedupStore, ops: int, label: str) -> dict:
+    loop = asyncio.new_event_loop()
+    processor = EventProcessor(store, Stats(), queue_size=0)
+    events = [Event(topic=f"topic.{i % TOPICS}", event_id=f"publish-{i}", timestamp="2025-10-22T10:00:00Z",
+                    source="bench", payload={"value": i}) for i in range(ops)]
+    try:
+        return {
+            f"publish_unique[{label}]": timed(lambda i: loop.run_until_complete(processor.publish(events[i])), ops),
+            f"publish_duplicate[{label}]": timed(
+                lambda i: loop.run_until_complete(processor.publish(events[i])), ops),
+        }
+    finally:
+        processor.storage.close()
+        loop.close()
+
+
+def run_scale(exponent: int, ops: int, tmpdir: str) -> dict:
+    scale = 10 ** exponent
+    results = {}
+    started = time.perf_counter()
+
+    memory = DedupStore(cache_max_entries=0)
+    prefill(memory, scale)
+    results.update(bench_store(memory, scale, ops, "memory"))
+    memory.close()
+
+    db_path = os.path.join(tmpdir, f"bench_{exponent}.db")
+    store = DedupStore(db_path=db_path)
+    prefill(store, scale)
+    results.update(bench_store(store, scale, ops, "sqlite"))
+    results.update(bench_publish(store, ops, "sqlite"))  # menutup store
+
+    print(f"  10^{exponent}: {len(results)} cases in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return {f"{name}@1e{exponent}": result for name, result in results.items()}
+
+
+# =========================
+# Baseline comparison
+# =========================
+def compare(results: dict, baseline: dict, threshold: float) -> list[dict]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None or not previous["mean_us"]:
+            continue
+        ratio = current["mean_us"] / previous["mean_us"]
+        current["baseline_mean_us"] = previous["mean_us"]
+        current["ratio"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append({"case": name, "baseline_mean_us": previous["mean_us"],
+                                "mean_us": current["mean_us"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="3,4", help="eksponen ukuran tabel, mis. 3,4,5,6,7")
+    parser.add_argument("--ops", type=int, default=2000, help="operasi per kasus (dibatasi ukuran tabel)")
+    parser.add_argument("--output", help="simpan hasil JSON ke file ini")
+    parser.add_argument("--baseline", help="file JSON hasil run sebelumnya untuk dibandingkan")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="toleransi perlambatan mean sebelum dianggap regresi (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    exponents = [int(part) for part in args.scales.split(",") if part.strip()]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for exponent in exponents:
+            results.update(run_scale(exponent, min(args.ops, 10 ** exponent), tmpdir))
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "scales": exponents,
+            "ops": args.ops,
+        },
+        "results": results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        report["regressions"] = regressions
+
+    for name, result in results.items():
+        line = f"{name:50s} {result['mean_us']:12.2f} us  p99 {result['p99_us']:12.2f} us"
+        if "ratio" in result:
+            line += f"  x{result['ratio']:.2f} vs baseline"
+        print(line)
+    for regression in regressions:
+        print(f"REGRESSION {regression['case']}: {regression['baseline_mean_us']} -> "
+              f"{regression['mean_us']} us (x{regression['ratio']})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline and not regressions:
+        print(f"No regressions above {args.threshold:.0%} (median ratio "
+              f"{statistics.median([r.get('ratio', 1.0) for r in results.values()]):.2f})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
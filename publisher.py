@@ -1,46 +1,261 @@
-import requests
-import time
+"""
+Load generator & benchmark untuk Event Aggregator.
+
+Mode:
+- closed-loop (default): `--concurrency` client, masing-masing kirim request berikutnya
+  begitu response sebelumnya datang -> throughput maksimum server
+- open-loop (`--rate N`): request dijadwalkan pada N event/detik tanpa peduli server;
+  latency diukur dari waktu terjadwal (tanpa coordinated omission)
+
+Di akhir, delta /stats server dibandingkan dengan ground truth (event unik / duplicate
+yang benar-benar terkirim).
+
+    python publisher.py --events 5000 --dup-rate 0.2
+    python publisher.py --events 100000 --batch-size 100 --concurrency 32
+    python publisher.py --rate 2000 --events 20000 --topic-skew 1.2
+    python publisher.py --in-process --events 20000 --batch-size 500   # tanpa server/network
+"""
+import argparse
+import asyncio
+import json
+import os
 import random
+import statistics
+import sys
+import tempfile
+import time
 import uuid
+from collections import Counter
+from itertools import accumulate
+
+import httpx
+
+AGGREGATOR_URL = os.getenv("AGGREGATOR_URL", "http://127.0.0.1:8080")  # sesuaikan kalau beda host
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=AGGREGATOR_URL)
+    parser.add_argument("--events", type=int, default=5000, help="total event yang dikirim (termasuk duplicate)")
+    parser.add_argument("--batch-size", type=int, default=1, help="1 = satu event per request")
+    parser.add_argument("--endpoint", choices=["publish", "fast"], default="publish",
+                        help="publish = /publish, fast = /publish/fast")
+    parser.add_argument("--dup-rate", type=float, default=0.2, help="fraksi event yang mengirim ulang event lama")
+    parser.add_argument("--topics", type=int, default=10)
+    parser.add_argument("--topic-skew", type=float, default=0.0,
+                        help="eksponen Zipf distribusi topic (0 = merata)")
+    parser.add_argument("--concurrency", type=int, default=10, help="client paralel / request in-flight maksimum")
+    parser.add_argument("--rate", type=float, default=0.0, help="target event/detik (open-loop); 0 = closed-loop")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--in-process", action="store_true",
+                        help="jalankan create_app() di proses ini (ASGITransport, database sementara)")
+    parser.add_argument("--json", action="store_true", help="cetak hasil sebagai JSON")
+    return parser.parse_args(argv)
+
+
+# =========================
+# Workload
+# =========================
+def generate_events(args, rng: random.Random) -> list[dict]:
+    """Event berurutan; duplicate = kirim ulang event yang sudah muncul sebelumnya"""
+    run_id = uuid.uuid4().hex[:8]
+    topics = [f"topic.{i}" for i in range(args.topics)]
+    cum_weights = list(accumulate(1.0 / (rank + 1) ** args.topic_skew for rank in range(args.topics)))
+    events = []
+    for i in range(args.events):
+        if events and rng.random() < args.dup_rate:
+            events.append(rng.choice(events))
+            continue
+        topic = rng.choices(topics, cum_weights=cum_weights)[0]
+        events.append({
+            "topic": topic,
+            "event_id": f"{run_id}-{i}",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "source": "publisher",
+            "payload": {"value": rng.randint(1, 100)},
+        })
+    return events
+
+
+def make_requests(events: list[dict], args) -> list[tuple[str, list[dict], bytes]]:
+    path = "/publish/fast" if args.endpoint == "fast" else "/publish"
+    requests = []
+    for start in range(0, len(events), args.batch_size):
+        batch = events[start:start + args.batch_size]
+        body = batch[0] if len(batch) == 1 else {"events": batch}
+        requests.append((path, batch, json.dumps(body).encode()))
+    return requests
+
+
+# =========================
+# Runner
+# =========================
+class Recorder:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.statuses: Counter = Counter()
+        self.acked: list[dict] = []  # event dari request yang sukses
+        self.reported = Counter()  # processed / duplicates menurut response
+
+    def record(self, batch: list[dict], status: int, body: dict, latency: float):
+        self.latencies.append(latency)
+        self.statuses[status] += 1
+        if status == 200:
+            self.acked.extend(batch)
+            self.reported["processed"] += body.get("processed", 0)
+            self.reported["duplicates"] += body.get("duplicates", 0)
+
+
+async def send(client: httpx.AsyncClient, request, recorder: Recorder, started: float):
+    path, batch, body = request
+    try:
+        response = await client.post(path, content=body, headers={"Content-Type": "application/json"})
+        status = response.status_code
+        data = response.json() if status == 200 else {}
+    except httpx.HTTPError as e:
+        status, data = type(e).__name__, {}
+    recorder.record(batch, status, data, time.perf_counter() - started)
+
+
+async def closed_loop(client, requests, recorder: Recorder, concurrency: int):
+    pending = iter(requests)
+
+    async def worker():
+        for request in pending:
+            await send(client, request, recorder, time.perf_counter())
 
-AGGREGATOR_URL = "http://127.0.0.1:8080"  # sesuaikan kalau beda host
-TOTAL_EVENTS = 5000
-BATCH_SIZE = 50
-DUPLICATION_RATE = 0.2
-SLEEP_TIME = 0.05
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
 
-def generate_event(i):
-    topic = f"topic.{i % 10}"  # 10 topic berbeda
-    event_id = str(uuid.uuid4())
-    payload = {"value": random.randint(1, 100)}
+
+async def open_loop(client, requests, recorder: Recorder, concurrency: int, rate: float, batch_size: int):
+    # antrean semaphore ikut dihitung sebagai latency karena waktu mulai = jadwal
+    in_flight = asyncio.Semaphore(concurrency)
+    interval = batch_size / rate
+    start = time.perf_counter()
+
+    async def scheduled(request, at: float):
+        async with in_flight:
+            await send(client, request, recorder, at)
+
+    tasks = []
+    for i, request in enumerate(requests):
+        at = start + i * interval
+        delay = at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(scheduled(request, at)))
+    await asyncio.gather(*tasks)
+
+
+async def fetch_stats(client: httpx.AsyncClient) -> dict:
+    response = await client.get("/stats")
+    response.raise_for_status()
+    return response.json()
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run(args, client: httpx.AsyncClient) -> dict:
+    rng = random.Random(args.seed)
+    events = generate_events(args, rng)
+    requests = make_requests(events, args)
+    recorder = Recorder()
+
+    before = await fetch_stats(client)
+    started = time.perf_counter()
+    if args.rate > 0:
+        await open_loop(client, requests, recorder, args.concurrency, args.rate, args.batch_size)
+    else:
+        await closed_loop(client, requests, recorder, args.concurrency)
+    elapsed = time.perf_counter() - started
+    after = await fetch_stats(client)
+
+    # ground truth dari event yang di-ack server
+    expected_unique = len({(e["topic"], e["event_id"]) for e in recorder.acked})
+    expected = {
+        "received": len(recorder.acked),
+        "unique_processed": expected_unique,
+        "duplicate_dropped": len(recorder.acked) - expected_unique,
+    }
+    observed = {key: after[key] - before[key] for key in expected}
+    latencies = sorted(recorder.latencies)
     return {
-        "topic": topic,
-        "event_id": event_id,
-        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
-        "source": "publisher_5000",
-        "payload": payload
+        "mode": f"open-loop @ {args.rate:g} ev/s" if args.rate > 0 else f"closed-loop x{args.concurrency}",
+        "events": len(events),
+        "requests": len(requests),
+        "batch_size": args.batch_size,
+        "elapsed_seconds": round(elapsed, 3),
+        "events_per_second": round(len(recorder.acked) / elapsed, 1) if elapsed else 0.0,
+        "statuses": {str(k): v for k, v in recorder.statuses.items()},
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+            **{name: round(percentile(latencies, q) * 1000, 3)
+               for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("p999", 0.999))},
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+        "expected": expected,
+        "observed": observed,
+        "responses": dict(recorder.reported),
+        "verified": observed == expected
+                    and recorder.reported["processed"] == expected["unique_processed"]
+                    and recorder.reported["duplicates"] == expected["duplicate_dropped"],
     }
 
-# buat beberapa duplikat awal
-events_pool = [generate_event(i) for i in range(int(TOTAL_EVENTS*(1-DUPLICATION_RATE)))]
-duplicates = random.choices(events_pool, k=int(TOTAL_EVENTS*DUPLICATION_RATE))
-all_events = events_pool + duplicates
-random.shuffle(all_events)
 
-sent_count = 0
-print(f"Starting event publisher...\nSending {TOTAL_EVENTS} events with {DUPLICATION_RATE*100}% duplication rate...")
+async def run_in_process(args) -> dict:
+    from src.main import create_app
 
-for i in range(0, TOTAL_EVENTS, BATCH_SIZE):
-    batch = all_events[i:i+BATCH_SIZE]
-    for event in batch:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = create_app(db_path=os.path.join(tmpdir, "bench.db"))
+        processor = app.state.event_processor
+        # lifespan sengaja tidak dijalankan (monitor auto-shutdown); cukup worker processor
+        await processor.start()
         try:
-            r = requests.post(f"{AGGREGATOR_URL}/publish", json=event, timeout=5)
-            if r.status_code != 200:
-                print(f"Error sending event: {r.status_code} {r.text}")
-        except Exception as e:
-            print(f"Error sending event: {e}")
-        sent_count += 1
-    print(f"Sent {sent_count}/{TOTAL_EVENTS} events")
-    time.sleep(0.05)  # jeda sebentar tiap batch supaya server gak kelebihan
-
-print("\nCompleted! Sent all events.")
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://aggregator",
+                                         timeout=args.timeout) as client:
+                return await run(args, client)
+        finally:
+            await processor.stop()
+            processor.storage.close()
+
+
+async def run_remote(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        return await run(args, client)
+
+
+def print_report(result: dict):
+    latency = result["latency_ms"]
+    print(f"Mode              : {result['mode']}, batch size {result['batch_size']}")
+    print(f"Sent              : {result['events']} events in {result['requests']} requests "
+          f"({result['elapsed_seconds']} s)")
+    print(f"Throughput        : {result['events_per_second']} events/s (acked)")
+    print(f"Statuses          : {result['statuses']}")
+    print(f"Latency (ms)      : mean {latency['mean']}  p50 {latency['p50']}  p95 {latency['p95']}  "
+          f"p99 {latency['p99']}  p999 {latency['p999']}  max {latency['max']}")
+    print(f"Expected          : {result['expected']}")
+    print(f"Server /stats     : {result['observed']}")
+    print(f"Verification      : {'PASS' if result['verified'] else 'FAIL'}")
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    args.batch_size = max(1, args.batch_size)
+    result = asyncio.run(run_in_process(args) if args.in_process else run_remote(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+    return 0 if result["verified"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """Token bucket klasik: `rate` token/detik, kapasitas `burst`"""
+
+    def __init__(self, rate: float, burst: float, now: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now if now is not None else time.monotonic()
+
+    def refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, n: float) -> float:
+        """Detik sampai n token tersedia (0 jika sudah tersedia); panggil refill() dulu"""
+        missing = n - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+
+class Rejected(Exception):
+    """Request ditolak admission control; retry_after dalam detik (bulat ke atas)"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Admission control untuk /publish, dicek sebelum event menyentuh dedup/SQLite/queue:
+    - queue processor di atas high watermark -> tolak (queue_full)
+    - token bucket per source (field `source` event) opsional -> tolak (rate_limited)
+    Penolakan cepat dengan 429 + Retry-After menggantikan await queue.put() yang
+    menunggu tanpa batas saat worker tertinggal.
+    """
+
+    # interval cek ulang queue saat /publish/stream ditahan di atas watermark
+    THROTTLE_POLL_SECONDS = 0.05
+
+    def __init__(self, queue_fill: Callable[[], float],
+                 high_watermark: float = 0.9,
+                 source_rate: float = 0,
+                 source_burst: float = 0,
+                 retry_after_seconds: int = 1,
+                 max_sources: int = 10000):
+        """
+        queue_fill: fungsi yang mengembalikan tingkat isi queue 0..1
+        high_watermark: batas tingkat isi queue (0 = cek queue dimatikan)
+        source_rate / source_burst: event/detik dan burst per source (rate 0 = tanpa limit)
+        max_sources: jumlah bucket source yang disimpan (LRU)
+        """
+        self.queue_fill = queue_fill
+        self.high_watermark = high_watermark
+        self.source_rate = source_rate
+        self.source_burst = source_burst or source_rate
+        self.retry_after_seconds = max(1, int(retry_after_seconds))
+        self.max_sources = max_sources
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "rate_limited": 0}
+        # /publish/stream tidak ditolak di tengah body, tapi ditahan (backpressure)
+        self.throttled = {"waits": 0, "seconds": 0.0}
+
+    def _queue_full(self) -> bool:
+        return bool(self.high_watermark) and self.queue_fill() >= self.high_watermark
+
+    def check_queue(self):
+        """Tolak jika queue processor di atas high watermark"""
+        if self._queue_full():
+            self.rejected["queue_full"] += 1
+            raise Rejected("queue_full", self.retry_after_seconds)
+
+    def _take(self, sources: dict[str, int], now: Optional[float]) -> float:
+        """
+        Ambil token untuk {source: jumlah event}, semua atau tidak sama sekali; return detik
+        yang harus ditunggu (0 = token sudah diambil). Batch selalu dibayar penuh n token:
+        batch lebih besar dari burst lolos hanya saat bucket penuh dan membuat saldo negatif,
+        jadi rata-rata per source tetap source_rate berapa pun ukuran batch-nya.
+        """
+        if self.source_rate <= 0:
+            return 0.0
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            buckets = [(self._bucket(source, now), n) for source, n in sources.items()]
+            wait = max(bucket.wait_time(min(n, self.source_burst)) for bucket, n in buckets)
+            if wait > 0:
+                return wait
+            for bucket, n in buckets:
+                bucket.tokens -= n
+        return 0.0
+
+    def acquire(self, sources: dict[str, int], now: Optional[float] = None):
+        """Ambil token untuk {source: jumlah event}; Rejected (rate_limited) jika belum cukup"""
+        wait = self._take(sources, now)
+        if wait > 0:
+            self.rejected["rate_limited"] += 1
+            raise Rejected("rate_limited", max(1, math.ceil(wait)))
+        self.admitted += 1
+
+    async def throttle(self, sources: dict[str, int]):
+        """
+        Versi backpressure untuk /publish/stream (per chunk): tunggu sampai queue di bawah
+        watermark dan token source cukup, alih-alih menolak di tengah upload.
+        """
+        started = None
+        while True:
+            wait = self.THROTTLE_POLL_SECONDS if self._queue_full() else self._take(sources, None)
+            if wait <= 0:
+                break
+            if started is None:
+                started = time.monotonic()
+                self.throttled["waits"] += 1
+            await asyncio.sleep(wait)
+        if started is not None:
+            self.throttled["seconds"] += time.monotonic() - started
+        self.admitted += 1
+
+    def _bucket(self, source: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(source)
+        if bucket is None:
+            bucket = self._buckets[source] = TokenBucket(self.source_rate, self.source_burst, now)
+            if len(self._buckets) > self.max_sources:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(source)
+            bucket.refill(now)
+        return bucket
+
+    def get_stats(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "throttled": {"waits": self.throttled["waits"], "seconds": round(self.throttled["seconds"], 3)},
+            "high_watermark": self.high_watermark,
+            "queue_fill": round(self.queue_fill(), 4),
+            "tracked_sources": len(self._buckets),
+        }
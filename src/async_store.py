@@ -0,0 +1,128 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .dedup_store import DedupStore
+
+
+class AsyncDedupStore:
+    """
+    Facade async untuk DedupStore: semua kerja SQLite dijalankan di thread,
+    bukan di event loop. Tulis lewat satu thread writer (urutan terjaga),
+    baca lewat thread pool seukuran reader pool SQLite.
+    Mode in-memory (db_path=None) langsung dipanggil karena tidak ada I/O.
+    """
+
+    def __init__(self, dedup_store: DedupStore, read_workers: Optional[int] = None):
+        self.dedup_store = dedup_store
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._readers: Optional[ThreadPoolExecutor] = None
+        if dedup_store.db_path:
+            read_workers = read_workers or dedup_store.connections.reader_pool_size
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+            self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="sqlite-reader")
+
+    async def _run(self, executor: Optional[ThreadPoolExecutor], fn, *args, **kwargs):
+        if executor is None:
+            return fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+    # =========================
+    # Write path
+    # =========================
+    async def store_event(self, topic: str, event_id: str, timestamp: str,
+                          source: str, payload: str) -> bool:
+        return await self._run(self._writer, self.dedup_store.store_event,
+                               topic, event_id, timestamp, source, payload)
+
+    async def store_events(self, rows: list[tuple]) -> list[bool]:
+        return await self._run(self._writer, self.dedup_store.store_events, rows)
+
+    async def prune_older_than(self, max_age_seconds: float, chunk_size: int,
+                               topic: Optional[str] = None, exclude_topics: tuple = ()) -> int:
+        return await self._run(self._writer, self.dedup_store.prune_older_than,
+                               max_age_seconds, chunk_size, topic, exclude_topics)
+
+    async def prune_topic_overflow(self, topic: str, max_rows: int, chunk_size: int) -> int:
+        return await self._run(self._writer, self.dedup_store.prune_topic_overflow,
+                               topic, max_rows, chunk_size)
+
+    async def incremental_vacuum(self, max_pages: int) -> int:
+        return await self._run(self._writer, self.dedup_store.incremental_vacuum, max_pages)
+
+    async def commit_outbox_offset(self, consumer: str, position: int, dead_letters: list[tuple] = ()):
+        await self._run(self._writer, self.dedup_store.commit_outbox_offset, consumer, position, dead_letters)
+
+    async def commit_consumer_offset(self, group: str, topic: Optional[str], position: int):
+        await self._run(self._writer, self.dedup_store.commit_consumer_offset, group, topic, position)
+
+    async def save_worker_stats(self, run_id: str, worker_id: str, counters: dict[str, tuple]):
+        await self._run(self._writer, self.dedup_store.save_worker_stats, run_id, worker_id, counters)
+
+    async def clear(self):
+        await self._run(self._writer, self.dedup_store.clear)
+
+    # =========================
+    # Read path
+    # =========================
+    async def is_duplicate(self, topic: str, event_id: str) -> bool:
+        # cache memori dicek dulu di loop, hanya miss yang perlu ke thread
+        store = self.dedup_store
+        if store._in_memory(topic, event_id):
+            return True
+        # miss Bloom juga dijawab di loop; skipped dihitung sekali oleh DedupStore saat store
+        if store._prefilter_miss(topic, event_id):
+            return False
+        return await self._run(self._readers, self.dedup_store.is_duplicate, topic, event_id)
+
+    async def get_events(self, topic: Optional[str] = None) -> list:
+        return await self._run(self._readers, self.dedup_store.get_events, topic)
+
+    async def get_events_page(self, topic: Optional[str] = None, after: int = 0, limit: int = 100) -> list:
+        return await self._run(self._readers, self.dedup_store.get_events_page, topic, after, limit)
+
+    async def get_all_topics(self) -> list[str]:
+        if not self.dedup_store.multiprocess:
+            # registry topic in-memory, tidak perlu ke thread
+            return self.dedup_store.get_all_topics()
+        return await self._run(self._readers, self.dedup_store.get_all_topics)
+
+    async def get_topics(self) -> list[dict]:
+        if not self.dedup_store.multiprocess:
+            return self.dedup_store.get_topics()
+        return await self._run(self._readers, self.dedup_store.get_topics)
+
+    async def get_events_after(self, topic: Optional[str], after: int, limit: int) -> list:
+        return await self._run(self._readers, self.dedup_store.get_events_after, topic, after, limit)
+
+    async def get_consumer_offset(self, group: str, topic: Optional[str]) -> int:
+        return await self._run(self._readers, self.dedup_store.get_consumer_offset, group, topic)
+
+    async def get_seq_head(self, topic: Optional[str] = None) -> int:
+        return await self._run(self._readers, self.dedup_store.get_seq_head, topic)
+
+    async def purge_worker_stats(self, keep_run_id: str) -> int:
+        return await self._run(self._writer, self.dedup_store.purge_worker_stats, keep_run_id)
+
+    async def load_worker_stats(self, run_id: str) -> dict[str, tuple]:
+        return await self._run(self._readers, self.dedup_store.load_worker_stats, run_id)
+
+    async def get_outbox_batch(self, after: int, limit: int) -> list:
+        return await self._run(self._readers, self.dedup_store.get_outbox_batch, after, limit)
+
+    async def get_outbox_offset(self, consumer: str) -> int:
+        return await self._run(self._readers, self.dedup_store.get_outbox_offset, consumer)
+
+    async def get_outbox_head(self) -> int:
+        return await self._run(self._readers, self.dedup_store.get_outbox_head)
+
+    # =========================
+    # Cleanup
+    # =========================
+    def close(self):
+        for executor in (self._writer, self._readers):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self.dedup_store.close()
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import math
+import os
+import struct
+from pathlib import Path
+from typing import Optional
+
+
+class BloomFilter:
+    """
+    Bloom filter sederhana di atas bytearray.
+    might_contain() == False berarti pasti belum pernah di-add.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float, num_bits: Optional[int] = None,
+                 num_hashes: Optional[int] = None):
+        self.capacity = max(1, capacity)
+        self.fp_rate = fp_rate
+        self.num_bits = num_bits or max(8, math.ceil(-self.capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.num_hashes = num_hashes or max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: bytes):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: bytes):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def might_contain(self, key: bytes) -> bool:
+        bits = self.bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def fill_ratio(self) -> float:
+        return int.from_bytes(self.bits, "little").bit_count() / self.num_bits
+
+    def estimated_fp_rate(self) -> float:
+        return self.fill_ratio() ** self.num_hashes
+
+
+class BloomPrefilter:
+    """
+    Pre-filter membership untuk (topic, event_id) di depan lookup SQLite.
+    scope "global": satu filter untuk semua topic; "topic": satu filter per topic
+    (capacity berlaku per topic).
+    """
+
+    SNAPSHOT_MAGIC = b"BLM1"
+
+    def __init__(self, capacity: int = 1_000_000, fp_rate: float = 0.01, scope: str = "global"):
+        if scope not in ("global", "topic"):
+            raise ValueError(f"Unknown bloom scope: {scope}")
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.scope = scope
+        self.filters: dict[str, BloomFilter] = {}
+        # seq terakhir yang sudah masuk filter, untuk catch-up dari snapshot
+        self.max_seq = 0
+        # metrik probe
+        self.skipped = 0          # "pasti belum ada" -> probe SQLite dilewati
+        self.maybe = 0            # "mungkin ada" -> tetap probe SQLite
+        self.false_positives = 0  # "mungkin ada" tapi ternyata tidak ada di SQLite
+
+    def _filter_for(self, topic: str, create: bool) -> Optional[BloomFilter]:
+        name = topic if self.scope == "topic" else ""
+        bloom = self.filters.get(name)
+        if bloom is None and create:
+            bloom = self.filters[name] = BloomFilter(self.capacity, self.fp_rate)
+        return bloom
+
+    def _key(self, topic: str, event_id: str) -> bytes:
+        if self.scope == "topic":
+            return event_id.encode()
+        return f"{topic}\x00{event_id}".encode()
+
+    def add(self, topic: str, event_id: str):
+        self._filter_for(topic, create=True).add(self._key(topic, event_id))
+
+    def might_contain(self, topic: str, event_id: str) -> bool:
+        bloom = self._filter_for(topic, create=False)
+        return bloom is not None and bloom.might_contain(self._key(topic, event_id))
+
+    def get_stats(self) -> dict:
+        filters = self.filters.values()
+        num_bits = sum(f.num_bits for f in filters)
+        fill = (sum(f.fill_ratio() * f.num_bits for f in filters) / num_bits) if num_bits else 0.0
+        return {
+            "scope": self.scope,
+            "filters": len(self.filters),
+            "entries": sum(f.count for f in filters),
+            "memory_bytes": sum(len(f.bits) for f in filters),
+            "fill_ratio": round(fill, 6),
+            "estimated_fp_rate": max((f.estimated_fp_rate() for f in filters), default=0.0),
+            "target_fp_rate": self.fp_rate,
+            "probes_skipped": self.skipped,
+            "probes_maybe": self.maybe,
+            "false_positives": self.false_positives,
+            "observed_fp_rate": round(self.false_positives / self.maybe, 6) if self.maybe else 0.0,
+        }
+
+    # =========================
+    # Snapshot
+    # =========================
+    def save(self, path: str):
+        """Simpan snapshot: magic + panjang header + header JSON + bitset tiap filter"""
+        header = {
+            "scope": self.scope,
+            "capacity": self.capacity,
+            "fp_rate": self.fp_rate,
+            "max_seq": self.max_seq,
+            "filters": [
+                {"name": name, "num_bits": f.num_bits, "num_hashes": f.num_hashes,
+                 "count": f.count, "length": len(f.bits)}
+                for name, f in self.filters.items()
+            ],
+        }
+        raw = json.dumps(header).encode()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(self.SNAPSHOT_MAGIC)
+            fh.write(struct.pack("<I", len(raw)))
+            fh.write(raw)
+            for f in self.filters.values():
+                fh.write(f.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, capacity: int, fp_rate: float, scope: str) -> Optional["BloomPrefilter"]:
+        """Load snapshot; return None jika tidak ada atau parameternya beda dengan config"""
+        try:
+            with open(path, "rb") as fh:
+                if fh.read(4) != cls.SNAPSHOT_MAGIC:
+                    return None
+                (size,) = struct.unpack("<I", fh.read(4))
+                header = json.loads(fh.read(size))
+                if (header["scope"], header["capacity"], header["fp_rate"]) != (scope, capacity, fp_rate):
+                    return None
+                prefilter = cls(capacity, fp_rate, scope)
+                # snapshot lama menyimpan rowid; database lama dimigrasi dengan seq = rowid
+                prefilter.max_seq = header["max_seq"] if "max_seq" in header else header["max_rowid"]
+                for meta in header["filters"]:
+                    bloom = BloomFilter(capacity, fp_rate, meta["num_bits"], meta["num_hashes"])
+                    bloom.bits = bytearray(fh.read(meta["length"]))
+                    bloom.count = meta["count"]
+                    prefilter.filters[meta["name"]] = bloom
+                return prefilter
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Optional
+
+
+class CompactEventIndex:
+    """
+    Index dedup ringkas untuk mode in-memory: menyimpan digest (topic, event_id)
+    berukuran tetap (64 atau 128 bit) di tabel open addressing (linear probing)
+    berbasis array('Q'), bukan set of str.
+
+    digest_bits=64 (default, ~22 byte/event): peluang ada collision ~ n^2 / 2^65, yaitu
+    ~3e-6 untuk 10^7 event, ~3e-4 untuk 10^8, ~3% untuk 10^9. Collision = event unik
+    dianggap duplicate.
+    digest_bits=128 (~45 byte/event): peluang collision ~ n^2 / 2^129, praktis exact.
+    Slot kosong = semua word nol (digest nol dipetakan ke 1).
+    """
+
+    MAGIC = b"CEI1"
+
+    def __init__(self, digest_bits: int = 64, initial_capacity: int = 1024, max_load: float = 0.7):
+        if digest_bits not in (64, 128):
+            raise ValueError("digest_bits must be 64 or 128")
+        self.digest_bits = digest_bits
+        self.words = digest_bits // 64
+        self.max_load = max_load
+        self.capacity = 1 << max(3, (initial_capacity - 1).bit_length())
+        self.slots = array("Q", bytes(8 * self.words * self.capacity))
+        self.count = 0
+        self.topic_counts: dict[str, int] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._views: tuple = ()
+
+    def _digest(self, topic: str, event_id: str) -> tuple:
+        raw = hashlib.blake2b(f"{topic}\x00{event_id}".encode(), digest_size=8 * self.words).digest()
+        digest = struct.unpack(f"<{self.words}Q", raw)
+        if not any(digest):
+            digest = (1,) + digest[1:]
+        return digest
+
+    def _find(self, digest: tuple) -> tuple:
+        """Return (index slot, ditemukan?)"""
+        slots, words, mask = self.slots, self.words, self.capacity - 1
+        i = digest[0] & mask
+        while True:
+            base = i * words
+            first = slots[base]
+            if first == 0 and (words == 1 or slots[base + 1] == 0):
+                return i, False
+            if first == digest[0] and (words == 1 or slots[base + 1] == digest[1]):
+                return i, True
+            i = (i + 1) & mask
+
+    def contains(self, topic: str, event_id: str) -> bool:
+        return self._find(self._digest(topic, event_id))[1]
+
+    def add(self, topic: str, event_id: str) -> bool:
+        """Return True jika baru ditambahkan, False jika sudah ada"""
+        digest = self._digest(topic, event_id)
+        i, found = self._find(digest)
+        if found:
+            return False
+        self._ensure_writable()
+        base = i * self.words
+        for w in range(self.words):
+            self.slots[base + w] = digest[w]
+        self.count += 1
+        self.topic_counts[topic] = self.topic_counts.get(topic, 0) + 1
+        if self.count > self.capacity * self.max_load:
+            self._grow()
+        return True
+
+    def _grow(self):
+        old, words = self.slots, self.words
+        self.capacity *= 2
+        self.slots = array("Q", bytes(8 * words * self.capacity))
+        mask = self.capacity - 1
+        for base in range(0, len(old), words):
+            digest = tuple(old[base:base + words])
+            if not any(digest):
+                continue
+            i = digest[0] & mask
+            while self.slots[i * words] or (words == 2 and self.slots[i * words + 1]):
+                i = (i + 1) & mask
+            for w in range(words):
+                self.slots[i * words + w] = digest[w]
+
+    def _ensure_writable(self):
+        """Tabel hasil mmap bersifat read-only; salin ke array saat write pertama"""
+        if self._mmap is not None:
+            slots = array("Q")
+            slots.frombytes(self.slots.cast("B"))
+            self._release_mmap()
+            self.slots = slots
+
+    def _release_mmap(self):
+        if self._mmap is not None:
+            for view in self._views:
+                view.release()
+            self._views = ()
+            self._mmap.close()
+            self._mmap = None
+
+    def topics(self) -> list[str]:
+        return list(self.topic_counts.keys())
+
+    def clear(self):
+        self._release_mmap()
+        self.__init__(self.digest_bits, max_load=self.max_load)
+
+    def close(self):
+        self._release_mmap()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get_stats(self) -> dict:
+        table_bytes = 8 * self.words * self.capacity
+        return {
+            "size": self.count,
+            "capacity": self.capacity,
+            "digest_bits": self.digest_bits,
+            "load_factor": round(self.count / self.capacity, 6),
+            "table_bytes": table_bytes,
+            "bytes_per_event": round(table_bytes / self.count, 2) if self.count else 0.0,
+            "mmapped": self._mmap is not None,
+        }
+
+    # =========================
+    # Persistence (flat file, bisa di-mmap)
+    # =========================
+    def save(self, path: str):
+        """Format: magic + panjang header + header JSON + padding ke 8 byte + tabel slot"""
+        header = json.dumps({
+            "digest_bits": self.digest_bits,
+            "capacity": self.capacity,
+            "count": self.count,
+            "max_load": self.max_load,
+            "topic_counts": self.topic_counts,
+        }).encode()
+        prefix = len(self.MAGIC) + 4 + len(header)
+        padding = b"\0" * (-prefix % 8)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(self.MAGIC)
+            fh.write(struct.pack("<I", len(header)))
+            fh.write(header)
+            fh.write(padding)
+            fh.write(memoryview(self.slots).cast("B"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, use_mmap: bool = True) -> Optional["CompactEventIndex"]:
+        """Load index dari file; dengan use_mmap tabel di-map langsung tanpa disalin"""
+        try:
+            with open(path, "rb") as fh:
+                if fh.read(4) != cls.MAGIC:
+                    return None
+                (size,) = struct.unpack("<I", fh.read(4))
+                header = json.loads(fh.read(size))
+                offset = 8 + size + (-(8 + size) % 8)
+                index = cls(header["digest_bits"], max_load=header["max_load"])
+                index.capacity = header["capacity"]
+                index.count = header["count"]
+                index.topic_counts = header["topic_counts"]
+                length = 8 * index.words * index.capacity
+                if use_mmap and length:
+                    index._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                    base = memoryview(index._mmap)
+                    view = base[offset:offset + length]
+                    index.slots = view.cast("Q")
+                    index._views = (index.slots, view, base)
+                else:
+                    fh.seek(offset)
+                    index.slots = array("Q")
+                    index.slots.frombytes(fh.read(length))
+                return index
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
@@ -3,6 +3,92 @@ import os
 class Config:
     DATABASE_PATH = os.getenv("DATABASE_PATH", "data/events.db")
     QUEUE_SIZE = int(os.getenv("QUEUE_SIZE", "10000"))
+    # worker processor: jumlah partition/worker dan ukuran batch per pengambilan
+    WORKER_COUNT = int(os.getenv("WORKER_COUNT", "1"))
+    WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "100"))
+    # admission control /publish: tolak (429) saat queue di atas watermark (0 = mati)
+    ADMISSION_HIGH_WATERMARK = float(os.getenv("ADMISSION_HIGH_WATERMARK", "0.9"))
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+    # rate limit per source (event/detik, 0 = tanpa limit) dan burst-nya
+    SOURCE_RATE_LIMIT = float(os.getenv("SOURCE_RATE_LIMIT", "0"))
+    SOURCE_RATE_BURST = float(os.getenv("SOURCE_RATE_BURST", "0"))
+    # POST /publish/stream: baris valid per commit dan panjang baris maksimum
+    STREAM_INGEST_CHUNK_SIZE = int(os.getenv("STREAM_INGEST_CHUNK_SIZE", "1000"))
+    STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "1048576"))
     HOST = os.getenv("HOST", "0.0.0.0")
+    # jumlah proses uvicorn; >1 otomatis mengaktifkan mode multi-process (dedup atomik di SQLite)
+    WORKERS = int(os.getenv("WORKERS", "1"))
+    MULTIPROCESS_MODE = WORKERS > 1 or os.getenv("MULTIPROCESS_MODE", "false").lower() == "true"
+    STATS_FLUSH_INTERVAL_SECONDS = float(os.getenv("STATS_FLUSH_INTERVAL_SECONDS", "1"))
     PORT = int(os.getenv("PORT", "8080"))
-    TARGET_URL = "http://event-consumer:8080/events"
+    TARGET_URL = os.getenv("TARGET_URL", "http://event-consumer:8080/events")
+
+    # Forwarding: outbox SQLite + forwarder ke TARGET_URL (at-least-once, butuh DATABASE_PATH)
+    FORWARDING_ENABLED = os.getenv("FORWARDING_ENABLED", "false").lower() == "true"
+    FORWARD_BATCH_SIZE = int(os.getenv("FORWARD_BATCH_SIZE", "100"))
+    FORWARD_CONCURRENCY = int(os.getenv("FORWARD_CONCURRENCY", "4"))
+    FORWARD_TIMEOUT_SECONDS = float(os.getenv("FORWARD_TIMEOUT_SECONDS", "10"))
+    FORWARD_MAX_BACKOFF_SECONDS = float(os.getenv("FORWARD_MAX_BACKOFF_SECONDS", "30"))
+
+    # Sharding processed_events per hash topic ke N file SQLite (<= 1 = satu DATABASE_PATH)
+    SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+    SHARD_DIR = os.getenv("SHARD_DIR", "data/shards")
+
+    # Subscription push (GET /subscribe/sse, WS /subscribe/ws)
+    SUBSCRIBER_BUFFER_SIZE = int(os.getenv("SUBSCRIBER_BUFFER_SIZE", "1000"))
+    SUBSCRIBER_OVERFLOW_POLICY = os.getenv("SUBSCRIBER_OVERFLOW_POLICY", "drop_oldest")  # drop_oldest|disconnect|pause
+    SUBSCRIBERS_MAX = int(os.getenv("SUBSCRIBERS_MAX", "1000"))
+    SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+    # Consumer group (GET /consume): batas long-poll dan ukuran batch per request
+    CONSUME_MAX_WAIT_MS = int(os.getenv("CONSUME_MAX_WAIT_MS", "30000"))
+    CONSUME_MAX_BATCH = int(os.getenv("CONSUME_MAX_BATCH", "1000"))
+
+    # SQLite tuning (koneksi writer + reader pool)
+    # FULL: commit yang sudah di-ack tahan crash OS / mati listrik; NORMAL lebih cepat tapi
+    # commit terakhir bisa hilang saat mati listrik (tetap aman jika hanya proses yang crash)
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "FULL")
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negatif = KiB (64 MB)
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", "268435456"))  # 256 MB
+    SQLITE_READER_POOL_SIZE = int(os.getenv("SQLITE_READER_POOL_SIZE", "4"))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+    # Group commit: gabungkan /publish yang bersamaan ke satu transaksi (opt-in)
+    GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "false").lower() == "true"
+    GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "500"))
+    GROUP_COMMIT_MAX_LINGER_MS = float(os.getenv("GROUP_COMMIT_MAX_LINGER_MS", "5"))
+
+    # Bloom prefilter di depan lookup SQLite (opt-in)
+    BLOOM_ENABLED = os.getenv("BLOOM_ENABLED", "false").lower() == "true"
+    BLOOM_SCOPE = os.getenv("BLOOM_SCOPE", "global")  # "global" atau "topic"
+    BLOOM_CAPACITY = int(os.getenv("BLOOM_CAPACITY", "1000000"))
+    BLOOM_FP_RATE = float(os.getenv("BLOOM_FP_RATE", "0.01"))
+    BLOOM_SNAPSHOT_PATH = os.getenv("BLOOM_SNAPSHOT_PATH", "")
+
+    # Cache dedup in-memory yang dibatasi (0 = tanpa batas). Kosong: 1000000 dengan database,
+    # tanpa batas tanpa database (di mode in-memory cache adalah satu-satunya sumber dedup)
+    DEDUP_CACHE_MAX_ENTRIES = int(os.getenv("DEDUP_CACHE_MAX_ENTRIES") or "-1")
+    DEDUP_WINDOW_SECONDS = float(os.getenv("DEDUP_WINDOW_SECONDS", "0"))
+
+    # Index digest ringkas untuk mode in-memory (tanpa DATABASE_PATH)
+    COMPACT_INDEX_ENABLED = os.getenv("COMPACT_INDEX_ENABLED", "false").lower() == "true"
+    COMPACT_INDEX_BITS = int(os.getenv("COMPACT_INDEX_BITS", "64"))  # 64 atau 128 (lihat CompactEventIndex)
+    COMPACT_INDEX_PATH = os.getenv("COMPACT_INDEX_PATH", "")
+
+    # Retention processed_events (0 / kosong = nonaktif)
+    RETENTION_MAX_AGE_SECONDS = float(os.getenv("RETENTION_MAX_AGE_SECONDS", "0"))
+    RETENTION_TOPIC_MAX_AGE = os.getenv("RETENTION_TOPIC_MAX_AGE", "")  # "topic.a=3600,topic.b=60"
+    RETENTION_MAX_ROWS_PER_TOPIC = int(os.getenv("RETENTION_MAX_ROWS_PER_TOPIC", "0"))
+    RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", "60"))
+    RETENTION_CHUNK_SIZE = int(os.getenv("RETENTION_CHUNK_SIZE", "1000"))
+    RETENTION_VACUUM_PAGES = int(os.getenv("RETENTION_VACUUM_PAGES", "1000"))
+
+    # Ukuran halaman keyset saat streaming GET /events?format=ndjson
+    EVENTS_STREAM_BATCH = int(os.getenv("EVENTS_STREAM_BATCH", "1000"))
+
+    # Instrumentasi hot path + endpoint /metrics (Prometheus); false = mati total
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Endpoint POST /debug/profile (nonaktif secara default)
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "60"))
@@ -0,0 +1,138 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from .config import Config
+from .metrics import Histogram
+
+
+class ConnectionManager:
+    """
+    Kelola koneksi SQLite jangka panjang:
+    - satu koneksi writer (WAL mode), diserialisasi dengan write_lock
+    - pool koneksi read-only untuk query, tidak pernah menunggu writer
+    """
+
+    def __init__(self, db_path: str,
+                 reader_pool_size: Optional[int] = None,
+                 synchronous: Optional[str] = None,
+                 cache_size: Optional[int] = None,
+                 mmap_size: Optional[int] = None,
+                 instrument: Optional[bool] = None,
+                 busy_timeout_ms: Optional[int] = None):
+        self.db_path = db_path
+        self.reader_pool_size = max(1, reader_pool_size or getattr(Config, "SQLITE_READER_POOL_SIZE", 4))
+        self.synchronous = synchronous or getattr(Config, "SQLITE_SYNCHRONOUS", "FULL")
+        self.cache_size = cache_size if cache_size is not None else getattr(Config, "SQLITE_CACHE_SIZE", -65536)
+        self.mmap_size = mmap_size if mmap_size is not None else getattr(Config, "SQLITE_MMAP_SIZE", 268435456)
+        # berapa lama menunggu lock database dipegang proses lain (mode multi-worker)
+        if busy_timeout_ms is None:
+            busy_timeout_ms = getattr(Config, "SQLITE_BUSY_TIMEOUT_MS", 5000)
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self.write_lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+        self._readers: queue.Queue = queue.Queue()
+        self._all_readers: list[sqlite3.Connection] = []
+        self._closed = False
+        # histogram waktu tunggu koneksi (writer lock / reader pool), None jika metrics mati
+        if instrument is None:
+            instrument = getattr(Config, "METRICS_ENABLED", True)
+        self.wait_histograms: Optional[dict[str, Histogram]] = None
+        if instrument:
+            self.wait_histograms = {"writer": Histogram(), "reader": Histogram()}
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.writer = sqlite3.connect(self.db_path, check_same_thread=False,
+                                      timeout=self.busy_timeout_ms / 1000)
+        # harus sebelum journal_mode dan tabel pertama; no-op untuk database lama
+        self.writer.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.writer.execute("PRAGMA journal_mode=WAL")
+        self.writer.execute(f"PRAGMA synchronous={self.synchronous}")
+        self._apply_common_pragmas(self.writer)
+
+    def _apply_common_pragmas(self, conn: sqlite3.Connection):
+        conn.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+    def _open_reader(self) -> sqlite3.Connection:
+        uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=self.busy_timeout_ms / 1000)
+        self._apply_common_pragmas(conn)
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    # =========================
+    # Access
+    # =========================
+    @contextmanager
+    def write(self):
+        """Pinjam koneksi writer; commit jika sukses, rollback jika error"""
+        if self.wait_histograms is None:
+            self.write_lock.acquire()
+        elif self.write_lock.acquire(blocking=False):
+            self.wait_histograms["writer"].observe(0.0)
+        else:
+            started = time.perf_counter()
+            self.write_lock.acquire()
+            self.wait_histograms["writer"].observe(time.perf_counter() - started)
+        try:
+            yield self.writer
+            self.writer.commit()
+        except BaseException:
+            self.writer.rollback()
+            raise
+        finally:
+            self.write_lock.release()
+
+    @contextmanager
+    def read(self):
+        """Pinjam koneksi read-only dari pool (dibuat lazy sampai reader_pool_size)"""
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                self._readers.put(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            conn = self._readers.get_nowait()
+            if self.wait_histograms is not None:
+                self.wait_histograms["reader"].observe(0.0)
+            return conn
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if len(self._all_readers) < self.reader_pool_size:
+                conn = self._open_reader()
+                self._all_readers.append(conn)
+                return conn
+        if self.wait_histograms is None:
+            return self._readers.get()
+        started = time.perf_counter()
+        conn = self._readers.get()
+        self.wait_histograms["reader"].observe(time.perf_counter() - started)
+        return conn
+
+    # =========================
+    # Cleanup
+    # =========================
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self.write_lock:
+            self.writer.close()
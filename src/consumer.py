@@ -0,0 +1,69 @@
+import asyncio
+from typing import Optional
+
+# waiter dengan topic "" menunggu event dari topic mana pun
+ALL_TOPICS = ""
+
+
+class ConsumeNotifier:
+    """
+    Membangunkan long-poll GET /consume saat ada event baru (dipasang sebagai handler "*"
+    EventProcessor, jadi dipanggil setelah event di-commit). Satu future per request yang
+    menunggu, di-index per topic; tidak ada polling ke SQLite selama menunggu.
+    """
+
+    def __init__(self):
+        self._waiters: dict[str, set[asyncio.Future]] = {}
+        self.closed = False
+        self.stats = {"waiting": 0, "wakeups": 0}
+
+    def waiter(self, topic: Optional[str]) -> asyncio.Future:
+        """
+        Daftarkan waiter SEBELUM query ke SQLite, supaya event yang di-commit di antara
+        query dan await tetap membangunkan request ini.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(topic or ALL_TOPICS, set()).add(future)
+        return future
+
+    def discard(self, topic: Optional[str], future: asyncio.Future):
+        key = topic or ALL_TOPICS
+        waiters = self._waiters.get(key)
+        if waiters is not None:
+            waiters.discard(future)
+            if not waiters:
+                del self._waiters[key]
+
+    async def wait(self, topic: Optional[str], future: asyncio.Future, timeout: float) -> bool:
+        """True jika dibangunkan event baru, False jika timeout"""
+        self.stats["waiting"] += 1
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.stats["waiting"] -= 1
+            self.discard(topic, future)
+
+    async def handle_events(self, events: list):
+        """Handler EventProcessor: bangunkan waiter topic event ini dan waiter semua topic"""
+        if not self._waiters:
+            return
+        for key in {event.topic for event in events} | {ALL_TOPICS}:
+            for future in self._waiters.pop(key, ()):
+                if not future.done():
+                    future.set_result(None)
+                    self.stats["wakeups"] += 1
+
+    def close_all(self):
+        """Shutdown: lepaskan semua long-poll (mereka kembali dengan batch kosong)"""
+        self.closed = True
+        for waiters in self._waiters.values():
+            for future in waiters:
+                if not future.done():
+                    future.set_result(None)
+        self._waiters.clear()
+
+    def get_stats(self) -> dict:
+        return dict(self.stats)
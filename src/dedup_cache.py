@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, Optional
+
+
+class DedupCache:
+    """
+    Cache dedup in-memory yang dibatasi: LRU dengan batas jumlah entry
+    (max_entries) dan/atau dedup window (window_seconds sejak terakhir dilihat).
+    0 berarti tidak dibatasi. Entry yang di-evict tetap dicek lewat SQLite
+    jika store punya db_path; pada mode in-memory, window ini adalah horizon dedup.
+    """
+
+    def __init__(self, max_entries: int = 0, window_seconds: float = 0):
+        self.max_entries = max_entries
+        self.window_seconds = window_seconds
+        self.lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()  # (topic, event_id) -> last_seen
+        self._topic_counts: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def contains(self, topic: str, event_id: str) -> bool:
+        key = (topic, event_id)
+        with self.lock:
+            if key in self._entries:
+                now = time.monotonic()
+                if self.window_seconds and now - self._entries[key] > self.window_seconds:
+                    self._remove(key)
+                    self.evictions += 1
+                    self.misses += 1
+                    return False
+                self._entries[key] = now
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, topic: str, event_id: str):
+        key = (topic, event_id)
+        with self.lock:
+            if key not in self._entries:
+                self._topic_counts[topic] = self._topic_counts.get(topic, 0) + 1
+            self._entries[key] = time.monotonic()
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _remove(self, key: tuple):
+        del self._entries[key]
+        topic = key[0]
+        self._topic_counts[topic] -= 1
+        if not self._topic_counts[topic]:
+            del self._topic_counts[topic]
+
+    def _evict(self):
+        """Buang entry paling lama: melebihi max_entries atau di luar window"""
+        if self.max_entries:
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        if self.window_seconds:
+            cutoff = time.monotonic() - self.window_seconds
+            while self._entries:
+                key, last_seen = next(iter(self._entries.items()))
+                if last_seen >= cutoff:
+                    break
+                self._remove(key)
+                self.evictions += 1
+
+    def expire(self):
+        """Evict entry yang sudah di luar window tanpa menunggu add berikutnya"""
+        with self.lock:
+            self._evict()
+
+    # =========================
+    # Iteration / stats
+    # =========================
+    def topics(self) -> list[str]:
+        with self.lock:
+            return list(self._topic_counts.keys())
+
+    def keys(self, topic: Optional[str] = None) -> Iterator[tuple]:
+        with self.lock:
+            keys = list(self._entries.keys())
+        return (key for key in keys if topic is None or key[0] == topic)
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+            self._topic_counts.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "window_seconds": self.window_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 6) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
@@ -1,24 +1,89 @@
 import sqlite3
-import threading
 import json  # ← Tambahkan import ini
-from pathlib import Path
+import logging
+from collections import Counter
 from typing import Optional
 
+from .bloom import BloomPrefilter
+from .compact_index import CompactEventIndex
+from .config import Config
+from .connection_manager import ConnectionManager
+from .dedup_cache import DedupCache
+from .topic_registry import TopicRegistry, utc_now
+
+logger = logging.getLogger("EventAggregator")
+
 class DedupStore:
-    def __init__(self, db_path: Optional[str] = None):
+    # batas jumlah parameter per query IN (...) agar aman untuk SQLITE_MAX_VARIABLE_NUMBER lama (999)
+    LOOKUP_CHUNK = 900
+    # batas cache default jika DEDUP_CACHE_MAX_ENTRIES tidak di-set dan ada database
+    DEFAULT_CACHE_MAX_ENTRIES = 1_000_000
+    _OUTBOX_INSERT = "INSERT INTO outbox (topic, event_id, timestamp, source, payload) VALUES (?, ?, ?, ?, ?)"
+    _TOPIC_RECORD = """
+        INSERT INTO topics (topic, event_count, first_seen, last_seen) VALUES (?, ?, ?, ?)
+        ON CONFLICT(topic) DO UPDATE SET
+            event_count = event_count + excluded.event_count,
+            last_seen = excluded.last_seen
+    """
+
+    def __init__(self, db_path: Optional[str] = None, reader_pool_size: Optional[int] = None,
+                 prefilter: Optional[BloomPrefilter] = None, prefilter_snapshot: Optional[str] = None,
+                 cache_max_entries: Optional[int] = None, cache_window_seconds: Optional[float] = None,
+                 compact_index: Optional[CompactEventIndex] = None, compact_index_path: Optional[str] = None,
+                 outbox: bool = False, multiprocess: bool = False):
         """
         db_path: path ke SQLite file; jika None, gunakan in-memory store saja
+        reader_pool_size: jumlah koneksi read-only untuk query (default dari Config)
+        prefilter: Bloom filter opsional di depan lookup SQLite (hanya jika db_path ada)
+        prefilter_snapshot: file snapshot filter; di-load saat start, disimpan saat close
+        cache_max_entries / cache_window_seconds: batas cache dedup in-memory (0 = tanpa batas,
+            negatif = default: DEFAULT_CACHE_MAX_ENTRIES dengan database, tanpa batas tanpa database)
+        compact_index: index digest ringkas, menggantikan cache untuk mode in-memory (db_path=None)
+        compact_index_path: file index; di-mmap saat start, disimpan saat close
+        outbox: tulis event unik juga ke tabel outbox di transaksi yang sama (untuk forwarder)
+        multiprocess: beberapa proses berbagi database; INSERT OR IGNORE satu-satunya penentu
+            unik/duplicate, cache memori hanya berisi entry positif (sudah ada di SQLite)
         """
+        if multiprocess and not db_path:
+            raise ValueError("Multi-process mode requires a database path (in-memory store is per process)")
+        if multiprocess and (prefilter is not None or compact_index is not None):
+            raise ValueError("Bloom prefilter / compact index are per-process negative caches "
+                             "and cannot be used in multi-process mode")
         self.db_path = db_path
-        self.lock = threading.Lock()
-        self.store = {}  # in-memory store {topic: set(event_id)}
+        if cache_max_entries is None:
+            cache_max_entries = getattr(Config, "DEDUP_CACHE_MAX_ENTRIES", -1)
+        if cache_max_entries < 0:
+            # tanpa SQLite tidak ada fallback: cache terbatas berarti dedup tidak lagi exact
+            cache_max_entries = self.DEFAULT_CACHE_MAX_ENTRIES if db_path else 0
+        elif cache_max_entries > 0 and not db_path:
+            logger.warning(f"In-memory dedup is bounded to {cache_max_entries} entries; "
+                           f"older events can be accepted again")
+        if cache_window_seconds is None:
+            cache_window_seconds = getattr(Config, "DEDUP_WINDOW_SECONDS", 0)
+        # in-memory cache (topic, event_id) yang dibatasi; SQLite tetap sumber kebenaran
+        self.store = DedupCache(max_entries=cache_max_entries, window_seconds=cache_window_seconds)
+        self.connections: Optional[ConnectionManager] = None
+        self.prefilter: Optional[BloomPrefilter] = None
+        self.prefilter_snapshot = prefilter_snapshot
+        self.index: Optional[CompactEventIndex] = None
+        self.index_path = compact_index_path
+        self.outbox = bool(outbox and db_path)
+        self.multiprocess = multiprocess
+        # jumlah event per topic; di-maintain di transaksi yang sama dengan insert / retention
+        self.topic_registry = TopicRegistry()
+
+        if not self.db_path and compact_index is not None:
+            loaded = CompactEventIndex.load(compact_index_path) if compact_index_path else None
+            self.index = loaded or compact_index
 
         if self.db_path:
+            self.connections = ConnectionManager(self.db_path, reader_pool_size=reader_pool_size)
             self._init_db()
+            if prefilter is not None:
+                self._init_prefilter(prefilter)
 
     def _init_db(self):
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connections.write() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS processed_events (
                     topic TEXT NOT NULL,
@@ -27,31 +92,158 @@ class DedupStore:
                     source TEXT NOT NULL,
                     payload TEXT NOT NULL,
                     processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    seq INTEGER,
                     PRIMARY KEY (topic, event_id)
                 )
             """)
+            # seq: offset monotonic per event (consumer group), diberikan saat insert
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(processed_events)")]
+            if "seq" not in columns:
+                logger.info("Adding seq column to processed_events")
+                conn.execute("ALTER TABLE processed_events ADD COLUMN seq INTEGER")
+                conn.execute("UPDATE processed_events SET seq = rowid")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_seq ON processed_events(seq)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_topic_seq ON processed_events(topic, seq)")
+            # high-water mark seq disimpan terpisah agar tidak dipakai ulang setelah retention
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS event_seq (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            conn.execute("""
+                INSERT OR IGNORE INTO event_seq (name, value)
+                SELECT 'processed_events', COALESCE(MAX(seq), 0) FROM processed_events
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS consumer_offsets (
+                    group_name TEXT NOT NULL,
+                    topic TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (group_name, topic)
+                )
+            """)
             conn.execute("CREATE INDEX IF NOT EXISTS idx_topic ON processed_events(topic)")
-            conn.commit()
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_processed_at ON processed_events(processed_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS topics (
+                    topic TEXT PRIMARY KEY,
+                    event_count INTEGER NOT NULL,
+                    first_seen TIMESTAMP NOT NULL,
+                    last_seen TIMESTAMP NOT NULL
+                )
+            """)
+            # database lama / hasil reshard: registry dibangun sekali dari processed_events
+            if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM topics) "
+                            "AND EXISTS (SELECT 1 FROM processed_events)").fetchone()[0]:
+                logger.info("Backfilling topic registry from processed_events")
+                conn.execute("""
+                    INSERT INTO topics (topic, event_count, first_seen, last_seen)
+                    SELECT topic, COUNT(*), MIN(processed_at), MAX(processed_at)
+                    FROM processed_events GROUP BY topic
+                """)
+            if self.multiprocess:
+                # counter Stats per worker, dijumlahkan untuk /stats (topic "" = global)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS worker_stats (
+                        run_id TEXT NOT NULL,
+                        worker_id TEXT NOT NULL,
+                        topic TEXT NOT NULL,
+                        received INTEGER NOT NULL,
+                        unique_processed INTEGER NOT NULL,
+                        duplicate_dropped INTEGER NOT NULL,
+                        PRIMARY KEY (run_id, worker_id, topic)
+                    )
+                """)
+            if self.outbox:
+                # AUTOINCREMENT: id tidak pernah dipakai ulang walau row lama sudah dihapus,
+                # sehingga offset consumer selalu valid
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS outbox (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        topic TEXT NOT NULL,
+                        event_id TEXT NOT NULL,
+                        timestamp TEXT NOT NULL,
+                        source TEXT NOT NULL,
+                        payload TEXT NOT NULL
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS outbox_offsets (
+                        consumer TEXT PRIMARY KEY,
+                        position INTEGER NOT NULL
+                    )
+                """)
+                # batch yang ditolak permanen oleh TARGET_URL (4xx), untuk diperiksa / dikirim ulang manual
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS outbox_dead_letters (
+                        id INTEGER PRIMARY KEY,
+                        topic TEXT NOT NULL,
+                        event_id TEXT NOT NULL,
+                        timestamp TEXT NOT NULL,
+                        source TEXT NOT NULL,
+                        payload TEXT NOT NULL,
+                        error TEXT NOT NULL,
+                        failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+        with self.connections.read() as conn:
+            self.topic_registry.load(
+                conn.execute("SELECT topic, event_count, first_seen, last_seen FROM topics").fetchall()
+            )
+
+    def _init_prefilter(self, prefilter: BloomPrefilter):
+        """Load snapshot jika cocok, lalu catch-up dari processed_events (seq > snapshot)"""
+        if self.prefilter_snapshot:
+            loaded = BloomPrefilter.load(self.prefilter_snapshot, prefilter.capacity,
+                                         prefilter.fp_rate, prefilter.scope)
+            if loaded is not None:
+                prefilter = loaded
+        with self.connections.read() as conn:
+            cursor = conn.execute(
+                "SELECT seq, topic, event_id FROM processed_events WHERE seq > ? ORDER BY seq",
+                (prefilter.max_seq,)
+            )
+            for seq, topic, event_id in cursor:
+                prefilter.add(topic, event_id)
+                prefilter.max_seq = seq
+        self.prefilter = prefilter
 
     # =========================
     # Dedup logic
     # =========================
+    def _prefilter_miss(self, topic: str, event_id: str) -> bool:
+        """Bloom menjamin event belum pernah disimpan (counter prefilter tidak disentuh)"""
+        return self.prefilter is not None and not self.prefilter.might_contain(topic, event_id)
+
     def is_duplicate(self, topic: str, event_id: str) -> bool:
-        if topic in self.store and event_id in self.store[topic]:
+        if self._in_memory(topic, event_id):
             return True
         if self.db_path:
-            with self.lock, sqlite3.connect(self.db_path) as conn:
+            if self.prefilter is not None:
+                if self._prefilter_miss(topic, event_id):
+                    self.prefilter.skipped += 1
+                    return False
+                self.prefilter.maybe += 1
+            with self.connections.read() as conn:
                 cursor = conn.execute(
                     "SELECT 1 FROM processed_events WHERE topic = ? AND event_id = ?",
                     (topic, event_id)
                 )
-                return cursor.fetchone() is not None
+                found = cursor.fetchone() is not None
+            if not found and self.prefilter is not None:
+                self.prefilter.false_positives += 1
+            return found
         return False
 
     def add_event(self, topic: str, event_id: str):
-        if topic not in self.store:
-            self.store[topic] = set()
-        self.store[topic].add(event_id)
+        if self.index is not None:
+            self.index.add(topic, event_id)
+            return
+        self.store.add(topic, event_id)
+        if self.prefilter is not None:
+            self.prefilter.add(topic, event_id)
 
     def store_event(self, topic: str, event_id: str, timestamp: str,
                     source: str, payload: str) -> bool:  # ← payload harus string JSON
@@ -62,32 +254,223 @@ class DedupStore:
         Args:
             payload: JSON string dari event payload (bukan dict!)
         """
+        if self.multiprocess:
+            return self._store_event_atomic(topic, event_id, timestamp, source, payload)
+
         if self.is_duplicate(topic, event_id):
             return False
 
         # simpan ke memori
         self.add_event(topic, event_id)
+        now = utc_now()
 
         # simpan ke SQLite
         if self.db_path:
             try:
-                with self.lock, sqlite3.connect(self.db_path) as conn:
+                with self.connections.write() as conn:
                     conn.execute("""
-                        INSERT INTO processed_events (topic, event_id, timestamp, source, payload)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (topic, event_id, timestamp, source, payload))
-                    conn.commit()
+                        INSERT INTO processed_events (topic, event_id, timestamp, source, payload, seq)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, (topic, event_id, timestamp, source, payload, self._allocate_seq(conn, 1)))
+                    if self.outbox:
+                        conn.execute(self._OUTBOX_INSERT, (topic, event_id, timestamp, source, payload))
+                    conn.execute(self._TOPIC_RECORD, (topic, 1, now, now))
             except sqlite3.IntegrityError:
                 return False
 
+        self.topic_registry.record({topic: 1}, now)
         return True
 
+    def store_events(self, rows: list[tuple]) -> list[bool]:
+        """
+        Simpan banyak event dalam satu transaksi (satu commit / fsync).
+        rows: list of (topic, event_id, timestamp, source, payload_json)
+        Return list bool sejajar dengan rows: True jika unik, False jika duplicate.
+
+        Duplicate di dalam batch sendiri juga terdeteksi (kemunculan pertama menang),
+        cek ke SQLite dilakukan set-based per topic, insert pakai executemany.
+        """
+        results = [False] * len(rows)
+        candidates = []  # index row yang belum terlihat di batch ini / memori
+        seen = set()
+        for i, row in enumerate(rows):
+            key = (row[0], row[1])
+            if key in seen or self._in_memory(row[0], row[1]):
+                continue
+            seen.add(key)
+            candidates.append(i)
+
+        now = utc_now()
+        if not self.db_path:
+            for i in candidates:
+                self.add_event(rows[i][0], rows[i][1])
+                results[i] = True
+            self.topic_registry.record(Counter(rows[i][0] for i in candidates), now)
+            return results
+
+        if self.multiprocess:
+            with self.connections.write() as conn:
+                inserted = self._insert_returning(conn, [rows[i] for i in candidates])
+                counts = Counter(topic for topic, _ in inserted)
+                self._record_topics(conn, counts, now)
+            self.topic_registry.record(counts, now)
+            for i in candidates:
+                key = (rows[i][0], rows[i][1])
+                # baru atau sudah ada di SQLite, keduanya fakta positif untuk cache
+                self.store.add(*key)
+                results[i] = key in inserted
+            return results
+
+        with self.connections.write() as conn:
+            new_rows = self._insert_new(conn, rows, candidates, use_prefilter=True)
+            if new_rows is None:
+                # prefilter memberi false negative (mis. snapshot basi): ulangi dengan probe penuh
+                logger.warning("Bloom prefilter missed existing events; retrying batch with full lookup")
+                conn.rollback()
+                new_rows = self._insert_new(conn, rows, candidates, use_prefilter=False)
+            counts = Counter(rows[i][0] for i in new_rows)
+            self._record_topics(conn, counts, now)
+
+        # update memori hanya setelah commit berhasil
+        self.topic_registry.record(counts, now)
+        for i in new_rows:
+            self.add_event(rows[i][0], rows[i][1])
+            results[i] = True
+        return results
+
+    def _store_event_atomic(self, topic: str, event_id: str, timestamp: str,
+                            source: str, payload: str) -> bool:
+        """Mode multi-process: satu INSERT OR IGNORE menentukan unik (rowcount 1) atau duplicate"""
+        if self.store.contains(topic, event_id):
+            return False
+        now = utc_now()
+        with self.connections.write() as conn:
+            # statement pertama adalah write: lock writer diambil sebelum membaca apa pun
+            seq = self._allocate_seq(conn, 1)
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO processed_events (topic, event_id, timestamp, source, payload, seq)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (topic, event_id, timestamp, source, payload, seq))
+            inserted = cursor.rowcount == 1
+            if inserted:
+                if self.outbox:
+                    conn.execute(self._OUTBOX_INSERT, (topic, event_id, timestamp, source, payload))
+                conn.execute(self._TOPIC_RECORD, (topic, 1, now, now))
+        # cache hanya diisi setelah commit
+        self.store.add(topic, event_id)
+        if inserted:
+            self.topic_registry.record({topic: 1}, now)
+        return inserted
+
+    def _insert_returning(self, conn: sqlite3.Connection, rows: list[tuple]) -> set:
+        """
+        INSERT OR IGNORE multi-row ... RETURNING: return key (topic, event_id) yang benar-benar baru.
+        Atomic terhadap proses lain, tanpa cek terpisah sebelum insert.
+        """
+        inserted = set()
+        if not rows:
+            return inserted
+        # seq untuk duplicate tidak terpakai (ada gap), tetap monotonic antar proses
+        seq = self._allocate_seq(conn, len(rows))
+        per_statement = self.LOOKUP_CHUNK // 6
+        for start in range(0, len(rows), per_statement):
+            chunk = rows[start:start + per_statement]
+            values = ",".join(["(?, ?, ?, ?, ?, ?)"] * len(chunk))
+            params = []
+            for offset, row in enumerate(chunk, seq + start):
+                params.extend(row)
+                params.append(offset)
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO processed_events (topic, event_id, timestamp, source, payload, seq) "
+                f"VALUES {values} RETURNING topic, event_id",
+                params
+            )
+            inserted.update(cursor.fetchall())
+        if self.outbox and inserted:
+            conn.executemany(self._OUTBOX_INSERT, [row for row in rows if (row[0], row[1]) in inserted])
+        return inserted
+
+    def _allocate_seq(self, conn: sqlite3.Connection, count: int) -> int:
+        """Reservasi `count` seq berurutan di transaksi ini; return seq pertama"""
+        end = conn.execute(
+            "UPDATE event_seq SET value = value + ? WHERE name = 'processed_events' RETURNING value", (count,)
+        ).fetchone()[0]
+        return end - count + 1
+
+    def _record_topics(self, conn: sqlite3.Connection, counts: dict[str, int], now: str):
+        if counts:
+            conn.executemany(self._TOPIC_RECORD, [(topic, n, now, now) for topic, n in counts.items()])
+
+    def _forget_topics(self, conn: sqlite3.Connection, counts: dict[str, int]):
+        """Kurangi count setelah DELETE; topic yang habis dihapus dari registry"""
+        if counts:
+            conn.executemany("UPDATE topics SET event_count = event_count - ? WHERE topic = ?",
+                             [(n, topic) for topic, n in counts.items()])
+            conn.execute("DELETE FROM topics WHERE event_count <= 0")
+
+    def _in_memory(self, topic: str, event_id: str) -> bool:
+        if self.index is not None:
+            return self.index.contains(topic, event_id)
+        return self.store.contains(topic, event_id)
+
+    def _insert_new(self, conn: sqlite3.Connection, rows: list[tuple], candidates: list[int],
+                    use_prefilter: bool) -> Optional[list[int]]:
+        """
+        Insert row kandidat yang belum ada di SQLite; return index row yang benar-benar baru.
+        Return None jika jumlah insert tidak cocok (prefilter salah), caller harus rollback.
+        """
+        to_probe = candidates
+        if use_prefilter and self.prefilter is not None:
+            to_probe = []
+            for i in candidates:
+                if self.prefilter.might_contain(rows[i][0], rows[i][1]):
+                    to_probe.append(i)
+            self.prefilter.skipped += len(candidates) - len(to_probe)
+            self.prefilter.maybe += len(to_probe)
+
+        existing = self._existing_keys(conn, [(rows[i][0], rows[i][1]) for i in to_probe])
+        if use_prefilter and self.prefilter is not None:
+            self.prefilter.false_positives += len(to_probe) - len(existing)
+
+        new_rows = [i for i in candidates if (rows[i][0], rows[i][1]) not in existing]
+        if new_rows:
+            # UPDATE event_seq juga dihitung total_changes: ambil `before` sesudahnya
+            seq = self._allocate_seq(conn, len(new_rows))
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO processed_events (topic, event_id, timestamp, source, payload, seq)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(*rows[i], seq + n) for n, i in enumerate(new_rows)])
+            if conn.total_changes - before != len(new_rows):
+                return None
+            if self.outbox:
+                conn.executemany(self._OUTBOX_INSERT, [rows[i] for i in new_rows])
+        return new_rows
+
+    def _existing_keys(self, conn: sqlite3.Connection, keys: list[tuple]) -> set:
+        """Lookup set-based: key (topic, event_id) mana saja yang sudah ada di SQLite"""
+        by_topic: dict[str, list[str]] = {}
+        for topic, event_id in keys:
+            by_topic.setdefault(topic, []).append(event_id)
+
+        existing = set()
+        for topic, ids in by_topic.items():
+            for start in range(0, len(ids), self.LOOKUP_CHUNK):
+                chunk = ids[start:start + self.LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    f"SELECT event_id FROM processed_events WHERE topic = ? AND event_id IN ({placeholders})",
+                    (topic, *chunk)
+                )
+                existing.update((topic, row[0]) for row in cursor)
+        return existing
+
     # =========================
     # Query helper
     # =========================
     def get_events(self, topic: Optional[str] = None) -> list:
         if self.db_path:
-            with self.lock, sqlite3.connect(self.db_path) as conn:
+            with self.connections.read() as conn:
                 if topic:
                     cursor = conn.execute(
                         "SELECT topic, event_id, timestamp, source, payload FROM processed_events WHERE topic = ?",
@@ -99,22 +482,283 @@ class DedupStore:
                     )
                 return cursor.fetchall()
         else:
-            # fallback ke memori
+            # fallback ke memori; index ringkas hanya menyimpan digest, tanpa event_id asli
             results = []
-            for t, ids in self.store.items():
-                if topic and t != topic:
-                    continue
-                for eid in ids:
-                    results.append((t, eid, "", "", "{}"))
+            if self.index is not None:
+                return results
+            for t, eid in self.store.keys(topic or None):
+                results.append((t, eid, "", "", "{}"))
             return results
 
+    def get_events_page(self, topic: Optional[str] = None, after: int = 0, limit: int = 100) -> list:
+        """
+        Keyset pagination: event dengan seq > after, urut seq, maksimal limit.
+        Row: (seq, topic, event_id, timestamp, source, payload); seq terakhir = cursor berikutnya.
+        Bukan rowid: SQLite memakai ulang rowid setelah row terbesar dihapus (retention),
+        sedangkan seq tidak pernah mundur.
+        limit negatif = tanpa batas.
+        """
+        if self.db_path:
+            with self.connections.read() as conn:
+                if topic:
+                    cursor = conn.execute(
+                        "SELECT seq, topic, event_id, timestamp, source, payload FROM processed_events "
+                        "WHERE topic = ? AND seq > ? ORDER BY seq LIMIT ?",
+                        (topic, after, limit)
+                    )
+                else:
+                    cursor = conn.execute(
+                        "SELECT seq, topic, event_id, timestamp, source, payload FROM processed_events "
+                        "WHERE seq > ? ORDER BY seq LIMIT ?",
+                        (after, limit)
+                    )
+                return cursor.fetchall()
+        # mode in-memory: posisi di snapshot cache dipakai sebagai cursor
+        rows = self.get_events(topic)[after:after + limit if limit >= 0 else None]
+        return [(after + i + 1, *row) for i, row in enumerate(rows)]
+
+    def iter_events(self, topic: Optional[str] = None, after: int = 0, batch_size: int = 1000):
+        """
+        Generator semua event setelah cursor, per halaman keyset berukuran batch_size.
+        Memori konstan dan tidak menahan transaksi baca panjang (checkpoint WAL tetap jalan).
+        """
+        while True:
+            rows = self.get_events_page(topic, after, batch_size)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][0]
+
     def get_all_topics(self) -> list[str]:
         if self.db_path:
-            with self.lock, sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute("SELECT DISTINCT topic FROM processed_events")
-                return [row[0] for row in cursor.fetchall()]
+            if self.multiprocess:
+                # worker lain juga menulis; tabel topics yang jadi acuan
+                return [topic["topic"] for topic in self.get_topics()]
+            return self.topic_registry.topics()
+        else:
+            if self.index is not None:
+                return self.index.topics()
+            return self.store.topics()
+
+    def get_topics(self) -> list[dict]:
+        """Registry topic: [{"topic", "event_count", "first_seen", "last_seen"}], O(jumlah topic)"""
+        if self.multiprocess:
+            with self.connections.read() as conn:
+                cursor = conn.execute("SELECT topic, event_count, first_seen, last_seen FROM topics")
+                return [{"topic": row[0], "event_count": row[1], "first_seen": row[2], "last_seen": row[3]}
+                        for row in cursor]
+        return self.topic_registry.snapshot()
+
+    # =========================
+    # Consumer groups
+    # =========================
+    def get_events_after(self, topic: Optional[str], after: int, limit: int) -> list:
+        """Row (seq, topic, event_id, timestamp, source, payload) dengan seq > after, urut seq"""
+        if not self.db_path:
+            return []
+        with self.connections.read() as conn:
+            if topic:
+                cursor = conn.execute(
+                    "SELECT seq, topic, event_id, timestamp, source, payload FROM processed_events "
+                    "WHERE topic = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (topic, after, limit)
+                )
+            else:
+                cursor = conn.execute(
+                    "SELECT seq, topic, event_id, timestamp, source, payload FROM processed_events "
+                    "WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (after, limit)
+                )
+            return cursor.fetchall()
+
+    def get_consumer_offset(self, group: str, topic: Optional[str]) -> int:
+        """Offset (seq) terakhir yang di-commit group; topic None = semua topic"""
+        if not self.db_path:
+            return 0
+        with self.connections.read() as conn:
+            row = conn.execute(
+                "SELECT position FROM consumer_offsets WHERE group_name = ? AND topic = ?", (group, topic or "")
+            ).fetchone()
+        return row[0] if row else 0
+
+    def commit_consumer_offset(self, group: str, topic: Optional[str], position: int):
+        """Set offset group (boleh mundur untuk replay)"""
+        with self.connections.write() as conn:
+            conn.execute("""
+                INSERT INTO consumer_offsets (group_name, topic, position) VALUES (?, ?, ?)
+                ON CONFLICT(group_name, topic) DO UPDATE SET
+                    position = excluded.position, updated_at = CURRENT_TIMESTAMP
+            """, (group, topic or "", position))
+
+    def get_seq_head(self, topic: Optional[str] = None) -> int:
+        """seq terbesar yang pernah diberikan (topic hanya dipakai ShardedDedupStore memilih shard)"""
+        if not self.db_path:
+            return 0
+        with self.connections.read() as conn:
+            return conn.execute("SELECT value FROM event_seq WHERE name = 'processed_events'").fetchone()[0]
+
+    # =========================
+    # Outbox (forwarding)
+    # =========================
+    def get_outbox_batch(self, after: int, limit: int) -> list:
+        """Row outbox (id, topic, event_id, timestamp, source, payload) dengan id > after, urut id"""
+        if not self.outbox:
+            return []
+        with self.connections.read() as conn:
+            return conn.execute(
+                "SELECT id, topic, event_id, timestamp, source, payload FROM outbox "
+                "WHERE id > ? ORDER BY id LIMIT ?",
+                (after, limit)
+            ).fetchall()
+
+    def get_outbox_offset(self, consumer: str) -> int:
+        if not self.outbox:
+            return 0
+        with self.connections.read() as conn:
+            row = conn.execute(
+                "SELECT position FROM outbox_offsets WHERE consumer = ?", (consumer,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def commit_outbox_offset(self, consumer: str, position: int, dead_letters: list[tuple] = ()):
+        """
+        Simpan offset consumer lalu hapus row yang sudah dikirim ke semua consumer.
+        dead_letters: (row outbox, error) yang ditolak permanen, disalin ke outbox_dead_letters
+        di transaksi yang sama sebelum row-nya terhapus.
+        """
+        if not self.outbox:
+            return
+        with self.connections.write() as conn:
+            if dead_letters:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO outbox_dead_letters (id, topic, event_id, timestamp, source, payload, error)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [(*row, error) for row, error in dead_letters])
+            conn.execute("""
+                INSERT INTO outbox_offsets (consumer, position) VALUES (?, ?)
+                ON CONFLICT(consumer) DO UPDATE SET position = MAX(position, excluded.position)
+            """, (consumer, position))
+            conn.execute("DELETE FROM outbox WHERE id <= (SELECT MIN(position) FROM outbox_offsets)")
+
+    def get_dead_letters(self, limit: int = 100) -> list:
+        """Row outbox_dead_letters terbaru dulu: (id, topic, event_id, timestamp, source, payload, error)"""
+        if not self.outbox:
+            return []
+        with self.connections.read() as conn:
+            return conn.execute(
+                "SELECT id, topic, event_id, timestamp, source, payload, error FROM outbox_dead_letters "
+                "ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+    def get_outbox_head(self) -> int:
+        """id outbox terbesar yang pernah ditulis (0 jika belum ada)"""
+        if not self.outbox:
+            return 0
+        with self.connections.read() as conn:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'outbox'").fetchone()
+        return row[0] if row else 0
+
+    # =========================
+    # Worker stats (mode multi-process)
+    # =========================
+    def save_worker_stats(self, run_id: str, worker_id: str, counters: dict[str, tuple]):
+        """Upsert counter kumulatif worker ini: {topic ("" = global): (received, unique, duplicates)}"""
+        if not self.multiprocess:
+            return
+        with self.connections.write() as conn:
+            conn.executemany("""
+                INSERT INTO worker_stats (run_id, worker_id, topic, received, unique_processed, duplicate_dropped)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(run_id, worker_id, topic) DO UPDATE SET
+                    received = excluded.received,
+                    unique_processed = excluded.unique_processed,
+                    duplicate_dropped = excluded.duplicate_dropped
+            """, [(run_id, worker_id, topic, *values) for topic, values in counters.items()])
+
+    def load_worker_stats(self, run_id: str) -> dict[str, tuple]:
+        """Jumlah counter semua worker di run_id, per topic ("" = global)"""
+        if not self.multiprocess:
+            return {}
+        with self.connections.read() as conn:
+            cursor = conn.execute("""
+                SELECT topic, SUM(received), SUM(unique_processed), SUM(duplicate_dropped)
+                FROM worker_stats WHERE run_id = ? GROUP BY topic
+            """, (run_id,))
+            return {row[0]: tuple(int(value) for value in row[1:]) for row in cursor}
+
+    def purge_worker_stats(self, keep_run_id: str) -> int:
+        """Hapus counter dari run sebelumnya (deployment lama)"""
+        if not self.multiprocess:
+            return 0
+        with self.connections.write() as conn:
+            return conn.execute("DELETE FROM worker_stats WHERE run_id != ?", (keep_run_id,)).rowcount
+
+    # =========================
+    # Retention / compaction
+    # =========================
+    def prune_older_than(self, max_age_seconds: float, chunk_size: int,
+                         topic: Optional[str] = None, exclude_topics: tuple = ()) -> int:
+        """
+        Hapus maksimal chunk_size event dengan processed_at lebih tua dari max_age_seconds.
+        topic: batasi ke satu topic; exclude_topics: topic yang punya aturan sendiri.
+        Return jumlah row yang dihapus (0 = tidak ada lagi yang kedaluwarsa).
+        """
+        if not self.db_path:
+            return 0
+        conditions = ["processed_at < datetime('now', ?)"]
+        params: list = [f"-{int(max_age_seconds)} seconds"]
+        if topic is not None:
+            conditions.append("topic = ?")
+            params.append(topic)
+        if exclude_topics:
+            conditions.append(f"topic NOT IN ({','.join('?' * len(exclude_topics))})")
+            params.extend(exclude_topics)
+        with self.connections.write() as conn:
+            cursor = conn.execute(f"""
+                DELETE FROM processed_events WHERE rowid IN (
+                    SELECT rowid FROM processed_events WHERE {' AND '.join(conditions)} LIMIT ?
+                ) RETURNING topic
+            """, (*params, chunk_size))
+            counts = Counter(row[0] for row in cursor)
+            self._forget_topics(conn, counts)
+        self.topic_registry.forget(counts)
+        return sum(counts.values())
+
+    def prune_topic_overflow(self, topic: str, max_rows: int, chunk_size: int) -> int:
+        """Hapus event paling lama di topic sampai tersisa max_rows (maksimal chunk_size per panggilan)"""
+        if not self.db_path:
+            return 0
+        entry = None if self.multiprocess else self.topic_registry.get(topic)
+        if entry is not None:
+            total = entry["event_count"]
         else:
-            return list(self.store.keys())
+            with self.connections.read() as conn:
+                total = conn.execute(
+                    "SELECT COUNT(*) FROM processed_events WHERE topic = ?", (topic,)
+                ).fetchone()[0]
+        excess = min(total - max_rows, chunk_size)
+        if excess <= 0:
+            return 0
+        with self.connections.write() as conn:
+            cursor = conn.execute("""
+                DELETE FROM processed_events WHERE rowid IN (
+                    SELECT rowid FROM processed_events WHERE topic = ? ORDER BY seq LIMIT ?
+                )
+            """, (topic, excess))
+            deleted = cursor.rowcount
+            self._forget_topics(conn, {topic: deleted})
+        self.topic_registry.forget({topic: deleted})
+        return deleted
+
+    def incremental_vacuum(self, max_pages: int) -> int:
+        """Kembalikan halaman kosong ke filesystem (butuh auto_vacuum=INCREMENTAL); return jumlah page"""
+        if not self.db_path:
+            return 0
+        with self.connections.write() as conn:
+            before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            conn.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall()
+            after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return before - after
 
     # =========================
     # Testing / cleanup
@@ -122,7 +766,41 @@ class DedupStore:
     def clear(self):
         """Hapus semua data, untuk testing"""
         self.store.clear()
+        self.topic_registry.clear()
+        if self.index is not None:
+            self.index.clear()
+        if self.prefilter is not None:
+            self.prefilter.filters.clear()
         if self.db_path:
-            with self.lock, sqlite3.connect(self.db_path) as conn:
+            with self.connections.write() as conn:
                 conn.execute("DELETE FROM processed_events")
-                conn.commit()
\ No newline at end of file
+                conn.execute("DELETE FROM topics")
+                conn.execute("DELETE FROM consumer_offsets")
+                if self.outbox:
+                    conn.execute("DELETE FROM outbox")
+                    conn.execute("DELETE FROM outbox_offsets")
+                    conn.execute("DELETE FROM outbox_dead_letters")
+                if self.multiprocess:
+                    conn.execute("DELETE FROM worker_stats")
+
+    def get_cache_stats(self) -> dict:
+        if self.index is not None:
+            return self.index.get_stats()
+        return self.store.get_stats()
+
+    def get_prefilter_stats(self) -> Optional[dict]:
+        return self.prefilter.get_stats() if self.prefilter is not None else None
+
+    def close(self):
+        """Tutup semua koneksi SQLite (writer + reader pool), simpan snapshot prefilter / index"""
+        if self.index is not None:
+            if self.index_path:
+                self.index.save(self.index_path)
+            self.index.close()
+        if self.connections:
+            if self.prefilter is not None and self.prefilter_snapshot:
+                with self.connections.read() as conn:
+                    max_seq = conn.execute("SELECT MAX(seq) FROM processed_events").fetchone()[0]
+                self.prefilter.max_seq = max_seq or 0
+                self.prefilter.save(self.prefilter_snapshot)
+            self.connections.close()
\ No newline at end of file
@@ -0,0 +1,49 @@
+import json
+
+# payload disimpan sebagai teks JSON valid (hasil json.dumps saat ingest), jadi
+# bisa disisipkan apa adanya ke body response tanpa json.loads + encode ulang
+_EVENT_TEMPLATE = '{"id":%d,"topic":%s,"event_id":%s,"timestamp":%s,"source":%s,"payload":%s}'
+
+
+def encode_event_row(row) -> str:
+    """Row (seq, topic, event_id, timestamp, source, payload) -> objek JSON"""
+    seq, topic, event_id, timestamp, source, payload = row
+    dumps = json.dumps
+    return _EVENT_TEMPLATE % (seq, dumps(topic), dumps(event_id), dumps(timestamp), dumps(source), payload)
+
+
+def encode_events_page(rows: list, next_after: int) -> bytes:
+    """Body response GET /events: {"count", "next_after", "events": [...]}"""
+    events = ",".join(map(encode_event_row, rows))
+    return f'{{"count":{len(rows)},"next_after":{next_after},"events":[{events}]}}'.encode()
+
+
+_BATCH_EVENT_TEMPLATE = '{"topic":%s,"event_id":%s,"timestamp":%s,"source":%s,"payload":%s}'
+
+
+def encode_event_batch(rows: list) -> bytes:
+    """Row outbox (id, topic, event_id, timestamp, source, payload) -> body {"events": [...]} ala EventBatch"""
+    dumps = json.dumps
+    events = ",".join(
+        _BATCH_EVENT_TEMPLATE % (dumps(topic), dumps(event_id), dumps(timestamp), dumps(source), payload)
+        for _, topic, event_id, timestamp, source, payload in rows
+    )
+    return f'{{"events":[{events}]}}'.encode()
+
+
+_CONSUME_EVENT_TEMPLATE = '{"offset":%d,"topic":%s,"event_id":%s,"timestamp":%s,"source":%s,"payload":%s}'
+
+
+def encode_consume_batch(group: str, topic, offset: int, rows: list) -> bytes:
+    """
+    Body response GET /consume; rows (seq, topic, event_id, timestamp, source, payload).
+    next_offset = offset yang di-commit setelah batch ini selesai diproses.
+    """
+    dumps = json.dumps
+    events = ",".join(
+        _CONSUME_EVENT_TEMPLATE % (seq, dumps(t), dumps(event_id), dumps(timestamp), dumps(source), payload)
+        for seq, t, event_id, timestamp, source, payload in rows
+    )
+    next_offset = rows[-1][0] if rows else offset
+    return (f'{{"group":{dumps(group)},"topic":{dumps(topic)},"offset":{offset},'
+            f'"next_offset":{next_offset},"count":{len(rows)},"events":[{events}]}}').encode()
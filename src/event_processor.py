@@ -1,71 +1,252 @@
 import asyncio
 import logging
 import json  # ← Tambahkan ini
-from typing import Optional
+import time
+import zlib
+from typing import Awaitable, Callable, Optional
 
+from .async_store import AsyncDedupStore
+from .sharded_store import AsyncShardedStore, ShardedDedupStore
 from .dedup_store import DedupStore
+from .group_commit import GroupCommitter
 from .stats import Stats
 from .models import Event
 
 logger = logging.getLogger("EventAggregator")
 
+# handler menerima batch event dari satu topic (urutan sesuai urutan publish)
+EventHandler = Callable[[list[Event]], Awaitable[None]]
+
+# topic handler yang menerima semua topic
+WILDCARD = "*"
+
+
+def partition_for(topic: str, partitions: int) -> int:
+    """Partition stabil untuk topic (crc32, tidak bergantung PYTHONHASHSEED)"""
+    return zlib.crc32(topic.encode("utf-8")) % partitions
+
+
 class EventProcessor:
-    def __init__(self, dedup_store: DedupStore, stats: Stats, queue_size: int = 100):
+    def __init__(self, dedup_store: DedupStore, stats: Stats, queue_size: int = 100,
+                 group_commit: bool = False, group_commit_max_batch: int = 500,
+                 group_commit_max_linger_ms: float = 5.0,
+                 workers: int = 1, worker_batch_size: int = 100):
         self.dedup_store = dedup_store
+        # semua akses SQLite lewat facade async agar event loop tidak pernah blocking
+        if isinstance(dedup_store, ShardedDedupStore):
+            self.storage = AsyncShardedStore(dedup_store)
+        else:
+            self.storage = AsyncDedupStore(dedup_store)
         self.stats = stats
-        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
-        self._worker_task: Optional[asyncio.Task] = None
+        # satu queue per worker; topic yang sama selalu masuk partition yang sama
+        # sehingga urutan per topic tetap terjaga. queue_size dibagi rata ke partition
+        self.workers = max(1, workers)
+        self.worker_batch_size = max(1, worker_batch_size)
+        partition_size = max(1, queue_size // self.workers) if queue_size > 0 else 0
+        self.partitions: list[asyncio.Queue] = [
+            asyncio.Queue(maxsize=partition_size) for _ in range(self.workers)
+        ]
+        self.handlers: dict[str, list[EventHandler]] = {}
+        self._worker_tasks: list[asyncio.Task] = []
         self._running = False
+        # opt-in: gabungkan insert dari publish yang bersamaan ke satu transaksi
+        self.group_committer: Optional[GroupCommitter] = None
+        if group_commit:
+            self.group_committer = GroupCommitter(
+                self.storage,
+                max_batch=group_commit_max_batch,
+                max_linger_ms=group_commit_max_linger_ms
+            )
+
+    def register_handler(self, topic: str, handler: EventHandler):
+        """Daftarkan async handler untuk topic tertentu, atau "*" untuk semua topic"""
+        self.handlers.setdefault(topic, []).append(handler)
+
+    def queue_depth(self) -> int:
+        return sum(q.qsize() for q in self.partitions)
+
+    def queue_fill(self) -> float:
+        """Tingkat isi partition terpenuh (0..1); satu partition penuh sudah membuat put() menunggu"""
+        return max((q.qsize() / q.maxsize for q in self.partitions if q.maxsize), default=0.0)
+
+    async def _enqueue(self, event: Event):
+        await self.partitions[partition_for(event.topic, self.workers)].put(event)
 
     async def start(self):
         if not self._running:
             self._running = True
-            self._worker_task = asyncio.create_task(self._worker_loop())
-            logger.info("EventProcessor started.")
+            self._worker_tasks = [
+                asyncio.create_task(self._worker_loop(queue)) for queue in self.partitions
+            ]
+            if self.group_committer:
+                await self.group_committer.start()
+            logger.info(f"EventProcessor started with {self.workers} worker(s).")
 
     async def stop(self):
+        if self.group_committer:
+            await self.group_committer.stop()
         if self._running:
             self._running = False
-            if self._worker_task:
-                await self._worker_task
-                logger.info("EventProcessor stopped.")
+            # sentinel di akhir tiap partition: event yang sudah di-queue tetap diproses
+            for queue in self.partitions:
+                await queue.put(None)
+            await asyncio.gather(*self._worker_tasks)
+            self._worker_tasks = []
+            logger.info("EventProcessor stopped.")
 
     async def publish(self, event: Event) -> dict:
         """
         Publish event to queue after dedup check.
         Returns dict with status: 'processed' or 'duplicate'
         """
-        self.stats.increment_received()
+        if not self.stats.instrument:
+            return await self._publish(event)
+        started = time.perf_counter()
+        try:
+            return await self._publish(event)
+        finally:
+            self.stats.observe_latency("publish", time.perf_counter() - started)
+
+    def _lap(self, stage: str, since: float) -> float:
+        """Catat durasi stage sejak `since` dan kembalikan waktu sekarang"""
+        now = time.perf_counter()
+        self.stats.observe_latency(stage, now - since)
+        return now
+
+    async def _publish(self, event: Event) -> dict:
+        instrument = self.stats.instrument
+        t = time.perf_counter() if instrument else 0.0
+        self.stats.increment_received(topic=event.topic)
 
         # Check duplicate
-        if self.dedup_store.is_duplicate(event.topic, event.event_id):
-            self.stats.increment_duplicates()
+        is_duplicate = await self.storage.is_duplicate(event.topic, event.event_id)
+        if instrument:
+            t = self._lap("dedup_probe", t)
+        if is_duplicate:
+            self.stats.increment_duplicates(topic=event.topic)
             return {"status": "duplicate"}
 
         # store event (in-memory + SQLite if ada)
-        self.dedup_store.store_event(
-            topic=event.topic,
-            event_id=event.event_id,
-            timestamp=event.timestamp,
-            source=event.source,
-            payload=json.dumps(event.payload)  # ✅ Convert dict ke JSON string
-        )
+        payload = json.dumps(event.payload)  # ✅ Convert dict ke JSON string
+        if instrument:
+            t = self._lap("serialize", t)
+        if self.group_committer:
+            stored = await self.group_committer.submit(
+                (event.topic, event.event_id, event.timestamp, event.source, payload)
+            )
+        else:
+            stored = await self.storage.store_event(
+                topic=event.topic,
+                event_id=event.event_id,
+                timestamp=event.timestamp,
+                source=event.source,
+                payload=payload
+            )
+        if instrument:
+            t = self._lap("store", t)
+
+        # event yang sama bisa lolos cek di atas secara bersamaan; insert yang menentukan
+        if not stored:
+            self.stats.increment_duplicates(topic=event.topic)
+            return {"status": "duplicate"}
 
         # increment unique count
-        self.stats.increment_unique()
+        self.stats.increment_unique(topic=event.topic)
 
         # enqueue for async processing
-        await self.queue.put(event)
+        await self._enqueue(event)
+        if instrument:
+            self._lap("queue_put", t)
         return {"status": "processed"}
 
-    async def _worker_loop(self):
-        while self._running:
+    async def publish_batch(self, events: list[Event], payloads: Optional[list[str]] = None) -> dict:
+        """
+        Publish banyak event sekaligus: satu lookup set-based, satu executemany,
+        satu commit. Returns dict with counts: received, processed, duplicates
+        payloads: payload yang sudah di-serialize (JSON string) sejajar dengan events, opsional
+        """
+        if not self.stats.instrument:
+            return await self._publish_batch(events, payloads)
+        started = time.perf_counter()
+        try:
+            return await self._publish_batch(events, payloads)
+        finally:
+            self.stats.observe_latency("publish_batch", time.perf_counter() - started)
+
+    async def _publish_batch(self, events: list[Event], payloads: Optional[list[str]] = None) -> dict:
+        instrument = self.stats.instrument
+        t = time.perf_counter() if instrument else 0.0
+        self.stats.increment_received(len(events))
+
+        if payloads is None:
+            payloads = [json.dumps(e.payload) for e in events]
+        rows = [
+            (e.topic, e.event_id, e.timestamp, e.source, payload)
+            for e, payload in zip(events, payloads)
+        ]
+        if instrument:
+            t = self._lap("batch_serialize", t)
+        results = await self.storage.store_events(rows)
+        if instrument:
+            t = self._lap("batch_store", t)
+
+        processed = sum(results)
+        duplicates = len(events) - processed
+        if processed:
+            self.stats.increment_unique(processed)
+        if duplicates:
+            self.stats.increment_duplicates(duplicates)
+
+        per_topic: dict[str, list[int]] = {}
+        for event, stored in zip(events, results):
+            per_topic.setdefault(event.topic, [0, 0])[0 if stored else 1] += 1
+        for topic, (unique, dup) in per_topic.items():
+            self.stats.record_topic(topic, received=unique + dup, unique=unique, duplicates=dup)
+
+        # enqueue for async processing
+        for event, stored in zip(events, results):
+            if stored:
+                await self._enqueue(event)
+        if instrument:
+            self._lap("batch_queue_put", t)
+
+        return {"received": len(events), "processed": processed, "duplicates": duplicates}
+
+    async def _worker_loop(self, queue: asyncio.Queue):
+        while True:
+            event = await queue.get()
+            batch = [event]
+            # ambil sisa event yang sudah menunggu tanpa await, maksimal worker_batch_size
+            while event is not None and len(batch) < self.worker_batch_size:
+                try:
+                    event = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                batch.append(event)
+            stopping = batch[-1] is None
+            if stopping:
+                batch.pop()
             try:
-                event: Event = await self.queue.get()
-                # Simulate processing delay if needed
-                # await asyncio.sleep(0.01)
-                logger.info(f"Processed event: topic={event.topic}, id={event.event_id}")
-            except Exception as e:
-                logger.error(f"Error in worker loop: {e}")
+                if batch:
+                    await self._dispatch(batch)
             finally:
-                self.queue.task_done()
\ No newline at end of file
+                for _ in range(len(batch) + stopping):
+                    queue.task_done()
+            if stopping:
+                return
+
+    async def _dispatch(self, batch: list[Event]):
+        by_topic: dict[str, list[Event]] = {}
+        for event in batch:
+            by_topic.setdefault(event.topic, []).append(event)
+        wildcard = self.handlers.get(WILDCARD, [])
+        for topic, events in by_topic.items():
+            handlers = self.handlers.get(topic, []) + wildcard
+            if not handlers:
+                logger.debug(f"Processed {len(events)} event(s): topic={topic}")
+                continue
+            for handler in handlers:
+                try:
+                    await handler(events)
+                except Exception as e:
+                    logger.error(f"Handler error for topic={topic}: {e}")
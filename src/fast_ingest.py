@@ -0,0 +1,107 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # ada di requirements.txt; fallback ke json standar jika tidak terpasang
+    orjson = None
+
+# dicatat saat startup: tanpa orjson /publish/fast jauh lebih lambat
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+class InvalidBody(ValueError):
+    """Body bukan JSON atau bentuknya bukan event / list event / {"events": [...]}"""
+
+
+class RawEvent:
+    """
+    Event hasil validasi ringan, tanpa pydantic. Atributnya sama dengan models.Event
+    sehingga bisa langsung dipakai EventProcessor.publish_batch dan handler worker.
+    """
+
+    __slots__ = ("topic", "event_id", "timestamp", "source", "payload")
+
+    def __init__(self, topic: str, event_id: str, timestamp: str, source: str, payload: dict):
+        self.topic = topic
+        self.event_id = event_id
+        self.timestamp = timestamp
+        self.source = source
+        self.payload = payload
+
+
+def loads(body: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def encode_payloads(events: list[RawEvent]) -> list[str]:
+    """Serialize payload untuk disimpan; orjson jauh lebih cepat dari json.dumps per event"""
+    if orjson is not None:
+        return [orjson.dumps(e.payload).decode() for e in events]
+    return [json.dumps(e.payload) for e in events]
+
+
+def parse_items(body: bytes) -> list:
+    """Body -> list item mentah; menerima satu event, list event, atau {"events": [...]}"""
+    try:
+        data = loads(body)
+    except ValueError as e:
+        raise InvalidBody(f"Invalid JSON: {e}")
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        if "events" in data and "topic" not in data:
+            events = data["events"]
+            if not isinstance(events, list):
+                raise InvalidBody("'events' must be a list")
+            return events
+        return [data]
+    raise InvalidBody("Body must be an event, a list of events or {\"events\": [...]}")
+
+
+def validate_events(items: list) -> tuple[list[RawEvent], list[dict]]:
+    """
+    Validasi batch dengan aturan yang sama seperti models.Event:
+    topic / event_id / source string tidak kosong, timestamp string, payload dict (default {}).
+    Return (event valid, error per item {"index", "field", "error"}).
+    """
+    events = []
+    errors = []
+    append = events.append
+    for index, item in enumerate(items):
+        if type(item) is not dict:
+            errors.append({"index": index, "field": None, "error": "event must be an object"})
+            continue
+        topic = item.get("topic")
+        event_id = item.get("event_id")
+        timestamp = item.get("timestamp")
+        source = item.get("source")
+        payload = item.get("payload", {})
+        # jalur cepat: semua field bertipe benar dan tidak kosong
+        if (type(topic) is str and topic and type(event_id) is str and event_id
+                and type(timestamp) is str and type(source) is str and source
+                and type(payload) is dict):
+            append(RawEvent(topic, event_id, timestamp, source, payload))
+            continue
+        errors.append(_item_error(index, item))
+    return events, errors
+
+
+def _item_error(index: int, item: dict) -> dict:
+    for field in ("topic", "event_id", "timestamp", "source"):
+        value = item.get(field)
+        if value is None:
+            return {"index": index, "field": field, "error": "field required"}
+        if not isinstance(value, str):
+            return {"index": index, "field": field, "error": "must be a string"}
+        if not value and field != "timestamp":
+            return {"index": index, "field": field, "error": "must not be empty"}
+    return {"index": index, "field": "payload", "error": "must be an object"}
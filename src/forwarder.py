@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+
+import httpx
+
+from .async_store import AsyncDedupStore
+from .encoding import encode_event_batch
+from .lease import FileLease
+
+logger = logging.getLogger("EventAggregator")
+
+
+class OutboxForwarder:
+    """
+    Background task yang meneruskan event dari tabel outbox ke TARGET_URL.
+    - outbox ditulis di transaksi yang sama dengan processed_events, jadi event
+      yang sudah di-ack ke publisher tidak hilang walau proses crash
+    - dibaca per batch, dikirim paralel (maksimal `concurrency` request) lewat
+      satu httpx.AsyncClient keep-alive
+    - batch gagal di-retry dengan exponential backoff + jitter sampai berhasil; respons 4xx
+      (selain 408/429) dianggap permanen: batch dipindah ke outbox_dead_letters dan offset
+      tetap maju, supaya satu batch beracun tidak menahan seluruh outbox
+    - offset disimpan di SQLite setelah semua batch terkirim; restart melanjutkan
+      dari offset tersebut (at-least-once: batch bisa terkirim ulang)
+    - dengan `lease` (mode multi-worker) hanya worker pemegang lease yang mengirim;
+      worker lain mengambil alih jika pemegangnya mati
+    """
+
+    CONSUMER = "forwarder"
+
+    def __init__(self, storage: AsyncDedupStore, target_url: str,
+                 batch_size: int = 100, concurrency: int = 4,
+                 timeout_seconds: float = 10, max_backoff_seconds: float = 30,
+                 poll_interval_seconds: float = 1.0,
+                 client: Optional[httpx.AsyncClient] = None,
+                 lease: Optional[FileLease] = None):
+        self.storage = storage
+        self.target_url = target_url
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.timeout_seconds = timeout_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self._client = client
+        self._owns_client = client is None
+        self.lease = lease
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.offset = 0
+        self.stats = {
+            "forwarded_events": 0,
+            "forwarded_batches": 0,
+            "failed_attempts": 0,
+            "dead_lettered_events": 0,
+            "dead_lettered_batches": 0,
+            "offset": 0,
+            "lag": 0,
+            "last_error": None,
+            "last_forwarded_at": None,
+        }
+
+    async def start(self):
+        if self._task is not None:
+            return
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout_seconds,
+                limits=httpx.Limits(max_connections=self.concurrency,
+                                    max_keepalive_connections=self.concurrency)
+            )
+        self.offset = await self.storage.get_outbox_offset(self.CONSUMER)
+        self.stats["offset"] = self.offset
+        self.stats["lag"] = max(0, await self.storage.get_outbox_head() - self.offset)
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"OutboxForwarder started at offset {self.offset} -> {self.target_url}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.lease is not None:
+            self.lease.release()
+
+    def notify(self):
+        """Bangunkan forwarder tanpa menunggu poll interval"""
+        self._wakeup.set()
+
+    async def handle_events(self, events: list):
+        """Handler EventProcessor: event baru sudah ada di outbox, bangunkan forwarder"""
+        self.notify()
+
+    async def _acquire_lease(self) -> bool:
+        """True jika worker ini boleh mengirim; offset di-load ulang saat lease baru didapat"""
+        if self.lease is None or self.lease.held:
+            return True
+        if not self.lease.try_acquire():
+            return False
+        # pemegang sebelumnya mungkin sudah memajukan offset
+        self.offset = await self.storage.get_outbox_offset(self.CONSUMER)
+        self.stats["offset"] = self.offset
+        logger.info(f"Forwarder lease acquired at offset {self.offset}")
+        return True
+
+    async def _loop(self):
+        while True:
+            try:
+                forwarded = await self.run_once() if await self._acquire_lease() else 0
+            except Exception as e:
+                logger.error(f"Forwarder run failed: {e}")
+                forwarded = 0
+                await asyncio.sleep(self.poll_interval_seconds)
+            if not forwarded:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self) -> int:
+        """
+        Kirim satu putaran (maksimal concurrency x batch_size event); return jumlah event
+        yang selesai (terkirim atau dipindah ke dead letter)
+        """
+        rows = await self.storage.get_outbox_batch(self.offset, self.batch_size * self.concurrency)
+        if not rows:
+            self.stats["lag"] = 0
+            return 0
+        batches = [rows[i:i + self.batch_size] for i in range(0, len(rows), self.batch_size)]
+        errors = await asyncio.gather(*(self._send(batch) for batch in batches))
+
+        # semua batch di putaran ini sudah terkirim / di-dead-letter, baru offset dimajukan
+        dead_letters = [(row, error) for batch, error in zip(batches, errors) if error is not None
+                        for row in batch]
+        self.offset = rows[-1][0]
+        await self.storage.commit_outbox_offset(self.CONSUMER, self.offset, dead_letters)
+        head = await self.storage.get_outbox_head()
+        dead_batches = sum(error is not None for error in errors)
+        self.stats["forwarded_events"] += len(rows) - len(dead_letters)
+        self.stats["forwarded_batches"] += len(batches) - dead_batches
+        self.stats["dead_lettered_events"] += len(dead_letters)
+        self.stats["dead_lettered_batches"] += dead_batches
+        self.stats["offset"] = self.offset
+        self.stats["lag"] = max(0, head - self.offset)
+        self.stats["last_forwarded_at"] = time.time()
+        return len(rows)
+
+    async def _send(self, batch: list) -> Optional[str]:
+        """Kirim satu batch; return None jika terkirim, atau error jika ditolak permanen"""
+        body = encode_event_batch(batch)
+        attempt = 0
+        while True:
+            try:
+                response = await self._client.post(
+                    self.target_url, content=body, headers={"Content-Type": "application/json"}
+                )
+                if response.status_code < 300:
+                    return None
+                error = f"HTTP {response.status_code}"
+                if 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+                    self.stats["last_error"] = error
+                    logger.error(f"Forwarding batch ending at id {batch[-1][0]} rejected ({error}), "
+                                 f"moved {len(batch)} event(s) to outbox_dead_letters")
+                    return f"{error}: {response.text[:500]}"
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+            self.stats["failed_attempts"] += 1
+            self.stats["last_error"] = error
+            delay = min(self.max_backoff_seconds, 0.1 * 2 ** attempt) * random.uniform(0.5, 1.0)
+            logger.warning(f"Forwarding batch ending at id {batch[-1][0]} failed ({error}), retry in {delay:.2f}s")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> dict:
+        return dict(self.stats)
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from typing import Optional
+
+from .async_store import AsyncDedupStore
+
+logger = logging.getLogger("EventAggregator")
+
+
+class GroupCommitter:
+    """
+    Write-behind group commit: kumpulkan insert dari banyak /publish yang
+    berjalan bersamaan menjadi micro-batch, lalu tulis dalam satu transaksi.
+    Setiap pemanggil tetap menerima hasilnya sendiri (unik / duplicate)
+    setelah batch-nya di-commit.
+    """
+
+    def __init__(self, storage: AsyncDedupStore, max_batch: int = 500, max_linger_ms: float = 5.0):
+        self.storage = storage
+        self.max_batch = max(1, max_batch)
+        self.max_linger = max(0.0, max_linger_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush semua yang masih pending lalu hentikan task"""
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+
+    async def submit(self, row: tuple) -> bool:
+        """
+        row: (topic, event_id, timestamp, source, payload_json)
+        Return True jika event unik dan sudah durable, False jika duplicate.
+        """
+        if self._task is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    def _drain(self, batch: list) -> bool:
+        """Ambil item yang sudah antre tanpa menunggu; return False jika ketemu sentinel"""
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return True
+            if item is None:
+                return False
+            batch.append(item)
+        return True
+
+    async def _run(self):
+        running = True
+        while running:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            running = self._drain(batch)
+            if running and len(batch) < self.max_batch and self.max_linger > 0:
+                await asyncio.sleep(self.max_linger)
+                running = self._drain(batch)
+            # selama flush berjalan di thread writer, batch berikutnya sudah mulai terkumpul
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        try:
+            results = await self.storage.store_events([row for row, _ in batch])
+        except Exception as e:
+            logger.error(f"Group commit failed for {len(batch)} events: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), stored in zip(batch, results):
+            if not future.done():
+                future.set_result(stored)
@@ -0,0 +1,151 @@
+import os
+import time
+from typing import Optional
+
+from .dedup_store import DedupStore
+from .metrics import Histogram
+from .stats import Stats
+
+# key di ASGI scope: waktu request /publish mulai diterima (sebelum parsing & validasi)
+RECEIVED_AT = "aggregator.received_at"
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware ringan (tanpa BaseHTTPMiddleware) untuk request /publish:
+    menandai waktu terima di scope dan mencatat durasi total ke stage "request".
+    Upload streaming (durasi sebanding ukuran body) dikecualikan agar tidak merusak histogram.
+    """
+
+    def __init__(self, app, stats: Stats, path_prefix: str = "/publish",
+                 exclude: tuple = ("/publish/stream",)):
+        self.app = app
+        self.stats = stats
+        self.path_prefix = path_prefix
+        self.exclude = exclude
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or not scope["path"].startswith(self.path_prefix)
+                or scope["path"] in self.exclude):
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        scope[RECEIVED_AT] = started
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.stats.observe_latency("request", time.perf_counter() - started)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    """Builder teks Prometheus exposition format (version 0.0.4)"""
+
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def header(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, labels: Optional[dict] = None):
+        if labels:
+            label_text = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+            self.lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+        else:
+            self.lines.append(f"{name} {_format_value(value)}")
+
+    def histogram(self, name: str, histogram: Histogram, labels: dict):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+            cumulative += count
+            self.sample(f"{name}_bucket", cumulative, {**labels, "le": _format_value(bound)})
+        self.sample(f"{name}_sum", histogram.sum, labels)
+        self.sample(f"{name}_count", histogram.count, labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _db_file_size(db_path: str) -> int:
+    size = 0
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            pass
+    return size
+
+
+def render_prometheus(stats: Stats, dedup_store: DedupStore, queue_depth: int,
+                      forwarder_stats: Optional[dict] = None,
+                      admission_stats: Optional[dict] = None,
+                      data: Optional[dict] = None) -> str:
+    """data: hasil stats.get_stats() yang sudah diagregasi (mode multi-worker); default lokal"""
+    out = _Writer()
+    if data is None:
+        data = stats.get_stats()
+
+    for key, name, help_text in (
+        ("received", "aggregator_events_received_total", "Events received on /publish"),
+        ("unique_processed", "aggregator_events_unique_total", "Unique events stored"),
+        ("duplicate_dropped", "aggregator_events_duplicate_total", "Duplicate events dropped"),
+    ):
+        out.header(name, "counter", help_text)
+        out.sample(name, data[key])
+        for topic, topic_data in data["per_topic"].items():
+            out.sample(name, topic_data[key], {"topic": topic})
+
+    out.header("aggregator_stage_duration_seconds", "histogram",
+               "Duration of each /publish hot-path stage")
+    for stage, histogram in list(stats.latency.items()):
+        out.histogram("aggregator_stage_duration_seconds", histogram, {"stage": stage})
+
+    connections = dedup_store.connections
+    if connections is not None and connections.wait_histograms is not None:
+        out.header("aggregator_sqlite_connection_wait_seconds", "histogram",
+                   "Time spent waiting for the SQLite writer lock or a pooled reader")
+        for kind, histogram in connections.wait_histograms.items():
+            out.histogram("aggregator_sqlite_connection_wait_seconds", histogram, {"kind": kind})
+
+    out.header("aggregator_queue_depth", "gauge", "Events waiting in the processor queue")
+    out.sample("aggregator_queue_depth", queue_depth)
+
+    if admission_stats is not None:
+        out.header("aggregator_admission_rejected_total", "counter",
+                   "Publish requests rejected with 429 by admission control")
+        for reason, count in admission_stats["rejected"].items():
+            out.sample("aggregator_admission_rejected_total", count, {"reason": reason})
+        out.header("aggregator_admission_throttled_seconds_total", "counter",
+                   "Time /publish/stream chunks were held back by admission control")
+        out.sample("aggregator_admission_throttled_seconds_total", admission_stats["throttled"]["seconds"])
+        out.header("aggregator_queue_fill_ratio", "gauge", "Fill ratio of the fullest processor partition")
+        out.sample("aggregator_queue_fill_ratio", admission_stats["queue_fill"])
+
+    if forwarder_stats is not None:
+        out.header("aggregator_forwarded_events_total", "counter", "Events delivered to TARGET_URL")
+        out.sample("aggregator_forwarded_events_total", forwarder_stats["forwarded_events"])
+        out.header("aggregator_forward_failures_total", "counter", "Failed forwarding attempts (retried)")
+        out.sample("aggregator_forward_failures_total", forwarder_stats["failed_attempts"])
+        out.header("aggregator_forward_dead_lettered_total", "counter",
+                   "Events moved to outbox_dead_letters after a permanent 4xx from TARGET_URL")
+        out.sample("aggregator_forward_dead_lettered_total", forwarder_stats["dead_lettered_events"])
+        out.header("aggregator_outbox_lag", "gauge", "Outbox events not yet forwarded")
+        out.sample("aggregator_outbox_lag", forwarder_stats["lag"])
+
+    if dedup_store.db_path:
+        out.header("aggregator_db_file_size_bytes", "gauge", "SQLite database plus WAL size")
+        out.sample("aggregator_db_file_size_bytes", _db_file_size(dedup_store.db_path))
+
+    out.header("aggregator_uptime_seconds", "gauge", "Seconds since the service started")
+    out.sample("aggregator_uptime_seconds", data["uptime"])
+    return out.render()
@@ -0,0 +1,38 @@
+import fcntl
+import os
+from typing import Optional
+
+
+class FileLease:
+    """
+    Lease eksklusif antar proses berbasis flock pada file: hanya satu worker yang
+    memegangnya, dan otomatis dilepas OS jika proses pemegang mati.
+    Dipakai agar background task tunggal (forwarder, retention) tidak berjalan di setiap worker.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """Non-blocking; True jika lease dipegang proses ini"""
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
@@ -2,16 +2,38 @@ import logging
 import asyncio
 import os
 import signal
+import time
 from contextlib import asynccontextmanager
 from typing import Optional, Union
 
-from fastapi import FastAPI, HTTPException
+from collections import Counter
 
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+
+from .admission import AdmissionController, Rejected
+from .bloom import BloomPrefilter
+from .compact_index import CompactEventIndex
 from .config import Config
+from .consumer import ConsumeNotifier
 from .dedup_store import DedupStore
+from .encoding import encode_consume_batch, encode_event_row, encode_events_page
 from .event_processor import EventProcessor
+from .fast_ingest import JSON_BACKEND, InvalidBody, encode_payloads, parse_items, validate_events
+from .fast_ingest import dumps as fast_dumps
+from .forwarder import OutboxForwarder
+from .lease import FileLease
+from .profiler import ProfilerBusy, ProfilerService
+from .instrumentation import RECEIVED_AT, RequestTimingMiddleware, render_prometheus
 from .stats import Stats
-from .models import Event, EventBatch, EventResponse, StatsResponse
+from .models import (ConsumerCommit, Event, EventBatch, EventResponse, StatsResponse, StreamIngestResponse,
+                     TopicInfo, TopicsResponse)
+from .retention import RetentionManager, parse_topic_limits
+from .sharded_store import ShardedDedupStore
+from .stream_ingest import ingest_ndjson, iter_lines
+from .subscriptions import (Subscription, SubscriptionClosed, SubscriptionManager, TooManySubscribers,
+                            encode_sse)
+from .worker_stats import WorkerStatsSync
 
 # Setup logging
 logging.basicConfig(
@@ -33,16 +55,143 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
     # Pilih db_path default dari config
     db_path = db_path or getattr(Config, "DATABASE_PATH", None)
 
+    # mode multi-process: beberapa worker uvicorn berbagi satu database SQLite
+    multiprocess = bool(getattr(Config, "MULTIPROCESS_MODE", False) and db_path)
+    if getattr(Config, "MULTIPROCESS_MODE", False) and not db_path:
+        raise ValueError("MULTIPROCESS_MODE / WORKERS > 1 requires DATABASE_PATH")
+
     # Inisialisasi komponen
-    dedup_store = DedupStore(db_path=db_path)
-    stats = Stats()
-    event_processor = EventProcessor(dedup_store, stats, queue_size=getattr(Config, "QUEUE_SIZE", 100))
+    prefilter = None
+    if multiprocess and (getattr(Config, "BLOOM_ENABLED", False) or getattr(Config, "COMPACT_INDEX_ENABLED", False)):
+        logger.warning("Bloom prefilter / compact index are per-process; disabled in multi-process mode")
+    elif getattr(Config, "BLOOM_ENABLED", False):
+        prefilter = BloomPrefilter(
+            capacity=getattr(Config, "BLOOM_CAPACITY", 1_000_000),
+            fp_rate=getattr(Config, "BLOOM_FP_RATE", 0.01),
+            scope=getattr(Config, "BLOOM_SCOPE", "global")
+        )
+    compact_index = None
+    if getattr(Config, "COMPACT_INDEX_ENABLED", False) and not multiprocess:
+        compact_index = CompactEventIndex(digest_bits=getattr(Config, "COMPACT_INDEX_BITS", 64))
+    # outbox durable butuh SQLite; tanpa db_path forwarding tidak dijalankan
+    forwarding_enabled = bool(getattr(Config, "FORWARDING_ENABLED", False) and db_path)
+    shard_count = getattr(Config, "SHARD_COUNT", 1)
+    if shard_count > 1:
+        # shard menggantikan DATABASE_PATH; fitur yang butuh satu database belum didukung
+        unsupported = [name for name, enabled in (
+            ("BLOOM_ENABLED", prefilter is not None),
+            ("COMPACT_INDEX_ENABLED", compact_index is not None),
+            ("FORWARDING_ENABLED", forwarding_enabled),
+            ("MULTIPROCESS_MODE / WORKERS > 1", multiprocess),
+        ) if enabled]
+        if unsupported:
+            raise ValueError(f"SHARD_COUNT > 1 cannot be combined with {', '.join(unsupported)}")
+        dedup_store = ShardedDedupStore(getattr(Config, "SHARD_DIR", "data/shards"), shard_count)
+        db_path = dedup_store.db_path
+    else:
+        dedup_store = DedupStore(
+            db_path=db_path,
+            prefilter=prefilter,
+            prefilter_snapshot=getattr(Config, "BLOOM_SNAPSHOT_PATH", "") or None,
+            compact_index=compact_index,
+            compact_index_path=getattr(Config, "COMPACT_INDEX_PATH", "") or None,
+            outbox=forwarding_enabled,
+            multiprocess=multiprocess
+        )
+    metrics_enabled = getattr(Config, "METRICS_ENABLED", True)
+    stats = Stats(instrument=metrics_enabled)
+    event_processor = EventProcessor(
+        dedup_store, stats,
+        queue_size=getattr(Config, "QUEUE_SIZE", 100),
+        group_commit=getattr(Config, "GROUP_COMMIT_ENABLED", False),
+        group_commit_max_batch=getattr(Config, "GROUP_COMMIT_MAX_BATCH", 500),
+        group_commit_max_linger_ms=getattr(Config, "GROUP_COMMIT_MAX_LINGER_MS", 5.0),
+        workers=getattr(Config, "WORKER_COUNT", 1),
+        worker_batch_size=getattr(Config, "WORKER_BATCH_SIZE", 100)
+    )
+
+    retention = RetentionManager(
+        event_processor.storage,
+        max_age_seconds=getattr(Config, "RETENTION_MAX_AGE_SECONDS", 0),
+        topic_max_age=parse_topic_limits(getattr(Config, "RETENTION_TOPIC_MAX_AGE", "")),
+        max_rows_per_topic=getattr(Config, "RETENTION_MAX_ROWS_PER_TOPIC", 0),
+        interval_seconds=getattr(Config, "RETENTION_INTERVAL_SECONDS", 60),
+        chunk_size=getattr(Config, "RETENTION_CHUNK_SIZE", 1000),
+        vacuum_pages=getattr(Config, "RETENTION_VACUUM_PAGES", 1000),
+        lease=FileLease(f"{db_path}.retention.lock") if multiprocess else None
+    )
+
+    admission = AdmissionController(
+        event_processor.queue_fill,
+        high_watermark=getattr(Config, "ADMISSION_HIGH_WATERMARK", 0.9),
+        source_rate=getattr(Config, "SOURCE_RATE_LIMIT", 0),
+        source_burst=getattr(Config, "SOURCE_RATE_BURST", 0),
+        retry_after_seconds=getattr(Config, "ADMISSION_RETRY_AFTER_SECONDS", 1)
+    )
+
+    forwarder = None
+    if forwarding_enabled:
+        forwarder = OutboxForwarder(
+            event_processor.storage,
+            target_url=getattr(Config, "TARGET_URL", ""),
+            batch_size=getattr(Config, "FORWARD_BATCH_SIZE", 100),
+            concurrency=getattr(Config, "FORWARD_CONCURRENCY", 4),
+            timeout_seconds=getattr(Config, "FORWARD_TIMEOUT_SECONDS", 10),
+            max_backoff_seconds=getattr(Config, "FORWARD_MAX_BACKOFF_SECONDS", 30),
+            lease=FileLease(f"{db_path}.forwarder.lock") if multiprocess else None
+        )
+        # worker processor membangunkan forwarder setiap ada event baru di outbox
+        event_processor.register_handler("*", forwarder.handle_events)
+
+    # push event yang sudah diproses ke subscriber SSE / WebSocket
+    subscriptions = SubscriptionManager(
+        buffer_size=getattr(Config, "SUBSCRIBER_BUFFER_SIZE", 1000),
+        policy=getattr(Config, "SUBSCRIBER_OVERFLOW_POLICY", "drop_oldest"),
+        max_subscribers=getattr(Config, "SUBSCRIBERS_MAX", 1000)
+    )
+    event_processor.register_handler("*", subscriptions.handle_events)
+    sse_heartbeat = getattr(Config, "SSE_HEARTBEAT_SECONDS", 15.0)
+
+    # long-poll GET /consume dibangunkan worker setelah event baru di-commit
+    consume_notifier = ConsumeNotifier()
+    event_processor.register_handler("*", consume_notifier.handle_events)
+    consume_max_wait = getattr(Config, "CONSUME_MAX_WAIT_MS", 30000) / 1000
+    consume_max_batch = getattr(Config, "CONSUME_MAX_BATCH", 1000)
+    # mode multi-process: insert dari worker lain tidak membangunkan proses ini, cek ulang per detik
+    consume_recheck = 1.0 if multiprocess else None
+
+    # counter /stats dijumlahkan dari semua worker lewat tabel worker_stats
+    worker_stats = None
+    if multiprocess:
+        worker_stats = WorkerStatsSync(
+            event_processor.storage, stats,
+            interval_seconds=getattr(Config, "STATS_FLUSH_INTERVAL_SECONDS", 1.0)
+        )
+
+    async def current_stats() -> dict:
+        if worker_stats is not None:
+            return await worker_stats.aggregated()
+        return stats.get_stats()
+
+    profiling_enabled = getattr(Config, "PROFILING_ENABLED", False)
+    profiler = ProfilerService(max_seconds=getattr(Config, "PROFILING_MAX_SECONDS", 60))
 
     # Lifespan context
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         logger.info("🚀 Starting Event Aggregator Service...")
+        if JSON_BACKEND != "orjson":
+            logger.warning("orjson is not installed; /publish/fast falls back to the stdlib json module")
+        else:
+            logger.info("JSON backend for /publish/fast: orjson")
         await event_processor.start()
+        if worker_stats is not None:
+            await event_processor.storage.purge_worker_stats(worker_stats.run_id)
+            await worker_stats.start()
+        if db_path:
+            await retention.start()
+        if forwarder is not None:
+            await forwarder.start()
         logger.info(f"✅ Service started on {getattr(Config, 'HOST', '127.0.0.1')}:{getattr(Config, 'PORT', 8080)}")
 
         async def monitor_and_shutdown():
@@ -52,7 +201,7 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
                 if current >= TARGET_EVENT_COUNT:
                     logger.info(f"\n🎯 Target {TARGET_EVENT_COUNT} events reached!")
                     final_stats = stats.get_stats()
-                    topics = dedup_store.get_all_topics()
+                    topics = await event_processor.storage.get_all_topics()
                     logger.info("=== 📊 Final Statistics ===")
                     logger.info(f"Total Events Received : {final_stats['received']}")
                     logger.info(f"Unique Processed       : {final_stats['unique_processed']}")
@@ -68,7 +217,15 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         asyncio.create_task(monitor_and_shutdown())
         yield
         logger.info("🛑 Shutting down Event Aggregator Service...")
+        await retention.stop()
         await event_processor.stop()
+        subscriptions.close_all()
+        consume_notifier.close_all()
+        if forwarder is not None:
+            await forwarder.stop()
+        if worker_stats is not None:
+            await worker_stats.stop()
+        event_processor.storage.close()
         logger.info("Service stopped gracefully.")
 
     # Create FastAPI app
@@ -79,6 +236,30 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         lifespan=lifespan
     )
 
+    if metrics_enabled:
+        app.add_middleware(RequestTimingMiddleware, stats=stats)
+
+    app.state.dedup_store = dedup_store
+    app.state.stats = stats
+    app.state.event_processor = event_processor
+    app.state.retention = retention
+    app.state.forwarder = forwarder
+    app.state.admission = admission
+    app.state.worker_stats = worker_stats
+    app.state.subscriptions = subscriptions
+    app.state.consume_notifier = consume_notifier
+
+    def too_many_requests(rejected: Rejected) -> HTTPException:
+        return HTTPException(status_code=429, detail=f"Rejected: {rejected.reason}",
+                             headers={"Retry-After": str(rejected.retry_after)})
+
+    async def admit_queue():
+        """Dependency: dijalankan sebelum validasi body, jadi load shedding tetap murah"""
+        try:
+            admission.check_queue()
+        except Rejected as rejected:
+            raise too_many_requests(rejected)
+
     # =========================
     # Endpoints
     # =========================
@@ -86,23 +267,30 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
     async def root():
         return {"service": "Event Aggregator", "status": "running", "version": "1.0.0"}
 
-    @app.post("/publish", response_model=EventResponse)
-    async def publish_events(data: Union[Event, EventBatch]):
+    @app.post("/publish", response_model=EventResponse, dependencies=[Depends(admit_queue)])
+    async def publish_events(data: Union[Event, EventBatch], request: Request):
+        if stats.instrument and RECEIVED_AT in request.scope:
+            # body sudah dibaca, di-parse dan divalidasi pydantic sebelum handler dipanggil
+            stats.observe_latency("parse_validate", time.perf_counter() - request.scope[RECEIVED_AT])
         try:
             events = [data] if isinstance(data, Event) else data.events or []
 
             if not events:
                 raise HTTPException(status_code=400, detail="No events provided")
 
-            processed = 0
-            duplicates = 0
+            try:
+                admission.acquire(Counter(e.source for e in events))
+            except Rejected as rejected:
+                raise too_many_requests(rejected)
 
-            for event in events:
-                result = await event_processor.publish(event)
-                if result["status"] == "processed":
-                    processed += 1
-                elif result["status"] == "duplicate":
-                    duplicates += 1
+            if len(events) == 1:
+                result = await event_processor.publish(events[0])
+                processed = int(result["status"] == "processed")
+                duplicates = int(result["status"] == "duplicate")
+            else:
+                result = await event_processor.publish_batch(events)
+                processed = result["processed"]
+                duplicates = result["duplicates"]
 
             return EventResponse(
                 message="Events processed",
@@ -110,48 +298,314 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
                 processed=processed,
                 duplicates=duplicates
             )
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error in publish endpoint: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
+    @app.post("/publish/fast", dependencies=[Depends(admit_queue)])
+    async def publish_fast(request: Request):
+        """
+        Ingest throughput tinggi: body mentah di-parse (orjson jika terpasang) dan divalidasi
+        per batch tanpa membuat model pydantic. Item tidak valid dilewati dan dilaporkan
+        di "errors"; item valid diproses seperti batch /publish.
+        """
+        try:
+            items = parse_items(await request.body())
+        except InvalidBody as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        events, errors = validate_events(items)
+        if stats.instrument and RECEIVED_AT in request.scope:
+            stats.observe_latency("parse_validate", time.perf_counter() - request.scope[RECEIVED_AT])
+        if not items:
+            raise HTTPException(status_code=400, detail="No events provided")
+
+        result = {"received": 0, "processed": 0, "duplicates": 0}
+        if events:
+            try:
+                admission.acquire(Counter(e.source for e in events))
+            except Rejected as rejected:
+                raise too_many_requests(rejected)
+            try:
+                result = await event_processor.publish_batch(events, encode_payloads(events))
+            except Exception as e:
+                logger.error(f"Error in publish_fast endpoint: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+        body = fast_dumps({
+            "message": "Events processed",
+            "received": result["received"],
+            "processed": result["processed"],
+            "duplicates": result["duplicates"],
+            "rejected": len(errors),
+            "errors": errors,
+        })
+        return Response(content=body, media_type="application/json")
+
+    @app.post("/publish/stream", response_model=StreamIngestResponse,
+              dependencies=[Depends(admit_queue)])
+    async def publish_stream(request: Request):
+        """
+        Bulk ingest NDJSON (satu event per baris), boleh chunked dan Content-Encoding: gzip.
+        Baris di-parse begitu tiba dan di-commit per STREAM_INGEST_CHUNK_SIZE event, jadi
+        memori konstan berapa pun ukuran upload. Queue di atas watermark atau rate limit
+        source menahan pembacaan body per chunk (backpressure ke client), bukan menolak
+        di tengah stream.
+        400 jika body rusak di tengah jalan; event sebelum titik itu sudah di-commit.
+        """
+        encoding = request.headers.get("content-encoding", "").lower()
+        if encoding not in ("", "identity", "gzip", "deflate"):
+            raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {encoding}")
+        lines = iter_lines(request.stream(), compressed=encoding in ("gzip", "deflate"),
+                           max_line_bytes=getattr(Config, "STREAM_MAX_LINE_BYTES", 1 << 20))
+        try:
+            totals = await ingest_ndjson(event_processor, lines,
+                                         chunk_size=getattr(Config, "STREAM_INGEST_CHUNK_SIZE", 1000),
+                                         admission=admission)
+        except Exception as e:
+            logger.error(f"Error in publish_stream endpoint: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+        message = "Stream aborted" if totals["aborted"] else "Events processed"
+        response = StreamIngestResponse(message=message, **totals)
+        if response.aborted:
+            return JSONResponse(status_code=400, content=response.model_dump())
+        return response
+
     @app.get("/events")
-    async def get_events(topic: Optional[str] = None):
+    async def get_events(topic: Optional[str] = None,
+                         limit: Optional[int] = Query(None, ge=1, le=10000),
+                         after: int = Query(0, ge=0),
+                         format: str = Query("json", pattern="^(json|ndjson)$")):
+        """
+        limit/after: keyset pagination (after = id terakhir dari halaman sebelumnya).
+        format=ndjson: stream semua event setelah `after` satu per baris, memori konstan.
+        Tanpa limit, format json mengembalikan semua event (kompatibel dengan versi lama).
+        """
         try:
-            events = dedup_store.get_events(topic)
-            import json
-            return {
-                "count": len(events),
-                "events": [
-                    {
-                        "topic": row[0],
-                        "event_id": row[1],
-                        "timestamp": row[2],
-                        "source": row[3],
-                        "payload": json.loads(row[4])
-                    }
-                    for row in events
-                ]
-            }
+            if format == "ndjson":
+                def stream():
+                    # generator sync: Starlette menjalankannya di threadpool, bukan di event loop
+                    for row in dedup_store.iter_events(topic, after, getattr(Config, "EVENTS_STREAM_BATCH", 1000)):
+                        yield encode_event_row(row) + "\n"
+                return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+            events = await event_processor.storage.get_events_page(
+                topic, after, limit if limit is not None else -1
+            )
+            next_after = events[-1][0] if events else after
+            return Response(content=encode_events_page(events, next_after), media_type="application/json")
         except Exception as e:
             logger.error(f"Error in get_events endpoint: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
+    @app.get("/topics", response_model=TopicsResponse)
+    async def get_topics(topic: Optional[str] = None):
+        """
+        Registry topic: jumlah event tersimpan (setelah retention) dan first/last seen (UTC).
+        Dibaca dari registry yang di-maintain saat insert, bukan scan processed_events.
+        """
+        topics = await event_processor.storage.get_topics()
+        if topic is not None:
+            topics = [info for info in topics if info["topic"] == topic]
+            if not topics:
+                raise HTTPException(status_code=404, detail=f"Unknown topic: {topic}")
+        topics.sort(key=lambda info: info["topic"])
+        return TopicsResponse(count=len(topics), topics=[TopicInfo(**info) for info in topics])
+
+    @app.get("/consume")
+    async def consume(group: str = Query(..., min_length=1), topic: Optional[str] = None,
+                      max_events: int = Query(100, alias="max", ge=1),
+                      wait_ms: int = Query(0, ge=0)):
+        """
+        Batch event berikutnya setelah offset yang di-commit `group` (per topic, atau semua
+        topic jika kosong), urut offset. Jika belum ada event baru, tunggu sampai `wait_ms`
+        (dibatasi CONSUME_MAX_WAIT_MS) dan kembalikan begitu event baru di-commit.
+        Offset tidak maju otomatis: commit `next_offset` lewat POST /consume/commit.
+        """
+        if not db_path:
+            raise HTTPException(status_code=400, detail="Consumer groups require DATABASE_PATH")
+        storage = event_processor.storage
+        limit = min(max_events, consume_max_batch)
+        try:
+            offset = await storage.get_consumer_offset(group, topic)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + min(wait_ms / 1000, consume_max_wait)
+        while True:
+            # waiter didaftarkan sebelum query: event yang masuk di antaranya tidak terlewat
+            waiter = consume_notifier.waiter(topic) if deadline > loop.time() else None
+            rows = await storage.get_events_after(topic, offset, limit)
+            remaining = deadline - loop.time()
+            if rows or remaining <= 0 or consume_notifier.closed:
+                if waiter is not None:
+                    consume_notifier.discard(topic, waiter)
+                break
+            if consume_recheck is not None:
+                remaining = min(remaining, consume_recheck)
+            await consume_notifier.wait(topic, waiter, remaining)
+        return Response(content=encode_consume_batch(group, topic, offset, rows), media_type="application/json")
+
+    @app.post("/consume/commit")
+    async def consume_commit(commit: ConsumerCommit):
+        """Simpan offset group (biasanya next_offset dari /consume); boleh mundur untuk replay"""
+        if not db_path:
+            raise HTTPException(status_code=400, detail="Consumer groups require DATABASE_PATH")
+        try:
+            await event_processor.storage.commit_consumer_offset(commit.group, commit.topic, commit.offset)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"group": commit.group, "topic": commit.topic, "offset": commit.offset}
+
     @app.get("/stats", response_model=StatsResponse)
     async def get_stats():
         try:
-            stat_data = stats.get_stats()
-            topics = dedup_store.get_all_topics()
+            stat_data = await current_stats()
+            topics = await event_processor.storage.get_all_topics()
             return StatsResponse(
                 received=stat_data["received"],
                 unique_processed=stat_data["unique_processed"],
                 duplicate_dropped=stat_data["duplicate_dropped"],
                 topics=topics,
-                uptime=stat_data["uptime"]
+                uptime=stat_data["uptime"],
+                rates=stat_data["rates"],
+                latency=stat_data["latency"],
+                per_topic=stat_data["per_topic"],
+                cache=dedup_store.get_cache_stats(),
+                prefilter=dedup_store.get_prefilter_stats(),
+                retention=retention.get_stats() if retention.enabled else None,
+                forwarder=forwarder.get_stats() if forwarder is not None else None,
+                admission=admission.get_stats(),
+                subscriptions=subscriptions.get_stats(),
+                consumers=consume_notifier.get_stats()
             )
         except Exception as e:
             logger.error(f"Error in stats endpoint: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
+    def open_subscription(topic: list[str], policy: Optional[str], buffer: Optional[int]) -> Subscription:
+        return subscriptions.subscribe(topic, buffer_size=buffer, policy=policy)
+
+    @app.get("/subscribe/sse")
+    async def subscribe_sse(topic: list[str] = Query(["*"]), policy: Optional[str] = None,
+                            buffer: Optional[int] = Query(None, ge=1, le=100000)):
+        """
+        Server-Sent Events: event yang baru selesai diproses, difilter per topic
+        (`topic=a.b`, `topic=a.*`, bisa diulang; default semua). Event yang hilang karena
+        buffer penuh dilaporkan lewat `event: gap`; `event: closed` saat subscription ditutup.
+        """
+        try:
+            sub = open_subscription(topic, policy, buffer)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except TooManySubscribers as e:
+            raise HTTPException(status_code=503, detail=str(e))
+
+        async def stream():
+            try:
+                yield f": subscribed {sub.id}\n\n"
+                while True:
+                    try:
+                        messages = await sub.get(max_items=500, timeout=sse_heartbeat)
+                    except SubscriptionClosed as closed:
+                        yield encode_sse({"type": "closed", "reason": str(closed)})
+                        return
+                    yield "".join(map(encode_sse, messages)) if messages else ": keep-alive\n\n"
+            finally:
+                # client putus: generator dibatalkan, subscription ikut dilepas
+                subscriptions.unsubscribe(sub)
+
+        return StreamingResponse(stream(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @app.websocket("/subscribe/ws")
+    async def subscribe_ws(websocket: WebSocket, topic: list[str] = Query(["*"]),
+                           policy: Optional[str] = None, buffer: Optional[int] = Query(None, ge=1, le=100000)):
+        """
+        WebSocket: satu frame teks JSON per event; pesan kontrol berupa {"type": "gap", "missed": n}.
+        Overflow dengan policy disconnect menutup koneksi dengan code 1008.
+        """
+        try:
+            sub = open_subscription(topic, policy, buffer)
+        except (ValueError, TooManySubscribers) as e:
+            await websocket.close(code=1008, reason=str(e))
+            return
+        await websocket.accept()
+
+        async def wait_disconnect():
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+
+        disconnected = asyncio.create_task(wait_disconnect())
+        try:
+            while True:
+                getter = asyncio.create_task(sub.get(max_items=500))
+                done, _ = await asyncio.wait({getter, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    getter.cancel()
+                    return
+                try:
+                    messages = getter.result()
+                except SubscriptionClosed as closed:
+                    await websocket.close(code=1008 if str(closed) == "overflow" else 1001, reason=str(closed))
+                    return
+                for message in messages:
+                    if type(message) is bytes:
+                        await websocket.send_text(message.decode())
+                    else:
+                        await websocket.send_json(message)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            disconnected.cancel()
+            subscriptions.unsubscribe(sub)
+
+    @app.get("/metrics")
+    async def get_metrics():
+        """Prometheus text exposition format; 404 jika METRICS_ENABLED=false"""
+        if not metrics_enabled:
+            raise HTTPException(status_code=404, detail="Metrics disabled")
+        content = render_prometheus(stats, dedup_store, event_processor.queue_depth(),
+                                    forwarder.get_stats() if forwarder is not None else None,
+                                    admission.get_stats(), await current_stats())
+        return PlainTextResponse(content, media_type="text/plain; version=0.0.4")
+
+    @app.post("/debug/profile")
+    async def debug_profile(seconds: float = Query(10, gt=0),
+                            mode: str = Query("sampling", pattern="^(sampling|cprofile)$"),
+                            format: str = Query("json", pattern="^(json|collapsed|pstats)$"),
+                            interval_ms: float = Query(10, ge=1, le=1000),
+                            tracemalloc_top: int = Query(0, ge=0, le=100)):
+        """
+        Profiling proses yang sedang berjalan selama `seconds` (dibatasi PROFILING_MAX_SECONDS).
+        format=collapsed (mode sampling): teks collapsed stacks untuk flamegraph.
+        format=pstats (mode cprofile): file pstats biner, buka dengan pstats / snakeviz.
+        Hanya satu capture dalam satu waktu (409 jika sedang berjalan).
+        """
+        if not profiling_enabled:
+            raise HTTPException(status_code=404, detail="Profiling disabled")
+        if (format == "collapsed" and mode != "sampling") or (format == "pstats" and mode != "cprofile"):
+            raise HTTPException(status_code=400, detail=f"format={format} is not available for mode={mode}")
+        try:
+            result = await profiler.capture(seconds, mode=mode, interval_ms=interval_ms,
+                                            tracemalloc_top=tracemalloc_top)
+        except ProfilerBusy:
+            raise HTTPException(status_code=409, detail="A profile capture is already running")
+
+        if format == "collapsed":
+            return PlainTextResponse(result["collapsed"])
+        if format == "pstats":
+            return Response(
+                content=result["pstats"],
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": "attachment; filename=aggregator.pstats"}
+            )
+        result.pop("pstats", None)
+        return result
+
     return app
 
 # =========================
@@ -165,5 +619,7 @@ if __name__ == "__main__":
         "src.main:app",
         host=getattr(Config, "HOST", "127.0.0.1"),
         port=getattr(Config, "PORT", 8080),
-        reload=True
+        workers=getattr(Config, "WORKERS", 1),
+        # reload hanya bisa dengan satu proses
+        reload=getattr(Config, "WORKERS", 1) == 1
     )
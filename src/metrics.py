@@ -0,0 +1,132 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Optional
+
+
+class ShardedCounter:
+    """
+    Counter tanpa lock di jalur increment: setiap thread menulis ke cell miliknya
+    sendiri (threading.local), pembacaan menjumlahkan semua cell.
+    Lock hanya dipakai sekali per thread saat cell pertama kali didaftarkan.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._cells: list[list[int]] = []
+        self._register_lock = threading.Lock()
+
+    def inc(self, n: int = 1):
+        try:
+            self._local.cell[0] += n
+        except AttributeError:
+            cell = [n]
+            with self._register_lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+
+    @property
+    def value(self) -> int:
+        return sum(cell[0] for cell in self._cells)
+
+
+class RollingRate:
+    """
+    Rate event per detik di jendela bergulir (mis. 1m / 5m) memakai ring buffer
+    bucket per detik: add() O(1), rate() O(jumlah detik di jendela).
+    """
+
+    def __init__(self, horizon_seconds: int = 300):
+        self.horizon = horizon_seconds
+        # +1 slot untuk detik berjalan, supaya jendela penuh horizon detik tetap tersimpan
+        size = horizon_seconds + 1
+        self._counts = array("q", bytes(8 * size))
+        self._seconds = array("q", [-1] * size)
+        self._first: Optional[int] = None
+
+    def add(self, n: int = 1, now: Optional[float] = None):
+        second = int(now if now is not None else time.time())
+        if self._first is None:
+            self._first = second
+        idx = second % len(self._seconds)
+        if self._seconds[idx] != second:
+            self._seconds[idx] = second
+            self._counts[idx] = 0
+        self._counts[idx] += n
+
+    def rate(self, window_seconds: int, now: Optional[float] = None) -> float:
+        """
+        Rata-rata event/detik selama window_seconds terakhir (detik berjalan tidak dihitung).
+        Dibagi rentang yang benar-benar tercakup: maksimal horizon, dan sejak add() pertama
+        jika proses belum berjalan selama window_seconds.
+        """
+        current = int(now if now is not None else time.time())
+        if self._first is None:
+            return 0.0
+        span = min(window_seconds, self.horizon, current - self._first)
+        if span <= 0:
+            return 0.0
+        oldest = current - span
+        total = 0
+        for idx in range(len(self._seconds)):
+            if oldest <= self._seconds[idx] < current:
+                total += self._counts[idx]
+        return total / span
+
+
+class Histogram:
+    """Histogram bucket tetap (batas atas dalam detik), observe() O(log jumlah bucket)"""
+
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # bucket terakhir = +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Perkiraan kuantil = batas atas bucket tempat kuantil jatuh"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound if bound != float("inf") else self.buckets[-1]
+        return self.buckets[-1]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5) * 1000,
+            "p95_ms": self.quantile(0.95) * 1000,
+            "p99_ms": self.quantile(0.99) * 1000,
+        }
+
+
+class TopicMetrics:
+    """Counter dan rate per topic"""
+
+    def __init__(self):
+        self.received = ShardedCounter()
+        self.unique = ShardedCounter()
+        self.duplicates = ShardedCounter()
+        self.rate = RollingRate()
+
+    def snapshot(self) -> dict:
+        return {
+            "received": self.received.value,
+            "unique_processed": self.unique.value,
+            "duplicate_dropped": self.duplicates.value,
+            "rate_1m": round(self.rate.rate(60), 3),
+            "rate_5m": round(self.rate.rate(300), 3),
+        }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 class Event(BaseModel):
@@ -29,9 +29,39 @@ class EventResponse(BaseModel):
     processed: int
     duplicates: int
 
+class StreamIngestResponse(EventResponse):
+    rejected: int = 0
+    errors: list[Dict[str, Any]] = Field(default_factory=list)
+    aborted: Optional[str] = None
+
+class TopicInfo(BaseModel):
+    topic: str
+    event_count: int
+    first_seen: str
+    last_seen: str
+
+class TopicsResponse(BaseModel):
+    count: int
+    topics: list[TopicInfo]
+
+class ConsumerCommit(BaseModel):
+    group: str = Field(..., min_length=1)
+    topic: Optional[str] = None
+    offset: int = Field(..., ge=0)
+
 class StatsResponse(BaseModel):
     received: int
     unique_processed: int
     duplicate_dropped: int
     topics: list[str]
-    uptime: float
\ No newline at end of file
+    uptime: float
+    rates: Optional[Dict[str, float]] = None
+    latency: Optional[Dict[str, Dict[str, float]]] = None
+    per_topic: Optional[Dict[str, Dict[str, float]]] = None
+    cache: Optional[Dict[str, Any]] = None
+    prefilter: Optional[Dict[str, Any]] = None
+    retention: Optional[Dict[str, Any]] = None
+    forwarder: Optional[Dict[str, Any]] = None
+    admission: Optional[Dict[str, Any]] = None
+    subscriptions: Optional[Dict[str, Any]] = None
+    consumers: Optional[Dict[str, Any]] = None
\ No newline at end of file
@@ -0,0 +1,142 @@
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import signal
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+
+
+class ProfilerBusy(Exception):
+    """Capture lain sedang berjalan"""
+
+
+class ProfilerService:
+    """
+    Profiling on-demand untuk proses yang sedang berjalan, satu capture dalam satu waktu.
+    mode "sampling": stack di-sample tiap interval (SIGPROF untuk thread event loop,
+        thread sampler untuk thread lain); overhead rendah, aman di bawah load,
+        hasil collapsed stacks untuk flamegraph.
+    mode "cprofile": profiler deterministik di thread event loop selama capture
+        (lebih detail, overhead lebih besar), hasil pstats.
+    Opsional: top-N alokasi tracemalloc selama capture.
+    """
+
+    def __init__(self, max_seconds: float = 60):
+        self.max_seconds = max_seconds
+        self._busy = False
+
+    @property
+    def busy(self) -> bool:
+        return self._busy
+
+    async def capture(self, seconds: float, mode: str = "sampling", interval_ms: float = 10,
+                      tracemalloc_top: int = 0) -> dict:
+        if mode not in ("sampling", "cprofile"):
+            raise ValueError(f"Unknown profile mode: {mode}")
+        if self._busy:
+            raise ProfilerBusy()
+        # flag di-set tanpa await di antaranya, jadi aman dari race antar coroutine
+        self._busy = True
+        try:
+            seconds = min(max(seconds, 0.01), self.max_seconds)
+            started_tracemalloc = False
+            if tracemalloc_top and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracemalloc = True
+            try:
+                if mode == "sampling":
+                    result = await self._sample(seconds, interval_ms / 1000.0)
+                else:
+                    result = await self._cprofile(seconds)
+                if tracemalloc_top:
+                    result["tracemalloc"] = self._top_allocations(tracemalloc_top)
+            finally:
+                if started_tracemalloc:
+                    tracemalloc.stop()
+            result.update({"mode": mode, "seconds": seconds})
+            return result
+        finally:
+            self._busy = False
+
+    # =========================
+    # Sampling
+    # =========================
+    async def _sample(self, seconds: float, interval: float) -> dict:
+        stacks: Counter = Counter()
+        stop = threading.Event()
+        main_thread = threading.main_thread()
+        # sampler berbasis thread hanya dapat GIL saat thread lain melepasnya, sehingga
+        # thread event loop selalu tampak sedang di select(); thread loop (main thread)
+        # di-sample lewat SIGPROF yang menginterupsi frame yang sedang berjalan
+        use_signal = threading.current_thread() is main_thread and hasattr(signal, "setitimer")
+        skip = {main_thread.ident} if use_signal else set()
+
+        if use_signal:
+            def on_sigprof(signum, frame):
+                stacks[self._collapse(frame, main_thread.name)] += 1
+            previous_handler = signal.signal(signal.SIGPROF, on_sigprof)
+            signal.setitimer(signal.ITIMER_PROF, interval, interval)
+
+        sampler = threading.Thread(
+            target=self._sample_loop, args=(stacks, stop, interval, skip), name="profiler-sampler", daemon=True
+        )
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            if use_signal:
+                signal.setitimer(signal.ITIMER_PROF, 0, 0)
+                signal.signal(signal.SIGPROF, previous_handler)
+            stop.set()
+            await asyncio.get_running_loop().run_in_executor(None, sampler.join)
+        collapsed = "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+        return {"samples": sum(stacks.values()), "collapsed": collapsed}
+
+    @staticmethod
+    def _collapse(frame, thread_name: str) -> str:
+        """Stack frame -> "thread;root;...;leaf" (format collapsed stacks flamegraph)"""
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        parts.append(thread_name)
+        return ";".join(reversed(parts))
+
+    @classmethod
+    def _sample_loop(cls, stacks: Counter, stop: threading.Event, interval: float, skip: set):
+        own_ident = threading.get_ident()
+        while not stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident or ident in skip:
+                    continue
+                stacks[cls._collapse(frame, names.get(ident, str(ident)))] += 1
+            stop.wait(interval)
+
+    # =========================
+    # Deterministic (cProfile)
+    # =========================
+    async def _cprofile(self, seconds: float) -> dict:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+        profiler.create_stats()
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(50)
+        return {"pstats": marshal.dumps(profiler.stats), "report": text.getvalue()}
+
+    @staticmethod
+    def _top_allocations(limit: int) -> list[dict]:
+        snapshot = tracemalloc.take_snapshot()
+        return [
+            {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:limit]
+        ]
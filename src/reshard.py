@@ -0,0 +1,131 @@
+"""
+Reshard offline: salin processed_events dari satu events.db (atau direktori shard lama)
+ke direktori shard baru dengan jumlah shard tertentu. Service harus berhenti dulu.
+
+    python -m src.reshard --source data/events.db --target data/shards --shards 4
+    python -m src.reshard --source data/shards --target data/shards-8 --shards 8
+
+Target harus belum ada / kosong; sumber tidak diubah. processed_at ikut disalin sehingga
+horizon retention tetap sama. seq diberikan ulang per shard (urutan per topic tetap), jadi
+offset consumer group tidak ikut disalin. Setelah selesai, arahkan SHARD_DIR ke target.
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from .dedup_store import DedupStore
+from .sharded_store import read_manifest, shard_for, shard_path, write_manifest
+
+COPY_BATCH = 10_000
+
+
+def source_files(source: str) -> list[str]:
+    """File SQLite sumber: satu events.db, atau semua shard di direktori ber-manifest"""
+    path = Path(source)
+    if path.is_dir():
+        manifest = read_manifest(source)
+        if manifest is None:
+            raise ValueError(f"{source} is not a shard directory (missing shards.json)")
+        return [shard_path(source, i) for i in range(manifest["shard_count"])]
+    if not path.exists():
+        raise ValueError(f"{source} does not exist")
+    return [source]
+
+
+def iter_rows(db_file: str, batch_size: int = COPY_BATCH):
+    """Keyset scan processed_events (read-only), urut seq (rowid untuk database lama tanpa seq)"""
+    conn = sqlite3.connect(Path(db_file).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(processed_events)")]
+        key = "seq" if "seq" in columns else "rowid"
+        after = 0
+        while True:
+            rows = conn.execute(
+                f"SELECT {key}, topic, event_id, timestamp, source, payload, processed_at "
+                f"FROM processed_events WHERE {key} > ? ORDER BY {key} LIMIT ?",
+                (after, batch_size)
+            ).fetchall()
+            for row in rows:
+                yield row[1:]
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][0]
+    finally:
+        conn.close()
+
+
+def reshard(source: str, target: str, shard_count: int) -> dict:
+    if shard_count < 1:
+        raise ValueError("--shards must be >= 1")
+    if Path(target).exists() and any(Path(target).iterdir()):
+        raise ValueError(f"target {target} is not empty")
+    files = source_files(source)
+
+    # schema shard dibuat lewat DedupStore agar identik dengan service
+    for i in range(shard_count):
+        DedupStore(db_path=shard_path(target, i), cache_max_entries=0).close()
+    targets = [sqlite3.connect(shard_path(target, i)) for i in range(shard_count)]
+    for conn in targets:
+        conn.execute("PRAGMA synchronous=OFF")
+
+    copied = [0] * shard_count
+    started = time.perf_counter()
+    try:
+        for db_file in files:
+            pending: list[list[tuple]] = [[] for _ in range(shard_count)]
+            for row in iter_rows(db_file):
+                index = shard_for(row[0], shard_count)
+                pending[index].append(row)
+                if len(pending[index]) >= COPY_BATCH:
+                    copied[index] += _flush(targets[index], pending[index], copied[index])
+                    pending[index] = []
+            for index, rows in enumerate(pending):
+                if rows:
+                    copied[index] += _flush(targets[index], rows, copied[index])
+        for conn, count in zip(targets, copied):
+            with conn:
+                conn.execute("UPDATE event_seq SET value = ? WHERE name = 'processed_events'", (count,))
+    finally:
+        for conn in targets:
+            conn.close()
+    # manifest terakhir: direktori tanpa manifest = reshard belum selesai
+    write_manifest(target, shard_count)
+    return {"sources": files, "target": target, "shards": shard_count, "rows_per_shard": copied,
+            "rows": sum(copied), "seconds": round(time.perf_counter() - started, 3)}
+
+
+def _flush(conn: sqlite3.Connection, rows: list[tuple], seq_before: int) -> int:
+    """
+    seq diberikan ulang per shard target (seq lama dari beberapa shard sumber bisa bentrok),
+    berurutan sesuai urutan salin sehingga urutan per topic tetap sama
+    """
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO processed_events "
+            "(topic, event_id, timestamp, source, payload, processed_at, seq) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(*row, seq) for seq, row in enumerate(rows, seq_before + 1)]
+        )
+    return len(rows)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", required=True, help="events.db atau direktori shard lama")
+    parser.add_argument("--target", required=True, help="direktori shard baru (harus kosong)")
+    parser.add_argument("--shards", type=int, required=True, help="jumlah shard baru")
+    args = parser.parse_args(argv)
+    try:
+        result = reshard(args.source, args.target, args.shards)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    print(f"Copied {result['rows']} events from {len(result['sources'])} file(s) into "
+          f"{result['shards']} shards at {result['target']} in {result['seconds']}s")
+    print(f"Rows per shard: {result['rows_per_shard']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from .async_store import AsyncDedupStore
+from .lease import FileLease
+
+logger = logging.getLogger("EventAggregator")
+
+
+def parse_topic_limits(raw: str) -> dict[str, float]:
+    """Parse "topic.a=3600,topic.b=60" menjadi {"topic.a": 3600.0, "topic.b": 60.0}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        topic, _, value = item.rpartition("=")
+        if not topic:
+            raise ValueError(f"Invalid retention rule: {item!r}")
+        limits[topic] = float(value)
+    return limits
+
+
+class RetentionManager:
+    """
+    Background task yang menegakkan retention processed_events:
+    - umur (processed_at) global dan/atau per topic
+    - jumlah row maksimum per topic
+    Penghapusan dilakukan per chunk kecil sehingga writer tidak ditahan lama,
+    lalu halaman kosong dikembalikan lewat incremental vacuum.
+
+    Horizon dedup: event dijamin terdeteksi duplicate minimal selama umur
+    retention-nya sejak pertama diproses; setelah di-prune, event yang sama
+    bisa diterima lagi (kecuali masih ada di cache in-memory).
+
+    Mode multi-worker: dengan `lease`, hanya satu worker yang menjalankan retention.
+    """
+
+    def __init__(self, storage: AsyncDedupStore,
+                 max_age_seconds: float = 0,
+                 topic_max_age: Optional[dict[str, float]] = None,
+                 max_rows_per_topic: int = 0,
+                 interval_seconds: float = 60,
+                 chunk_size: int = 1000,
+                 vacuum_pages: int = 1000,
+                 lease: Optional[FileLease] = None):
+        self.storage = storage
+        self.max_age_seconds = max_age_seconds
+        self.topic_max_age = topic_max_age or {}
+        self.max_rows_per_topic = max_rows_per_topic
+        self.interval_seconds = interval_seconds
+        self.chunk_size = max(1, chunk_size)
+        self.vacuum_pages = vacuum_pages
+        self.lease = lease
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "runs": 0,
+            "pruned_rows": 0,
+            "reclaimed_pages": 0,
+            "last_run_at": None,
+            "last_run_seconds": 0.0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_age_seconds or self.topic_max_age or self.max_rows_per_topic)
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info("RetentionManager started.")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.lease is not None:
+            self.lease.release()
+
+    async def _loop(self):
+        while True:
+            try:
+                if self.lease is None or self.lease.try_acquire():
+                    await self.run_once()
+            except Exception as e:
+                logger.error(f"Retention run failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def _drain(self, prune, *args) -> int:
+        """Panggil prune per chunk sampai habis; yield ke loop di antara chunk"""
+        total = 0
+        while True:
+            deleted = await prune(*args)
+            total += deleted
+            if deleted < self.chunk_size:
+                return total
+            await asyncio.sleep(0)
+
+    async def run_once(self) -> int:
+        started = time.perf_counter()
+        pruned = 0
+        for topic, max_age in self.topic_max_age.items():
+            pruned += await self._drain(self.storage.prune_older_than, max_age, self.chunk_size, topic)
+        if self.max_age_seconds:
+            pruned += await self._drain(self.storage.prune_older_than, self.max_age_seconds,
+                                        self.chunk_size, None, tuple(self.topic_max_age))
+        if self.max_rows_per_topic:
+            for topic in await self.storage.get_all_topics():
+                pruned += await self._drain(self.storage.prune_topic_overflow, topic,
+                                            self.max_rows_per_topic, self.chunk_size)
+
+        reclaimed = 0
+        if pruned and self.vacuum_pages:
+            reclaimed = await self.storage.incremental_vacuum(self.vacuum_pages)
+
+        self.stats["runs"] += 1
+        self.stats["pruned_rows"] += pruned
+        self.stats["reclaimed_pages"] += reclaimed
+        self.stats["last_run_at"] = time.time()
+        self.stats["last_run_seconds"] = round(time.perf_counter() - started, 4)
+        if pruned:
+            logger.info(f"Retention pruned {pruned} events, reclaimed {reclaimed} pages")
+        return pruned
+
+    def get_stats(self) -> dict:
+        return dict(self.stats)
@@ -0,0 +1,290 @@
+import asyncio
+import heapq
+import json
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .async_store import AsyncDedupStore
+from .config import Config
+from .dedup_store import DedupStore
+
+MANIFEST = "shards.json"
+
+
+def shard_for(topic: str, shards: int) -> int:
+    """Shard stabil untuk topic (crc32, sama di semua proses dan restart)"""
+    return zlib.crc32(topic.encode("utf-8")) % shards
+
+
+def shard_path(shard_dir: str, index: int) -> str:
+    return str(Path(shard_dir) / f"shard-{index:03d}.db")
+
+
+def read_manifest(shard_dir: str) -> Optional[dict]:
+    path = Path(shard_dir) / MANIFEST
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def write_manifest(shard_dir: str, shard_count: int):
+    Path(shard_dir).mkdir(parents=True, exist_ok=True)
+    (Path(shard_dir) / MANIFEST).write_text(json.dumps({"shard_count": shard_count, "hash": "crc32(topic)"}))
+
+
+class ShardedDedupStore:
+    """
+    processed_events dipecah ke N file SQLite berdasarkan hash topic; setiap shard adalah
+    DedupStore biasa dengan writer sendiri, sehingga topic di shard berbeda bisa commit paralel.
+    Interface sama dengan DedupStore (dipakai lewat AsyncShardedStore).
+
+    Cursor /events (get_events_page) lintas shard: seq * N + shard, jadi keyset pagination
+    tetap stabil; hasil semua shard di-merge lazy lewat heapq.merge.
+    Jumlah shard dicatat di shards.json; membuka direktori dengan jumlah berbeda ditolak
+    (pakai `python -m src.reshard`).
+    """
+
+    def __init__(self, shard_dir: str, shard_count: int, reader_pool_size: Optional[int] = None,
+                 cache_max_entries: Optional[int] = None, cache_window_seconds: Optional[float] = None):
+        if shard_count < 1:
+            raise ValueError("shard_count must be >= 1")
+        manifest = read_manifest(shard_dir)
+        if manifest is not None and manifest["shard_count"] != shard_count:
+            raise ValueError(
+                f"{shard_dir} holds {manifest['shard_count']} shards, not {shard_count}; "
+                f"run `python -m src.reshard` to change the shard count"
+            )
+        if manifest is None:
+            write_manifest(shard_dir, shard_count)
+
+        if cache_max_entries is None:
+            cache_max_entries = getattr(Config, "DEDUP_CACHE_MAX_ENTRIES", -1)
+        if cache_max_entries < 0:
+            cache_max_entries = DedupStore.DEFAULT_CACHE_MAX_ENTRIES
+        # batas cache berlaku untuk total semua shard
+        per_shard = -(-cache_max_entries // shard_count) if cache_max_entries > 0 else 0
+
+        self.db_path = shard_dir
+        self.shard_count = shard_count
+        self.shards = [
+            DedupStore(db_path=shard_path(shard_dir, i), reader_pool_size=reader_pool_size,
+                       cache_max_entries=per_shard, cache_window_seconds=cache_window_seconds)
+            for i in range(shard_count)
+        ]
+        # atribut yang dibaca komponen lain dari DedupStore
+        self.connections = None
+        self.prefilter = None
+        self.index = None
+        self.outbox = False
+        self.multiprocess = False
+
+    def shard_index(self, topic: str) -> int:
+        return shard_for(topic, self.shard_count)
+
+    def shard(self, topic: str) -> DedupStore:
+        return self.shards[shard_for(topic, self.shard_count)]
+
+    def split_rows(self, rows: list[tuple]) -> dict[int, list[int]]:
+        """Index row per shard (urutan di dalam shard tetap)"""
+        groups: dict[int, list[int]] = {}
+        for i, row in enumerate(rows):
+            groups.setdefault(shard_for(row[0], self.shard_count), []).append(i)
+        return groups
+
+    # =========================
+    # Dedup logic
+    # =========================
+    def is_duplicate(self, topic: str, event_id: str) -> bool:
+        return self.shard(topic).is_duplicate(topic, event_id)
+
+    def _in_memory(self, topic: str, event_id: str) -> bool:
+        return self.shard(topic)._in_memory(topic, event_id)
+
+    def add_event(self, topic: str, event_id: str):
+        self.shard(topic).add_event(topic, event_id)
+
+    def store_event(self, topic: str, event_id: str, timestamp: str,
+                    source: str, payload: str) -> bool:
+        return self.shard(topic).store_event(topic, event_id, timestamp, source, payload)
+
+    def store_events(self, rows: list[tuple]) -> list[bool]:
+        results = [False] * len(rows)
+        for index, positions in self.split_rows(rows).items():
+            stored = self.shards[index].store_events([rows[i] for i in positions])
+            for i, ok in zip(positions, stored):
+                results[i] = ok
+        return results
+
+    # =========================
+    # Query helper
+    # =========================
+    def _global_rows(self, index: int, rows: list) -> Iterator[tuple]:
+        n = self.shard_count
+        return ((seq * n + index, *rest) for seq, *rest in rows)
+
+    def _shard_after(self, after: int, index: int) -> int:
+        """Cursor global -> seq terakhir yang sudah dilihat di shard `index`"""
+        return max(0, (after - index) // self.shard_count)
+
+    def get_events(self, topic: Optional[str] = None) -> list:
+        if topic:
+            return self.shard(topic).get_events(topic)
+        return list(chain.from_iterable(shard.get_events() for shard in self.shards))
+
+    def get_events_page(self, topic: Optional[str] = None, after: int = 0, limit: int = 100) -> list:
+        """Seperti DedupStore.get_events_page, dengan cursor global seq * N + shard"""
+        indexes = [self.shard_index(topic)] if topic else range(self.shard_count)
+        pages = [
+            self._global_rows(i, self.shards[i].get_events_page(topic, self._shard_after(after, i), limit))
+            for i in indexes
+        ]
+        merged = (row for row in heapq.merge(*pages) if row[0] > after)
+        if limit < 0:
+            return list(merged)
+        return [row for _, row in zip(range(limit), merged)]
+
+    def iter_events(self, topic: Optional[str] = None, after: int = 0, batch_size: int = 1000):
+        """Generator lazy: iter_events tiap shard di-merge berdasarkan cursor global"""
+        indexes = [self.shard_index(topic)] if topic else range(self.shard_count)
+        streams = [
+            self._global_rows(i, self.shards[i].iter_events(topic, self._shard_after(after, i), batch_size))
+            for i in indexes
+        ]
+        for row in heapq.merge(*streams):
+            if row[0] > after:
+                yield row
+
+    def get_all_topics(self) -> list[str]:
+        # satu topic hanya ada di satu shard, jadi cukup digabung
+        return list(chain.from_iterable(shard.get_all_topics() for shard in self.shards))
+
+    def get_topics(self) -> list[dict]:
+        return list(chain.from_iterable(shard.get_topics() for shard in self.shards))
+
+    # =========================
+    # Consumer groups
+    # =========================
+    # seq hanya monotonic di dalam satu shard, jadi consumer group selalu per topic
+    def _consumer_shard(self, topic: Optional[str]) -> DedupStore:
+        if not topic:
+            raise ValueError("topic is required when SHARD_COUNT > 1")
+        return self.shard(topic)
+
+    def get_events_after(self, topic: Optional[str], after: int, limit: int) -> list:
+        return self._consumer_shard(topic).get_events_after(topic, after, limit)
+
+    def get_consumer_offset(self, group: str, topic: Optional[str]) -> int:
+        return self._consumer_shard(topic).get_consumer_offset(group, topic)
+
+    def commit_consumer_offset(self, group: str, topic: Optional[str], position: int):
+        self._consumer_shard(topic).commit_consumer_offset(group, topic, position)
+
+    def get_seq_head(self, topic: Optional[str] = None) -> int:
+        return self._consumer_shard(topic).get_seq_head()
+
+    # =========================
+    # Retention / compaction
+    # =========================
+    def prune_older_than(self, max_age_seconds: float, chunk_size: int,
+                         topic: Optional[str] = None, exclude_topics: tuple = ()) -> int:
+        if topic is not None:
+            return self.shard(topic).prune_older_than(max_age_seconds, chunk_size, topic, exclude_topics)
+        return sum(shard.prune_older_than(max_age_seconds, chunk_size, None, exclude_topics)
+                   for shard in self.shards)
+
+    def prune_topic_overflow(self, topic: str, max_rows: int, chunk_size: int) -> int:
+        return self.shard(topic).prune_topic_overflow(topic, max_rows, chunk_size)
+
+    def incremental_vacuum(self, max_pages: int) -> int:
+        return sum(shard.incremental_vacuum(max_pages) for shard in self.shards)
+
+    # =========================
+    # Testing / cleanup
+    # =========================
+    def clear(self):
+        for shard in self.shards:
+            shard.clear()
+
+    def get_cache_stats(self) -> dict:
+        per_shard = [shard.get_cache_stats() for shard in self.shards]
+        totals = {key: sum(s[key] for s in per_shard)
+                  for key in ("size", "max_entries", "hits", "misses", "evictions")}
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            **totals,
+            "window_seconds": per_shard[0]["window_seconds"],
+            "hit_rate": round(totals["hits"] / lookups, 6) if lookups else 0.0,
+            "shards": self.shard_count,
+        }
+
+    def get_prefilter_stats(self) -> Optional[dict]:
+        return None
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+
+class AsyncShardedStore(AsyncDedupStore):
+    """
+    Facade async untuk ShardedDedupStore: satu thread writer per shard, sehingga insert ke
+    shard berbeda berjalan paralel (GIL dilepas selama SQLite bekerja). Batch yang
+    menyentuh beberapa shard dipecah dan di-commit bersamaan (satu transaksi per shard).
+    Maintenance lintas shard (retention global, vacuum, clear) lewat writer terpisah.
+    """
+
+    def __init__(self, dedup_store: ShardedDedupStore, read_workers: Optional[int] = None):
+        self.dedup_store = dedup_store
+        pool_size = dedup_store.shards[0].connections.reader_pool_size
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-maintenance")
+        self._readers = ThreadPoolExecutor(max_workers=read_workers or pool_size,
+                                           thread_name_prefix="sqlite-reader")
+        self._shard_writers = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sqlite-writer-{i}")
+            for i in range(dedup_store.shard_count)
+        ]
+
+    def _writer_for(self, topic: str) -> ThreadPoolExecutor:
+        return self._shard_writers[self.dedup_store.shard_index(topic)]
+
+    async def store_event(self, topic: str, event_id: str, timestamp: str,
+                          source: str, payload: str) -> bool:
+        shard = self.dedup_store.shard(topic)
+        return await self._run(self._writer_for(topic), shard.store_event,
+                               topic, event_id, timestamp, source, payload)
+
+    async def store_events(self, rows: list[tuple]) -> list[bool]:
+        groups = self.dedup_store.split_rows(rows)
+        stored = await asyncio.gather(*(
+            self._run(self._shard_writers[index], self.dedup_store.shards[index].store_events,
+                      [rows[i] for i in positions])
+            for index, positions in groups.items()
+        ))
+        results = [False] * len(rows)
+        for positions, shard_results in zip(groups.values(), stored):
+            for i, ok in zip(positions, shard_results):
+                results[i] = ok
+        return results
+
+    async def prune_older_than(self, max_age_seconds: float, chunk_size: int,
+                               topic: Optional[str] = None, exclude_topics: tuple = ()) -> int:
+        if topic is None:
+            return await super().prune_older_than(max_age_seconds, chunk_size, topic, exclude_topics)
+        return await self._run(self._writer_for(topic), self.dedup_store.prune_older_than,
+                               max_age_seconds, chunk_size, topic, exclude_topics)
+
+    async def prune_topic_overflow(self, topic: str, max_rows: int, chunk_size: int) -> int:
+        return await self._run(self._writer_for(topic), self.dedup_store.prune_topic_overflow,
+                               topic, max_rows, chunk_size)
+
+    async def commit_consumer_offset(self, group: str, topic: Optional[str], position: int):
+        shard = self.dedup_store._consumer_shard(topic)
+        await self._run(self._writer_for(topic), shard.commit_consumer_offset, group, topic, position)
+
+    def close(self):
+        for executor in self._shard_writers:
+            executor.shutdown(wait=True)
+        super().close()
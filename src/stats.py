@@ -1,34 +1,86 @@
 import time
 import threading
+from typing import Optional
+
+from .metrics import Histogram, RollingRate, ShardedCounter, TopicMetrics
 
 class Stats:
-    def __init__(self):
+    def __init__(self, instrument: bool = True):
+        # lock hanya untuk mendaftarkan topic/stage baru, bukan untuk setiap increment
         self.lock = threading.Lock()
+        # instrument=False mematikan semua pengukuran latency (tanpa perf_counter di hot path)
+        self.instrument = instrument
         self.start_time = time.time()
-        self.data = {
-            "received": 0,
-            "unique_processed": 0,
-            "duplicate_dropped": 0
+        self.received = ShardedCounter()
+        self.unique_processed = ShardedCounter()
+        self.duplicate_dropped = ShardedCounter()
+        self.rate = RollingRate()
+        self.topics: dict[str, TopicMetrics] = {}
+        self.latency = {
+            "publish": Histogram(),
+            "publish_batch": Histogram(),
         }
 
-    def increment_received(self):
-        with self.lock:
-            self.data["received"] += 1
+    def _topic(self, topic: str) -> TopicMetrics:
+        metrics = self.topics.get(topic)
+        if metrics is None:
+            with self.lock:
+                metrics = self.topics.setdefault(topic, TopicMetrics())
+        return metrics
+
+    def increment_received(self, n: int = 1, topic: Optional[str] = None):
+        self.received.inc(n)
+        self.rate.add(n)
+        if topic is not None:
+            metrics = self._topic(topic)
+            metrics.received.inc(n)
+            metrics.rate.add(n)
+
+    def increment_unique(self, n: int = 1, topic: Optional[str] = None):
+        self.unique_processed.inc(n)
+        if topic is not None:
+            self._topic(topic).unique.inc(n)
 
-    def increment_unique(self):
-        with self.lock:
-            self.data["unique_processed"] += 1
+    def increment_duplicates(self, n: int = 1, topic: Optional[str] = None):
+        self.duplicate_dropped.inc(n)
+        if topic is not None:
+            self._topic(topic).duplicates.inc(n)
 
-    def increment_duplicates(self):
-        with self.lock:
-            self.data["duplicate_dropped"] += 1
+    def record_topic(self, topic: str, received: int, unique: int, duplicates: int):
+        """Update counter per topic saja (counter global sudah di-increment per batch)"""
+        metrics = self._topic(topic)
+        metrics.received.inc(received)
+        metrics.rate.add(received)
+        if unique:
+            metrics.unique.inc(unique)
+        if duplicates:
+            metrics.duplicates.inc(duplicates)
+
+    def observe_latency(self, stage: str, seconds: float):
+        histogram = self.latency.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.latency.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+
+    def counter_snapshot(self) -> dict[str, tuple]:
+        """Counter kumulatif {topic ("" = global): (received, unique, duplicates)}"""
+        snapshot = {"": (self.received.value, self.unique_processed.value, self.duplicate_dropped.value)}
+        for topic, m in list(self.topics.items()):
+            snapshot[topic] = (m.received.value, m.unique.value, m.duplicates.value)
+        return snapshot
 
     def get_stats(self):
-        with self.lock:
-            uptime = time.time() - self.start_time
-            return {
-                "received": self.data["received"],
-                "unique_processed": self.data["unique_processed"],
-                "duplicate_dropped": self.data["duplicate_dropped"],
-                "uptime": round(uptime, 2)
-            }
+        uptime = time.time() - self.start_time
+        return {
+            "received": self.received.value,
+            "unique_processed": self.unique_processed.value,
+            "duplicate_dropped": self.duplicate_dropped.value,
+            "uptime": round(uptime, 2),
+            "rates": {
+                "rate_1m": round(self.rate.rate(60), 3),
+                "rate_5m": round(self.rate.rate(300), 3),
+            },
+            "latency": {stage: h.summary() for stage, h in list(self.latency.items())},
+            "per_topic": {topic: m.snapshot() for topic, m in list(self.topics.items())},
+        }
@@ -0,0 +1,243 @@
+import asyncio
+import itertools
+import logging
+from collections import deque
+from typing import Iterable, Optional, Union
+
+from .fast_ingest import dumps
+
+logger = logging.getLogger("EventAggregator")
+
+WILDCARD = "*"
+# drop_oldest: buang event tertua, kirim {"type": "gap"} di depan sisa buffer
+# disconnect : tutup subscription saat buffer penuh
+# pause      : berhenti menerima event baru sampai buffer terkuras setengah, lalu kirim gap
+POLICIES = ("drop_oldest", "disconnect", "pause")
+
+# item buffer: bytes = event JSON, dict = pesan kontrol ({"type": "gap", "missed": n})
+Message = Union[bytes, dict]
+
+
+class SubscriptionClosed(Exception):
+    """Subscription sudah ditutup (overflow / shutdown) dan buffer-nya sudah habis dibaca"""
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+def parse_filters(filters: Iterable[str]) -> tuple[frozenset, frozenset, bool]:
+    """
+    Filter topic: "a.b" (persis), "a.*" (prefix "a."), "*" (semua).
+    Return (exact, prefixes, match_all).
+    """
+    exact, prefixes, match_all = set(), set(), False
+    for item in filter(None, (f.strip() for f in filters)):
+        if item == WILDCARD:
+            match_all = True
+        elif item.endswith(".*"):
+            prefixes.add(item[:-1])
+        elif "*" in item:
+            raise ValueError(f"Unsupported topic filter: {item!r} (use 'a.b', 'a.*' or '*')")
+        else:
+            exact.add(item)
+    if not exact and not prefixes:
+        match_all = True
+    return frozenset(exact), frozenset(prefixes), match_all
+
+
+class Subscription:
+    """Buffer terbatas milik satu client; diisi worker loop tanpa pernah menunggu client"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, filters: Iterable[str], buffer_size: int = 1000, policy: str = "drop_oldest"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy!r} (expected one of {', '.join(POLICIES)})")
+        self.id = next(self._ids)
+        self.exact, self.prefixes, self.match_all = parse_filters(filters)
+        self.buffer_size = max(1, buffer_size)
+        self.policy = policy
+        self.buffer: deque[Message] = deque()
+        self.closed_reason: Optional[str] = None
+        self.paused = False
+        self._dropped = 0  # drop_oldest: event hilang sebelum isi buffer saat ini
+        self._missed = 0   # pause: event hilang setelah isi buffer saat ini
+        self._wakeup = asyncio.Event()
+        self.stats = {"delivered": 0, "dropped": 0}
+
+    @property
+    def closed(self) -> bool:
+        return self.closed_reason is not None
+
+    def offer(self, data: bytes) -> bool:
+        """Masukkan satu event; return False jika subscription harus ditutup (policy disconnect)"""
+        if self.closed:
+            return False
+        if self.paused:
+            self._missed += 1
+            self.stats["dropped"] += 1
+            return True
+        if len(self.buffer) >= self.buffer_size:
+            self.stats["dropped"] += 1
+            if self.policy == "disconnect":
+                self.close("overflow")
+                return False
+            if self.policy == "pause":
+                self.paused = True
+                self._missed += 1
+                return True
+            self.buffer.popleft()
+            self._dropped += 1
+        self.buffer.append(data)
+        self._wakeup.set()
+        return True
+
+    def close(self, reason: str):
+        if self.closed_reason is None:
+            self.closed_reason = reason
+            self._wakeup.set()
+
+    async def get(self, max_items: int = 100, timeout: Optional[float] = None) -> list[Message]:
+        """
+        Ambil sampai max_items pesan; tunggu jika buffer kosong (list kosong jika timeout,
+        untuk heartbeat). SubscriptionClosed jika sudah ditutup dan buffer habis.
+        """
+        if not self.buffer and not self._dropped and not self.closed:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        messages: list[Message] = []
+        if self._dropped:
+            messages.append({"type": "gap", "missed": self._dropped})
+            self._dropped = 0
+        while self.buffer and len(messages) < max_items:
+            messages.append(self.buffer.popleft())
+        if self.paused and len(self.buffer) <= self.buffer_size // 2:
+            # lanjut menerima; gap ditempatkan setelah event yang sudah ter-buffer
+            self.paused = False
+            self.buffer.append({"type": "gap", "missed": self._missed})
+            self._missed = 0
+        if not messages and self.closed:
+            raise SubscriptionClosed(self.closed_reason)
+        self.stats["delivered"] += sum(1 for m in messages if type(m) is bytes)
+        return messages
+
+    def get_stats(self) -> dict:
+        return {
+            "id": self.id,
+            "filters": sorted(self.exact) + sorted(p + "*" for p in self.prefixes)
+                       + ([WILDCARD] if self.match_all else []),
+            "policy": self.policy,
+            "buffered": len(self.buffer),
+            "paused": self.paused,
+            **self.stats,
+        }
+
+
+class SubscriptionManager:
+    """
+    Fan-out event yang selesai diproses ke subscriber (dipasang sebagai handler "*"
+    EventProcessor). Subscriber di-index per topic persis, per prefix, dan "semua",
+    jadi biaya per event = kedalaman topic + jumlah subscriber yang cocok,
+    bukan jumlah seluruh subscriber. Event di-serialize sekali per event, bukan per subscriber.
+    """
+
+    def __init__(self, buffer_size: int = 1000, policy: str = "drop_oldest", max_subscribers: int = 1000):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy!r} (expected one of {', '.join(POLICIES)})")
+        self.buffer_size = buffer_size
+        self.policy = policy
+        self.max_subscribers = max_subscribers
+        self.subscribers: dict[int, Subscription] = {}
+        self._exact: dict[str, set[Subscription]] = {}
+        self._prefix: dict[str, set[Subscription]] = {}
+        self._all: set[Subscription] = set()
+        self.stats = {"published": 0, "deliveries": 0, "disconnected": 0}
+
+    def subscribe(self, filters: Iterable[str], buffer_size: Optional[int] = None,
+                  policy: Optional[str] = None) -> Subscription:
+        if self.max_subscribers and len(self.subscribers) >= self.max_subscribers:
+            raise TooManySubscribers(f"Subscriber limit reached ({self.max_subscribers})")
+        sub = Subscription(filters, buffer_size or self.buffer_size, policy or self.policy)
+        self.subscribers[sub.id] = sub
+        for topic in sub.exact:
+            self._exact.setdefault(topic, set()).add(sub)
+        for prefix in sub.prefixes:
+            self._prefix.setdefault(prefix, set()).add(sub)
+        if sub.match_all:
+            self._all.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        if self.subscribers.pop(sub.id, None) is None:
+            return
+        for index, keys in ((self._exact, sub.exact), (self._prefix, sub.prefixes)):
+            for key in keys:
+                subs = index.get(key)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del index[key]
+        self._all.discard(sub)
+        sub.close(sub.closed_reason or "unsubscribed")
+
+    def matching(self, topic: str) -> set[Subscription]:
+        subs = set(self._all)
+        exact = self._exact.get(topic)
+        if exact:
+            subs |= exact
+        if self._prefix:
+            # "a.b.c" -> prefix "a." dan "a.b."
+            end = topic.find(".")
+            while end != -1:
+                prefixed = self._prefix.get(topic[:end + 1])
+                if prefixed:
+                    subs |= prefixed
+                end = topic.find(".", end + 1)
+        return subs
+
+    async def handle_events(self, events: list):
+        """Handler EventProcessor: tidak pernah menunggu subscriber (buffer terbatas)"""
+        if not self.subscribers:
+            return
+        matches: dict[str, set[Subscription]] = {}
+        for event in events:
+            subs = matches.get(event.topic)
+            if subs is None:
+                subs = matches[event.topic] = self.matching(event.topic)
+            if not subs:
+                continue
+            data = dumps({"topic": event.topic, "event_id": event.event_id, "timestamp": event.timestamp,
+                          "source": event.source, "payload": event.payload})
+            self.stats["published"] += 1
+            for sub in list(subs):
+                if sub.offer(data):
+                    self.stats["deliveries"] += 1
+                else:
+                    subs.discard(sub)
+                    self.stats["disconnected"] += 1
+                    logger.warning(f"Subscriber {sub.id} disconnected: buffer overflow")
+                    self.unsubscribe(sub)
+
+    def close_all(self, reason: str = "shutdown"):
+        for sub in list(self.subscribers.values()):
+            sub.close(reason)
+            self.unsubscribe(sub)
+
+    def get_stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "buffered": sum(len(sub.buffer) for sub in list(self.subscribers.values())),
+            "dropped": sum(sub.stats["dropped"] for sub in list(self.subscribers.values())),
+            **self.stats,
+        }
+
+
+def encode_sse(message: Message) -> str:
+    """Satu pesan -> frame Server-Sent Events (event biasa tanpa nama, kontrol dengan `event:`)"""
+    if type(message) is bytes:
+        return f"data: {message.decode()}\n\n"
+    return f"event: {message['type']}\ndata: {dumps(message).decode()}\n\n"
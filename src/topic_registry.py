@@ -0,0 +1,59 @@
+import time
+from typing import Optional
+
+
+def utc_now() -> str:
+    """Format sama dengan CURRENT_TIMESTAMP SQLite (processed_at)"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+
+
+class TopicRegistry:
+    """
+    Salinan in-memory tabel `topics`: jumlah event tersimpan + first/last seen per topic.
+    Ditulis hanya oleh thread writer setelah commit; pembaca mengambil snapshot,
+    jadi /stats dan /topics O(jumlah topic), bukan O(jumlah event).
+    """
+
+    def __init__(self):
+        # topic -> [event_count, first_seen, last_seen]
+        self._topics: dict[str, list] = {}
+
+    def load(self, rows):
+        self._topics = {topic: [count, first, last] for topic, count, first, last in rows}
+
+    def record(self, counts: dict[str, int], now: str):
+        for topic, n in counts.items():
+            entry = self._topics.get(topic)
+            if entry is None:
+                self._topics[topic] = [n, now, now]
+            else:
+                entry[0] += n
+                entry[2] = now
+
+    def forget(self, counts: dict[str, int]):
+        """Kurangi count setelah retention; topic tanpa event dihapus dari registry"""
+        for topic, n in counts.items():
+            entry = self._topics.get(topic)
+            if entry is None:
+                continue
+            entry[0] -= n
+            if entry[0] <= 0:
+                del self._topics[topic]
+
+    def topics(self) -> list[str]:
+        return list(self._topics)
+
+    def get(self, topic: str) -> Optional[dict]:
+        entry = self._topics.get(topic)
+        return _as_dict(topic, entry) if entry is not None else None
+
+    def snapshot(self) -> list[dict]:
+        return [_as_dict(topic, entry) for topic, entry in list(self._topics.items())]
+
+    def clear(self):
+        self._topics.clear()
+
+
+def _as_dict(topic: str, entry: list) -> dict:
+    count, first_seen, last_seen = entry
+    return {"topic": topic, "event_count": count, "first_seen": first_seen, "last_seen": last_seen}
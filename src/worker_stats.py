@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import os
+import socket
+from typing import Optional
+
+from .async_store import AsyncDedupStore
+from .stats import Stats
+
+logger = logging.getLogger("EventAggregator")
+
+
+def default_run_id() -> str:
+    """
+    Identitas satu deployment: worker uvicorn --workers N punya parent (supervisor) yang sama.
+    AGGREGATOR_RUN_ID bisa di-set eksplisit jika parent tidak stabil (mis. container restart).
+    """
+    return os.getenv("AGGREGATOR_RUN_ID") or f"ppid-{os.getppid()}"
+
+
+class WorkerStatsSync:
+    """
+    Mode multi-process: setiap worker menulis counter kumulatifnya ke tabel worker_stats
+    secara berkala; /stats dan /metrics menjumlahkan semua worker di run yang sama.
+    Counter worker lain bisa tertinggal maksimal interval_seconds; counter worker ini
+    di-flush dulu sebelum dibaca.
+    """
+
+    def __init__(self, storage: AsyncDedupStore, stats: Stats, run_id: Optional[str] = None,
+                 worker_id: Optional[str] = None, interval_seconds: float = 1.0):
+        self.storage = storage
+        self.stats = stats
+        self.run_id = run_id or default_run_id()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Worker stats flush failed: {e}")
+
+    async def flush(self):
+        await self.storage.save_worker_stats(self.run_id, self.worker_id, self.stats.counter_snapshot())
+
+    async def aggregated(self) -> dict:
+        """get_stats() lokal dengan counter diganti total semua worker"""
+        await self.flush()
+        totals = await self.storage.load_worker_stats(self.run_id)
+        data = self.stats.get_stats()
+        received, unique, duplicates = totals.get("", (0, 0, 0))
+        data.update(received=received, unique_processed=unique, duplicate_dropped=duplicates)
+        per_topic = {}
+        for topic, (received, unique, duplicates) in totals.items():
+            if not topic:
+                continue
+            # rate per topic tetap lokal worker ini
+            local = data["per_topic"].get(topic, {"rate_1m": 0.0, "rate_5m": 0.0})
+            per_topic[topic] = {**local, "received": received, "unique_processed": unique,
+                                "duplicate_dropped": duplicates}
+        data["per_topic"] = per_topic
+        return data
@@ -0,0 +1,79 @@
+import pytest
+
+from src.admission import AdmissionController, Rejected, TokenBucket
+
+
+def test_token_bucket_refill_and_wait_time():
+    """Test bucket terisi ulang sesuai rate dan tidak melebihi burst"""
+    bucket = TokenBucket(rate=10, burst=5, now=0.0)
+    bucket.tokens = 0
+    bucket.refill(0.2)
+    assert bucket.tokens == pytest.approx(2)
+    assert bucket.wait_time(4) == pytest.approx(0.2)
+    bucket.refill(100.0)
+    assert bucket.tokens == 5
+
+
+def test_queue_watermark_rejects():
+    """Test queue di atas high watermark ditolak dengan reason queue_full"""
+    fill = [0.5]
+    controller = AdmissionController(lambda: fill[0], high_watermark=0.8, retry_after_seconds=2)
+    controller.check_queue()
+    fill[0] = 0.8
+    with pytest.raises(Rejected) as exc:
+        controller.check_queue()
+    assert exc.value.reason == "queue_full"
+    assert exc.value.retry_after == 2
+    assert controller.get_stats()["rejected"]["queue_full"] == 1
+
+
+def test_watermark_zero_disables_queue_check():
+    controller = AdmissionController(lambda: 1.0, high_watermark=0)
+    controller.check_queue()
+
+
+def test_source_rate_limit_per_source():
+    """Test token bucket per source: source lain tidak ikut terkena limit"""
+    controller = AdmissionController(lambda: 0.0, source_rate=2, source_burst=3)
+    controller.acquire({"a": 3}, now=0.0)
+    with pytest.raises(Rejected) as exc:
+        controller.acquire({"a": 1}, now=0.0)
+    assert exc.value.reason == "rate_limited"
+    assert exc.value.retry_after == 1
+    controller.acquire({"b": 3}, now=0.0)
+    # setelah 0.5 detik "a" punya 1 token lagi
+    controller.acquire({"a": 1}, now=0.5)
+
+
+def test_batch_is_all_or_nothing():
+    """Test batch multi-source ditolak utuh tanpa memakan token source lain"""
+    controller = AdmissionController(lambda: 0.0, source_rate=1, source_burst=2)
+    controller.acquire({"a": 2}, now=0.0)
+    with pytest.raises(Rejected):
+        controller.acquire({"a": 1, "b": 2}, now=0.0)
+    controller.acquire({"b": 2}, now=0.0)
+    assert controller.admitted == 2
+
+
+def test_batches_are_charged_in_full():
+    """Test batch lebih besar dari burst tetap dibayar penuh (tidak bisa melewati rate limit)"""
+    controller = AdmissionController(lambda: 0.0, source_rate=10, source_burst=100)
+    controller.acquire({"a": 1000}, now=0.0)
+    # saldo -900: bucket baru penuh lagi setelah (900 + 100) / 10 detik
+    with pytest.raises(Rejected) as exc:
+        controller.acquire({"a": 1000}, now=40.0)
+    assert exc.value.retry_after == 60
+    controller.acquire({"a": 1000}, now=100.0)
+    assert controller.admitted == 2
+
+
+@pytest.mark.asyncio
+async def test_throttle_waits_instead_of_rejecting():
+    """Test /publish/stream ditahan sampai token cukup, tanpa menambah counter rejected"""
+    controller = AdmissionController(lambda: 0.0, source_rate=100, source_burst=5)
+    await controller.throttle({"a": 5})
+    await controller.throttle({"a": 5})
+    stats = controller.get_stats()
+    assert stats["throttled"]["waits"] == 1
+    assert stats["throttled"]["seconds"] >= 0.04
+    assert stats["rejected"]["rate_limited"] == 0
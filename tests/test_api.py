@@ -2,8 +2,10 @@
 import pytest
 from httpx import AsyncClient
 from src.models import Event
+from src.config import Config
 from src.main import create_app
 
+
 @pytest.mark.asyncio
 async def test_publish_single_event():
     # ✅ Pakai in-memory DB untuk test
@@ -23,6 +25,7 @@ async def test_publish_single_event():
         assert data["duplicates"] == 0
         assert data["received"] == 1
 
+
 @pytest.mark.asyncio
 async def test_publish_duplicate_event():
     # ✅ Pakai in-memory DB untuk test
@@ -48,4 +51,202 @@ async def test_publish_duplicate_event():
         data2 = r2.json()
         assert r2.status_code == 200
         assert data2["processed"] == 0
-        assert data2["duplicates"] == 1
\ No newline at end of file
+        assert data2["duplicates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_publish_batch_counts():
+    import uuid
+    app = create_app(db_path=None)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        ids = [str(uuid.uuid4()) for _ in range(3)]
+        events = [
+            {"topic": "batch", "event_id": eid, "timestamp": "2025-10-23T19:00:00Z",
+             "source": "pytest", "payload": {"i": i}}
+            for i, eid in enumerate(ids + ids[:1])
+        ]
+        response = await client.post("/publish", json={"events": events})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["received"] == 4
+        assert data["processed"] == 3
+        assert data["duplicates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_events_pagination_and_ndjson(tmp_path):
+    import json
+    app = create_app(db_path=str(tmp_path / "events.db"))
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        events = [
+            {"topic": "page", "event_id": f"evt-{i}", "timestamp": "2025-10-23T19:00:00Z",
+             "source": "pytest", "payload": {"i": i}}
+            for i in range(5)
+        ]
+        await client.post("/publish", json={"events": events})
+
+        r1 = (await client.get("/events", params={"limit": 3})).json()
+        r2 = (await client.get("/events", params={"limit": 3, "after": r1["next_after"]})).json()
+        assert [e["event_id"] for e in r1["events"] + r2["events"]] == [f"evt-{i}" for i in range(5)]
+        assert r2["count"] == 2
+
+        response = await client.get("/events", params={"format": "ndjson", "topic": "page"})
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["payload"]["i"] for line in lines] == list(range(5))
+    app.state.event_processor.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_prometheus_format(tmp_path):
+    app = create_app(db_path=str(tmp_path / "events.db"))
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        event = {"topic": "m", "event_id": "evt-1", "timestamp": "2025-10-23T19:00:00Z",
+                 "source": "pytest", "payload": {}}
+        await client.post("/publish", json=event)
+        await client.post("/publish", json=event)
+
+        response = await client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'aggregator_events_duplicate_total{topic="m"} 1' in body
+        for stage in ("request", "parse_validate", "dedup_probe", "store", "queue_put"):
+            assert f'aggregator_stage_duration_seconds_count{{stage="{stage}"}}' in body
+        assert 'aggregator_sqlite_connection_wait_seconds_bucket{kind="writer",le="+Inf"}' in body
+        assert "aggregator_db_file_size_bytes" in body
+        assert "aggregator_queue_depth 1" in body
+    app.state.event_processor.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_publish_rejected_when_queue_saturated(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "QUEUE_SIZE", 2)
+    app = create_app(db_path=str(tmp_path / "events.db"))
+    # tanpa lifespan worker tidak jalan, jadi queue terisi dan tidak pernah dikosongkan
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        def event(i):
+            return {"topic": "q", "event_id": f"evt-{i}", "timestamp": "2025-10-23T19:00:00Z",
+                    "source": "pytest", "payload": {}}
+        for i in range(2):
+            assert (await client.post("/publish", json=event(i))).status_code == 200
+
+        response = await client.post("/publish", json=event(2))
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+
+        # event yang ditolak tidak dihitung diterima
+        stats = (await client.get("/stats")).json()
+        assert stats["received"] == 2
+        assert stats["admission"]["rejected"]["queue_full"] == 1
+        assert 'aggregator_admission_rejected_total{reason="queue_full"} 1' in (await client.get("/metrics")).text
+    app.state.event_processor.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_publish_fast_batch(tmp_path):
+    app = create_app(db_path=str(tmp_path / "events.db"))
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        events = [{"topic": "fast", "event_id": f"evt-{i % 3}", "timestamp": "2025-10-23T19:00:00Z",
+                   "source": "pytest", "payload": {"i": i}} for i in range(4)]
+        events.append({"topic": "", "event_id": "bad", "timestamp": "t", "source": "pytest"})
+        response = await client.post("/publish/fast", json={"events": events})
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["received"], data["processed"], data["duplicates"]) == (4, 3, 1)
+        assert data["rejected"] == 1
+        assert data["errors"] == [{"index": 4, "field": "topic", "error": "must not be empty"}]
+
+        response = await client.get("/events", params={"topic": "fast"})
+        assert [e["payload"]["i"] for e in response.json()["events"]] == [0, 1, 2]
+
+        assert (await client.post("/publish/fast", content=b"{oops")).status_code == 400
+    app.state.event_processor.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_publish_stream_gzip_ndjson(tmp_path):
+    import gzip
+    import json
+    app = create_app(db_path=str(tmp_path / "events.db"))
+    lines = [json.dumps({"topic": "bulk", "event_id": f"evt-{i % 50}", "timestamp": "2025-10-23T19:00:00Z",
+                         "source": "pytest", "payload": {"i": i}}) for i in range(60)]
+    body = gzip.compress(("\n".join(lines) + "\n").encode())
+
+    async def upload():
+        for start in range(0, len(body), 100):
+            yield body[start:start + 100]
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/publish/stream", content=upload(),
+                                     headers={"Content-Encoding": "gzip",
+                                              "Content-Type": "application/x-ndjson"})
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["received"], data["processed"], data["duplicates"], data["rejected"]) == (60, 50, 10, 0)
+
+        response = await client.post("/publish/stream", content=b"x", headers={"Content-Encoding": "br"})
+        assert response.status_code == 415
+    app.state.event_processor.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_topics_endpoint(tmp_path):
+    app = create_app(db_path=str(tmp_path / "topics.db"))
+    events = [{"topic": f"topic.{i % 2}", "event_id": f"t-{i}", "timestamp": "2025-10-23T19:00:00Z",
+               "source": "pytest", "payload": {}} for i in range(5)]
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.post("/publish", json={"events": events + events[:2]})
+        data = (await client.get("/topics")).json()
+        assert data["count"] == 2
+        assert [(t["topic"], t["event_count"]) for t in data["topics"]] == [("topic.0", 3), ("topic.1", 2)]
+        assert (await client.get("/stats")).json()["topics"] == ["topic.0", "topic.1"]
+        assert (await client.get("/topics", params={"topic": "missing"})).status_code == 404
+    app.state.event_processor.storage.close()
+
+
+def test_subscribe_websocket_receives_matching_events(tmp_path):
+    from starlette.testclient import TestClient
+
+    app = create_app(db_path=str(tmp_path / "subscribe.db"))
+    events = [{"topic": topic, "event_id": f"ws-{i}", "timestamp": "2025-10-23T19:00:00Z", "source": "pytest"}
+              for i, topic in enumerate(["orders.created", "users.signup", "orders.paid"])]
+    with TestClient(app) as client:
+        with client.websocket_connect("/subscribe/ws?topic=orders.*") as ws:
+            client.post("/publish", json={"events": events})
+            received = [ws.receive_json()["event_id"] for _ in range(2)]
+            assert sorted(received) == ["ws-0", "ws-2"]
+            assert client.get("/stats").json()["subscriptions"]["subscribers"] == 1
+        assert client.get("/subscribe/sse", params={"policy": "block"}).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_consume_long_poll_and_commit(tmp_path):
+    import asyncio
+
+    app = create_app(db_path=str(tmp_path / "consume.db"))
+    await app.state.event_processor.start()
+    events = [{"topic": "orders", "event_id": f"c-{i}", "timestamp": "2025-10-23T19:00:00Z",
+               "source": "pytest", "payload": {"i": i}} for i in range(3)]
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.post("/publish", json={"events": events})
+        data = (await client.get("/consume", params={"group": "g", "topic": "orders", "max": 2})).json()
+        assert [e["payload"]["i"] for e in data["events"]] == [0, 1]
+        assert (data["offset"], data["next_offset"]) == (0, 2)
+        # tanpa commit, batch yang sama dikirim ulang
+        again = (await client.get("/consume", params={"group": "g", "topic": "orders", "max": 2})).json()
+        assert again["events"] == data["events"]
+
+        await client.post("/consume/commit", json={"group": "g", "topic": "orders", "offset": 3})
+        poll = asyncio.create_task(client.get("/consume", params={"group": "g", "topic": "orders",
+                                                                   "wait_ms": 5000}))
+        await asyncio.sleep(0.1)
+        assert not poll.done()
+        await client.post("/publish", json={**events[0], "event_id": "c-3", "payload": {"i": 3}})
+        data = (await asyncio.wait_for(poll, 2)).json()
+        assert [(e["offset"], e["event_id"]) for e in data["events"]] == [(4, "c-3")]
+
+        empty = (await client.get("/consume", params={"group": "g2", "topic": "none", "wait_ms": 50})).json()
+        assert empty["events"] == [] and empty["next_offset"] == 0
+    await app.state.event_processor.stop()
+    app.state.event_processor.storage.close()
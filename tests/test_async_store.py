@@ -0,0 +1,80 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+from src.async_store import AsyncDedupStore
+from src.bloom import BloomPrefilter
+from src.dedup_store import DedupStore
+
+
+@pytest.fixture
+def storage():
+    temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+    temp_db.close()
+    facade = AsyncDedupStore(DedupStore(temp_db.name))
+    yield facade
+    facade.close()
+    os.unlink(temp_db.name)
+
+
+@pytest.mark.asyncio
+async def test_writes_run_off_event_loop(storage):
+    """Test that a slow write does not stall other coroutines"""
+    loop_thread = threading.get_ident()
+    seen_threads = []
+    original = storage.dedup_store.store_event
+
+    def slow_store_event(*args):
+        seen_threads.append(threading.get_ident())
+        time.sleep(0.2)
+        return original(*args)
+
+    storage.dedup_store.store_event = slow_store_event
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    stored = await storage.store_event("t", "evt-1", "2025-10-22T10:00:00Z", "test", "{}")
+    ticker_task.cancel()
+
+    assert stored is True
+    assert seen_threads and seen_threads[0] != loop_thread
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_reads_see_committed_writes(storage):
+    """Test the async read path returns what the writer thread committed"""
+    await storage.store_events([("t", "evt-1", "2025-10-22T10:00:00Z", "test", "{}")])
+    storage.dedup_store.store.clear()  # paksa lookup ke SQLite
+
+    assert await storage.is_duplicate("t", "evt-1") is True
+    assert await storage.get_all_topics() == ["t"]
+    assert len(await storage.get_events("t")) == 1
+
+
+@pytest.mark.asyncio
+async def test_prefilter_skip_counted_once_per_event():
+    """Test probe Bloom di loop + store_event di writer tidak menghitung skipped dua kali"""
+    temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+    temp_db.close()
+    facade = AsyncDedupStore(DedupStore(temp_db.name, prefilter=BloomPrefilter(capacity=1000, fp_rate=0.01)))
+    prefilter = facade.dedup_store.prefilter
+
+    assert await facade.is_duplicate("t", "evt-1") is False
+    assert await facade.store_event("t", "evt-1", "2025-10-22T10:00:00Z", "test", "{}") is True
+    assert (prefilter.skipped, prefilter.maybe) == (1, 0)
+    assert await facade.store_events([("t", "evt-2", "2025-10-22T10:00:00Z", "test", "{}")]) == [True]
+    assert (prefilter.skipped, prefilter.maybe) == (2, 0)
+    facade.close()
+    os.unlink(temp_db.name)
@@ -0,0 +1,92 @@
+import os
+import tempfile
+
+import pytest
+
+from src.bloom import BloomFilter, BloomPrefilter
+from src.dedup_store import DedupStore
+
+
+@pytest.fixture
+def db_path():
+    temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+    temp_db.close()
+    yield temp_db.name
+    for path in (temp_db.name, temp_db.name + ".bloom"):
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def test_bloom_has_no_false_negatives():
+    """Test that every added key is reported as maybe-present"""
+    bloom = BloomFilter(capacity=1000, fp_rate=0.01)
+    keys = [f"evt-{i}".encode() for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(bloom.might_contain(key) for key in keys)
+
+    false_positives = sum(bloom.might_contain(f"other-{i}".encode()) for i in range(5000))
+    assert false_positives / 5000 < 0.03
+    assert 0 < bloom.fill_ratio() < 1
+
+
+@pytest.mark.parametrize("scope", ["global", "topic"])
+def test_prefilter_skips_sqlite_for_new_events(db_path, scope):
+    """Test that definite misses skip the SQLite probe and hits still resolve"""
+    store = DedupStore(db_path, prefilter=BloomPrefilter(capacity=1000, fp_rate=0.01, scope=scope))
+    store.store_event("t", "evt-1", "2025-10-22T10:00:00Z", "test", '{}')
+    store.store.clear()
+
+    assert store.is_duplicate("t", "evt-2") is False
+    assert store.is_duplicate("t", "evt-1") is True
+    stats = store.get_prefilter_stats()
+    assert stats["probes_skipped"] >= 1
+    assert stats["entries"] == 1
+    store.close()
+
+
+def test_prefilter_rebuilt_from_table_on_restart(db_path):
+    """Test that the filter is rebuilt from processed_events at startup"""
+    store1 = DedupStore(db_path)
+    store1.store_events([("t", f"evt-{i}", "2025-10-22T10:00:00Z", "test", '{}') for i in range(10)])
+    store1.close()
+
+    store2 = DedupStore(db_path, prefilter=BloomPrefilter(capacity=1000, fp_rate=0.01))
+    assert store2.prefilter.max_seq == 10
+    assert all(store2.prefilter.might_contain("t", f"evt-{i}") for i in range(10))
+    assert store2.store_events([("t", "evt-3", "2025-10-22T10:00:00Z", "test", '{}')]) == [False]
+    store2.close()
+
+
+def test_prefilter_snapshot_roundtrip_with_catch_up(db_path):
+    """Test snapshot load plus catch-up of rows written after the snapshot"""
+    snapshot = db_path + ".bloom"
+    store1 = DedupStore(db_path, prefilter=BloomPrefilter(capacity=1000, fp_rate=0.01),
+                        prefilter_snapshot=snapshot)
+    store1.store_event("t", "evt-1", "2025-10-22T10:00:00Z", "test", '{}')
+    store1.close()
+
+    # row ditulis tanpa prefilter (mis. proses lain) setelah snapshot dibuat
+    plain = DedupStore(db_path)
+    plain.store_event("t", "evt-2", "2025-10-22T10:00:00Z", "test", '{}')
+    plain.close()
+
+    store2 = DedupStore(db_path, prefilter=BloomPrefilter(capacity=1000, fp_rate=0.01),
+                        prefilter_snapshot=snapshot)
+    assert store2.prefilter.might_contain("t", "evt-1")
+    assert store2.prefilter.might_contain("t", "evt-2")
+    store2.close()
+
+
+def test_stale_prefilter_does_not_accept_duplicates(db_path):
+    """Test that a false negative from the filter is caught by the insert"""
+    store = DedupStore(db_path, prefilter=BloomPrefilter(capacity=1000, fp_rate=0.01))
+    store.store_event("t", "evt-1", "2025-10-22T10:00:00Z", "test", '{}')
+    store.store.clear()
+    store.prefilter.filters.clear()  # simulasi filter basi
+
+    rows = [("t", "evt-1", "2025-10-22T10:00:00Z", "test", '{}'),
+            ("t", "evt-2", "2025-10-22T10:00:00Z", "test", '{}')]
+    assert store.store_events(rows) == [False, True]
+    assert len(store.get_events("t")) == 2
+    store.close()
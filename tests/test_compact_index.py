@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+import pytest
+
+from src.compact_index import CompactEventIndex
+from src.dedup_store import DedupStore
+
+
+@pytest.fixture
+def index_path():
+    path = os.path.join(tempfile.mkdtemp(), "events.idx")
+    yield path
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+@pytest.mark.parametrize("bits", [64, 128])
+def test_index_add_and_contains_across_growth(bits):
+    """Test exact membership while the table grows several times"""
+    index = CompactEventIndex(digest_bits=bits, initial_capacity=8)
+    for i in range(2000):
+        assert index.add(f"topic.{i % 3}", f"evt-{i}") is True
+    assert index.add("topic.0", "evt-0") is False
+    assert all(index.contains(f"topic.{i % 3}", f"evt-{i}") for i in range(2000))
+    assert not index.contains("topic.1", "evt-0")
+    assert len(index) == 2000
+    assert sorted(index.topics()) == ["topic.0", "topic.1", "topic.2"]
+
+
+def test_index_save_and_mmap_load(index_path):
+    """Test flat-file roundtrip with memory-mapped load and copy-on-write"""
+    index = CompactEventIndex()
+    for i in range(100):
+        index.add("t", f"evt-{i}")
+    index.save(index_path)
+
+    loaded = CompactEventIndex.load(index_path)
+    assert loaded.get_stats()["mmapped"] is True
+    assert loaded.contains("t", "evt-42")
+    assert loaded.add("t", "evt-new") is True
+    assert loaded.get_stats()["mmapped"] is False
+    assert loaded.contains("t", "evt-42") and loaded.contains("t", "evt-new")
+    assert len(loaded) == 101
+
+
+def test_dedup_store_in_memory_with_index(index_path):
+    """Test DedupStore in-memory mode backed by the compact index survives restart"""
+    store = DedupStore(None, compact_index=CompactEventIndex(), compact_index_path=index_path)
+    assert store.store_event("t", "evt-1", "2025-10-22T10:00:00Z", "test", '{}') is True
+    assert store.store_events([("t", "evt-1", "", "", "{}"), ("u", "evt-1", "", "", "{}")]) == [False, True]
+    store.close()
+
+    restarted = DedupStore(None, compact_index=CompactEventIndex(), compact_index_path=index_path)
+    assert restarted.is_duplicate("t", "evt-1") is True
+    assert sorted(restarted.get_all_topics()) == ["t", "u"]
+    restarted.close()
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+from src.consumer import ConsumeNotifier
+from src.dedup_store import DedupStore
+from src.fast_ingest import RawEvent
+from src.reshard import reshard
+from src.sharded_store import ShardedDedupStore
+
+
+def make_rows(topic: str, count: int, start: int = 0) -> list[tuple]:
+    return [(topic, f"{topic}-{i}", "2025-10-22T10:00:00Z", "pytest", "{}") for i in range(start, start + count)]
+
+
+@pytest.fixture
+def tmpdir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield tmpdir
+
+
+def test_seq_is_monotonic_and_never_reused(tmpdir):
+    store = DedupStore(db_path=os.path.join(tmpdir, "events.db"))
+    store.store_events(make_rows("a", 3))
+    store.store_event(*make_rows("b", 1)[0])
+    store.store_events(make_rows("a", 3) + make_rows("a", 1, start=3))
+    assert [row[0] for row in store.get_events_after(None, 0, 100)] == [1, 2, 3, 4, 5]
+    assert [row[2] for row in store.get_events_after("a", 2, 100)] == ["a-2", "a-3"]
+
+    # retention mengosongkan tabel: seq baru tetap melanjutkan high-water mark
+    with store.connections.write() as conn:
+        conn.execute("UPDATE processed_events SET processed_at = datetime('now', '-1 hour')")
+    assert store.prune_older_than(60, 100) == 5
+    store.store_events(make_rows("a", 2, start=10))
+    assert [row[0] for row in store.get_events_after("a", 5, 100)] == [6, 7]
+    assert store.get_seq_head() == 7
+    store.close()
+
+
+def test_offsets_per_group_and_topic(tmpdir):
+    path = os.path.join(tmpdir, "events.db")
+    store = DedupStore(db_path=path)
+    store.store_events(make_rows("a", 4))
+    assert store.get_consumer_offset("g1", "a") == 0
+    store.commit_consumer_offset("g1", "a", 3)
+    store.commit_consumer_offset("g1", None, 1)
+    store.close()
+
+    store = DedupStore(db_path=path)
+    assert store.get_consumer_offset("g1", "a") == 3
+    assert store.get_consumer_offset("g1", None) == 1
+    assert store.get_consumer_offset("g2", "a") == 0
+    assert [row[0] for row in store.get_events_after("a", 3, 10)] == [4]
+    # boleh mundur (replay)
+    store.commit_consumer_offset("g1", "a", 0)
+    assert store.get_consumer_offset("g1", "a") == 0
+    store.close()
+
+
+def test_existing_database_without_seq_is_migrated(tmpdir):
+    path = os.path.join(tmpdir, "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE processed_events (
+            topic TEXT NOT NULL, event_id TEXT NOT NULL, timestamp TEXT NOT NULL,
+            source TEXT NOT NULL, payload TEXT NOT NULL,
+            processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (topic, event_id)
+        )
+    """)
+    conn.executemany("INSERT INTO processed_events (topic, event_id, timestamp, source, payload) "
+                     "VALUES (?, ?, ?, ?, ?)", make_rows("old", 3))
+    conn.commit()
+    conn.close()
+
+    store = DedupStore(db_path=path)
+    store.store_events(make_rows("old", 1, start=3))
+    assert [(row[0], row[2]) for row in store.get_events_after("old", 0, 10)] == \
+        [(1, "old-0"), (2, "old-1"), (3, "old-2"), (4, "old-3")]
+    store.close()
+
+
+def test_sharded_consumer_requires_topic_and_reshard_renumbers(tmpdir):
+    store = ShardedDedupStore(os.path.join(tmpdir, "shards"), 3)
+    store.store_events(make_rows("x", 5) + make_rows("y", 2))
+    with pytest.raises(ValueError, match="topic is required"):
+        store.get_events_after(None, 0, 10)
+    store.commit_consumer_offset("g", "x", 2)
+    assert store.get_consumer_offset("g", "x") == 2
+    store.close()
+
+    reshard(os.path.join(tmpdir, "shards"), os.path.join(tmpdir, "s1"), 1)
+    single = ShardedDedupStore(os.path.join(tmpdir, "s1"), 1)
+    x = single.get_events_after("x", 0, 10)
+    assert [row[2] for row in x] == [f"x-{i}" for i in range(5)]
+    assert len({row[0] for row in x + single.get_events_after("y", 0, 10)}) == 7
+    # seq lanjut setelah nilai hasil reshard
+    single.store_events(make_rows("x", 1, start=5))
+    assert single.get_events_after("x", 0, 10)[-1][0] == 8
+    single.close()
+
+
+@pytest.mark.asyncio
+async def test_notifier_wakes_waiting_topic_only():
+    notifier = ConsumeNotifier()
+    orders = notifier.waiter("orders")
+    everything = notifier.waiter(None)
+    users = notifier.waiter("users")
+    waits = [asyncio.create_task(notifier.wait(topic, future, 1))
+             for topic, future in (("orders", orders), (None, everything), ("users", users))]
+    await asyncio.sleep(0)
+
+    await notifier.handle_events([RawEvent("orders", "o-1", "2025-10-22T10:00:00Z", "pytest", {})])
+    assert await waits[0] is True
+    assert await waits[1] is True
+    assert not waits[2].done()
+    notifier.close_all()
+    assert await waits[2] is True
+    assert notifier.closed
+    assert notifier.get_stats() == {"waiting": 0, "wakeups": 2}
+    # waiter yang didaftarkan sebelum event tetap bangun walau wait() dipanggil sesudahnya
+    late = ConsumeNotifier()
+    future = late.waiter("t")
+    await late.handle_events([RawEvent("t", "t-1", "2025-10-22T10:00:00Z", "pytest", {})])
+    assert await late.wait("t", future, 0.01) is True
+    assert await late.wait("t", late.waiter("t"), 0.01) is False
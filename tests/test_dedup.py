@@ -15,6 +15,7 @@ def dedup_store():
     yield store
     
     # Cleanup
+    store.close()
     os.unlink(temp_db.name)
 
 def test_dedup_store_initialization(dedup_store):
@@ -112,4 +113,103 @@ def test_get_all_topics(dedup_store):
     topics = dedup_store.get_all_topics()
     assert len(topics) == 2
     assert "topic1" in topics
-    assert "topic2" in topics
\ No newline at end of file
+    assert "topic2" in topics
+
+def test_connection_manager_uses_wal(dedup_store):
+    """Test that the writer connection runs in WAL mode"""
+    mode = dedup_store.connections.writer.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode.lower() == "wal"
+
+def test_reader_pool_is_read_only(dedup_store):
+    """Test that pooled reader connections cannot write"""
+    import sqlite3
+    with dedup_store.connections.read() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM processed_events")
+
+def test_read_not_blocked_by_writer(dedup_store):
+    """Test that reads proceed while the writer lock is held"""
+    dedup_store.store_event("topic1", "evt-001", "2025-10-22T10:00:00Z", "test", '{}')
+    with dedup_store.connections.write_lock:
+        assert dedup_store.get_events("topic1")[0][1] == "evt-001"
+        assert dedup_store.get_all_topics() == ["topic1"]
+
+def test_store_events_batch(dedup_store):
+    """Test batch insert resolves stored, in-batch and existing duplicates"""
+    dedup_store.store_event("topic1", "evt-001", "2025-10-22T10:00:00Z", "test", '{}')
+    rows = [
+        ("topic1", "evt-001", "2025-10-22T10:00:00Z", "test", '{}'),  # sudah tersimpan
+        ("topic1", "evt-002", "2025-10-22T10:00:00Z", "test", '{}'),
+        ("topic1", "evt-002", "2025-10-22T10:00:00Z", "test", '{}'),  # duplicate di batch
+        ("topic2", "evt-001", "2025-10-22T10:00:00Z", "test", '{}'),
+    ]
+    assert dedup_store.store_events(rows) == [False, True, False, True]
+    assert len(dedup_store.get_events("topic1")) == 2
+    assert len(dedup_store.get_events("topic2")) == 1
+
+def test_store_events_lookup_larger_than_chunk(dedup_store):
+    """Test set-based lookup across multiple IN (...) chunks after restart"""
+    n = dedup_store.LOOKUP_CHUNK * 2 + 5
+    rows = [("bulk", f"evt-{i}", "2025-10-22T10:00:00Z", "test", '{}') for i in range(n)]
+    assert all(dedup_store.store_events(rows))
+
+    dedup_store.store.clear()  # paksa lookup ke SQLite
+    assert not any(dedup_store.store_events(rows))
+
+def test_cache_bounded_falls_back_to_sqlite():
+    """Test that evicted entries are still detected as duplicates via SQLite"""
+    temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+    temp_db.close()
+    store = DedupStore(temp_db.name, cache_max_entries=2)
+    for i in range(5):
+        store.store_event("t", f"evt-{i}", "2025-10-22T10:00:00Z", "test", '{}')
+
+    stats = store.get_cache_stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 3
+    assert store.is_duplicate("t", "evt-0") is True
+    store.close()
+    os.unlink(temp_db.name)
+
+def test_cache_window_expires_entries():
+    """Test time-windowed eviction of the in-memory cache"""
+    from src.dedup_cache import DedupCache
+    cache = DedupCache(window_seconds=0.05)
+    cache.add("t", "evt-1")
+    assert cache.contains("t", "evt-1") is True
+    import time
+    time.sleep(0.1)
+    cache.expire()
+    assert len(cache) == 0
+    assert cache.contains("t", "evt-1") is False
+    assert cache.topics() == []
+
+def test_get_events_page_keyset(dedup_store):
+    """Test keyset pagination by seq, with and without topic filter"""
+    dedup_store.store_events([(f"topic{i % 2}", f"evt-{i}", "", "", '{}') for i in range(5)])
+
+    page1 = dedup_store.get_events_page(limit=2)
+    page2 = dedup_store.get_events_page(after=page1[-1][0], limit=2)
+    assert [row[2] for row in page1 + page2] == ["evt-0", "evt-1", "evt-2", "evt-3"]
+
+    topic0 = list(dedup_store.iter_events("topic0", batch_size=1))
+    assert [row[2] for row in topic0] == ["evt-0", "evt-2", "evt-4"]
+
+def test_cursor_not_reused_after_retention(dedup_store):
+    """Cursor lama tetap melihat event baru walau retention mengosongkan tabel (rowid dipakai ulang)"""
+    dedup_store.store_events([("t", f"old-{i}", "", "", '{}') for i in range(5)])
+    cursor = dedup_store.get_events_page(limit=-1)[-1][0]
+    with dedup_store.connections.write() as conn:
+        conn.execute("UPDATE processed_events SET processed_at = datetime('now', '-1 hour')")
+    assert dedup_store.prune_older_than(60, 100) == 5
+
+    dedup_store.store_events([("t", f"new-{i}", "", "", '{}') for i in range(3)])
+    assert [row[2] for row in dedup_store.get_events_page(after=cursor, limit=10)] == ["new-0", "new-1", "new-2"]
+
+def test_default_cache_bound_only_with_database(dedup_store, monkeypatch):
+    """Test batas cache default tidak berlaku di mode in-memory (dedup tetap exact)"""
+    from src.config import Config
+    monkeypatch.setattr(Config, "DEDUP_CACHE_MAX_ENTRIES", -1)
+    assert DedupStore().get_cache_stats()["max_entries"] == 0
+    assert DedupStore(cache_max_entries=5).get_cache_stats()["max_entries"] == 5
+    assert dedup_store.get_cache_stats()["max_entries"] == DedupStore.DEFAULT_CACHE_MAX_ENTRIES
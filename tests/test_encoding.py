@@ -0,0 +1,24 @@
+import json
+
+from src.encoding import encode_event_row, encode_events_page
+
+
+def test_payload_spliced_verbatim():
+    """Test that the stored payload text is copied byte-for-byte"""
+    payload = '{"b": 1, "a": [1.50, "x"]}'
+    row = (7, 'topic "quoted"', "evt-1", "2025-10-22T10:00:00Z", "src", payload)
+    encoded = encode_event_row(row)
+    assert encoded.endswith(f'"payload":{payload}}}')
+    assert json.loads(encoded) == {
+        "id": 7, "topic": 'topic "quoted"', "event_id": "evt-1",
+        "timestamp": "2025-10-22T10:00:00Z", "source": "src", "payload": {"b": 1, "a": [1.5, "x"]}
+    }
+
+
+def test_events_page_body():
+    rows = [(1, "t", "e1", "", "s", "{}"), (2, "t", "e2", "", "s", '{"k": null}')]
+    body = json.loads(encode_events_page(rows, 2))
+    assert body["count"] == 2
+    assert body["next_after"] == 2
+    assert [e["payload"] for e in body["events"]] == [{}, {"k": None}]
+    assert json.loads(encode_events_page([], 0)) == {"count": 0, "next_after": 0, "events": []}
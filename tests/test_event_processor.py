@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from src.dedup_store import DedupStore
+from src.event_processor import EventProcessor, partition_for
+from src.models import Event
+from src.stats import Stats
+
+
+def make_event(topic: str, event_id: str) -> Event:
+    return Event(
+        topic=topic,
+        event_id=event_id,
+        timestamp="2025-10-22T10:00:00Z",
+        source="pytest",
+        payload={}
+    )
+
+
+@pytest.fixture
+def processor():
+    store = DedupStore()  # in-memory
+    yield EventProcessor(store, Stats(), queue_size=1000, workers=4, worker_batch_size=8)
+    store.close()
+
+
+def test_partition_is_stable():
+    """Test topic yang sama selalu ke partition yang sama"""
+    assert partition_for("orders", 4) == partition_for("orders", 4)
+    assert all(0 <= partition_for(f"t{i}", 4) < 4 for i in range(50))
+
+
+@pytest.mark.asyncio
+async def test_handlers_receive_events_in_order(processor):
+    """Test handler per topic dan wildcard menerima event dengan urutan per topic terjaga"""
+    seen: dict[str, list[str]] = {}
+    wildcard: list[str] = []
+
+    async def on_orders(events):
+        seen.setdefault("orders", []).extend(e.event_id for e in events)
+
+    async def on_any(events):
+        wildcard.extend(e.event_id for e in events)
+
+    processor.register_handler("orders", on_orders)
+    processor.register_handler("*", on_any)
+    await processor.start()
+
+    for i in range(30):
+        await processor.publish(make_event("orders", f"o-{i}"))
+        await processor.publish(make_event(f"other-{i % 5}", f"x-{i}"))
+    await processor.stop()
+
+    assert seen["orders"] == [f"o-{i}" for i in range(30)]
+    assert len(wildcard) == 60
+    assert [e for e in wildcard if e.startswith("o-")] == seen["orders"]
+    assert processor.queue_depth() == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_drains_batches(processor):
+    """Test worker mengambil event yang sudah menunggu sebagai satu batch"""
+    sizes: list[int] = []
+
+    async def on_batch(events):
+        sizes.append(len(events))
+
+    processor.register_handler("bulk", on_batch)
+    # enqueue sebelum worker jalan: semua event sudah menunggu di partition
+    await processor.publish_batch([make_event("bulk", f"b-{i}") for i in range(20)])
+    await processor.start()
+    await processor.stop()
+
+    assert sum(sizes) == 20
+    assert max(sizes) == 8
+
+
+@pytest.mark.asyncio
+async def test_handler_error_does_not_stop_worker(processor):
+    """Test exception di handler tidak menghentikan worker"""
+    received: list[str] = []
+
+    async def failing(events):
+        raise RuntimeError("boom")
+
+    async def recording(events):
+        received.extend(e.event_id for e in events)
+
+    processor.register_handler("t", failing)
+    processor.register_handler("t", recording)
+    await processor.start()
+    await processor.publish(make_event("t", "1"))
+    await asyncio.sleep(0)
+    await processor.publish(make_event("t", "2"))
+    await processor.stop()
+
+    assert received == ["1", "2"]
+
+
+@pytest.mark.asyncio
+async def test_stop_without_events_returns(processor):
+    """Test stop() tidak menggantung saat worker sedang menunggu queue kosong"""
+    await processor.start()
+    await asyncio.wait_for(processor.stop(), timeout=1)
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from src.fast_ingest import InvalidBody, encode_payloads, parse_items, validate_events
+
+
+def event(**overrides) -> dict:
+    data = {"topic": "t", "event_id": "e-1", "timestamp": "2025-10-22T10:00:00Z",
+            "source": "pytest", "payload": {"x": 1}}
+    data.update(overrides)
+    return data
+
+
+def test_parse_items_accepts_all_body_shapes():
+    """Test body satu event, list event, dan {"events": [...]}"""
+    single = event()
+    assert parse_items(json.dumps(single).encode()) == [single]
+    assert parse_items(json.dumps([single, single]).encode()) == [single, single]
+    assert parse_items(json.dumps({"events": [single]}).encode()) == [single]
+
+
+@pytest.mark.parametrize("body", [b"{not json", b"42", b'{"events": 1}'])
+def test_parse_items_rejects_invalid_body(body):
+    with pytest.raises(InvalidBody):
+        parse_items(body)
+
+
+def test_validate_events_reports_per_item_errors():
+    """Test aturan sama dengan models.Event, error dilaporkan per index"""
+    items = [
+        event(event_id="ok-1"),
+        event(topic=""),
+        event(source=None),
+        event(event_id=123),
+        event(payload=[1, 2]),
+        "not an object",
+        {k: v for k, v in event(event_id="ok-2").items() if k != "payload"},
+    ]
+    events, errors = validate_events(items)
+
+    assert [e.event_id for e in events] == ["ok-1", "ok-2"]
+    assert events[1].payload == {}
+    assert [(err["index"], err["field"]) for err in errors] == [
+        (1, "topic"), (2, "source"), (3, "event_id"), (4, "payload"), (5, None)
+    ]
+
+
+def test_encode_payloads_is_valid_json():
+    events, _ = validate_events([event(payload={"a": [1, "b"], "c": None})])
+    assert [json.loads(p) for p in encode_payloads(events)] == [{"a": [1, "b"], "c": None}]
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+import tempfile
+
+import httpx
+import pytest
+
+from src.async_store import AsyncDedupStore
+from src.dedup_store import DedupStore
+from src.forwarder import OutboxForwarder
+
+
+def make_row(event_id: str, topic: str = "fwd.test") -> tuple:
+    return (topic, event_id, "2025-10-22T10:00:00Z", "pytest", json.dumps({"id": event_id}))
+
+
+@pytest.fixture
+def db_path():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield os.path.join(tmpdir, "test_forward.db")
+
+
+class StubConsumer:
+    """Consumer lokal untuk httpx.MockTransport; bisa gagal N request pertama"""
+
+    def __init__(self, fail_first: int = 0):
+        self.fail_first = fail_first
+        self.requests = 0
+        self.received: list[str] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.requests <= self.fail_first:
+            return httpx.Response(503)
+        body = json.loads(request.content)
+        self.received.extend(event["event_id"] for event in body["events"])
+        return httpx.Response(200, json={"ok": True})
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self))
+
+
+def test_outbox_written_only_for_unique_events(db_path):
+    """Test outbox hanya berisi event unik, ditulis bersama processed_events"""
+    store = DedupStore(db_path=db_path, outbox=True)
+    assert store.store_event(*make_row("a"))
+    assert not store.store_event(*make_row("a"))
+    store.store_events([make_row("b"), make_row("a"), make_row("b"), make_row("c")])
+
+    rows = store.get_outbox_batch(0, 100)
+    assert [row[2] for row in rows] == ["a", "b", "c"]
+    assert store.get_outbox_head() == rows[-1][0]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_forwarder_delivers_and_commits_offset(db_path):
+    """Test forwarder mengirim semua event per batch lalu menyimpan offset"""
+    store = DedupStore(db_path=db_path, outbox=True)
+    store.store_events([make_row(f"e-{i}") for i in range(25)])
+    storage = AsyncDedupStore(store)
+    consumer = StubConsumer()
+    forwarder = OutboxForwarder(storage, "http://consumer/events", batch_size=10,
+                                concurrency=2, client=consumer.client())
+
+    assert await forwarder.run_once() == 20
+    assert await forwarder.run_once() == 5
+    assert await forwarder.run_once() == 0
+
+    assert sorted(consumer.received) == sorted(f"e-{i}" for i in range(25))
+    assert consumer.requests == 3
+    assert store.get_outbox_offset(OutboxForwarder.CONSUMER) == forwarder.offset
+    # row yang sudah terkirim dihapus dari outbox
+    assert store.get_outbox_batch(0, 100) == []
+    assert forwarder.get_stats()["lag"] == 0
+    storage.close()
+
+
+@pytest.mark.asyncio
+async def test_forwarder_retries_failed_batch(db_path):
+    """Test batch yang gagal di-retry dengan backoff sampai berhasil"""
+    store = DedupStore(db_path=db_path, outbox=True)
+    store.store_event(*make_row("retry-1"))
+    storage = AsyncDedupStore(store)
+    consumer = StubConsumer(fail_first=2)
+    forwarder = OutboxForwarder(storage, "http://consumer/events", max_backoff_seconds=0.05,
+                                client=consumer.client())
+
+    assert await forwarder.run_once() == 1
+    assert consumer.received == ["retry-1"]
+    stats = forwarder.get_stats()
+    assert stats["failed_attempts"] == 2
+    assert stats["last_error"] == "HTTP 503"
+    storage.close()
+
+
+@pytest.mark.asyncio
+async def test_forwarder_resumes_from_offset_after_restart(db_path):
+    """Test setelah restart hanya event setelah offset terakhir yang dikirim"""
+    store = DedupStore(db_path=db_path, outbox=True)
+    store.store_events([make_row("old-1"), make_row("old-2")])
+    storage = AsyncDedupStore(store)
+    first = StubConsumer()
+    forwarder = OutboxForwarder(storage, "http://consumer/events", client=first.client())
+    assert await forwarder.run_once() == 2
+    storage.close()
+
+    store = DedupStore(db_path=db_path, outbox=True)
+    store.store_event(*make_row("new-1"))
+    storage = AsyncDedupStore(store)
+    second = StubConsumer()
+    forwarder = OutboxForwarder(storage, "http://consumer/events", client=second.client())
+    await forwarder.start()
+    try:
+        assert forwarder.offset == 2
+        # loop background mengirim event baru tanpa dipanggil manual
+        for _ in range(100):
+            if second.received:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await forwarder.stop()
+        storage.close()
+
+    assert first.received == ["old-1", "old-2"]
+    assert second.received == ["new-1"]
+
+
+@pytest.mark.asyncio
+async def test_forwarder_dead_letters_permanent_rejection(db_path):
+    """Test batch yang ditolak 4xx tidak di-retry, dipindah ke dead letter, dan offset tetap maju"""
+    store = DedupStore(db_path=db_path, outbox=True)
+    store.store_events([make_row(f"e-{i}") for i in range(4)])
+    storage = AsyncDedupStore(store)
+    requests = []
+
+    def consumer(request: httpx.Request) -> httpx.Response:
+        ids = [event["event_id"] for event in json.loads(request.content)["events"]]
+        requests.append(ids)
+        if "e-1" in ids:
+            return httpx.Response(422, json={"detail": "bad event"})
+        return httpx.Response(200)
+
+    forwarder = OutboxForwarder(storage, "http://consumer/events", batch_size=2, concurrency=2,
+                                client=httpx.AsyncClient(transport=httpx.MockTransport(consumer)))
+    assert await forwarder.run_once() == 4
+    assert len(requests) == 2
+    stats = forwarder.get_stats()
+    assert (stats["forwarded_events"], stats["dead_lettered_events"], stats["dead_lettered_batches"]) == (2, 2, 1)
+    assert stats["failed_attempts"] == 0
+    assert store.get_outbox_offset(OutboxForwarder.CONSUMER) == forwarder.offset
+    dead = store.get_dead_letters()
+    assert sorted(row[2] for row in dead) == ["e-0", "e-1"]
+    assert dead[0][6].startswith("HTTP 422")
+
+    # batch berikutnya tidak tertahan oleh batch yang ditolak
+    store.store_event(*make_row("e-4"))
+    assert await forwarder.run_once() == 1
+    assert requests[-1] == ["e-4"]
+    storage.close()
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+from src.async_store import AsyncDedupStore
+from src.dedup_store import DedupStore
+from src.event_processor import EventProcessor
+from src.group_commit import GroupCommitter
+from src.models import Event
+from src.stats import Stats
+
+
+@pytest.fixture
+def dedup_store():
+    temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+    temp_db.close()
+    store = DedupStore(temp_db.name)
+    yield store
+    store.close()
+    os.unlink(temp_db.name)
+
+
+def make_event(event_id, topic="gc.test"):
+    return Event(
+        topic=topic,
+        event_id=event_id,
+        timestamp="2025-10-22T10:00:00Z",
+        source="pytest",
+        payload={"n": event_id}
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_share_one_transaction(dedup_store):
+    """Test that concurrent submits are coalesced into a single batch"""
+    calls = []
+    original = dedup_store.store_events
+
+    def spy(rows):
+        calls.append(len(rows))
+        return original(rows)
+
+    dedup_store.store_events = spy
+    committer = GroupCommitter(AsyncDedupStore(dedup_store), max_batch=100, max_linger_ms=20)
+    rows = [("gc.test", f"evt-{i}", "2025-10-22T10:00:00Z", "pytest", "{}") for i in range(10)]
+    results = await asyncio.gather(*(committer.submit(row) for row in rows))
+    await committer.stop()
+
+    assert results == [True] * 10
+    assert calls == [10]
+    assert len(dedup_store.get_events("gc.test")) == 10
+
+
+@pytest.mark.asyncio
+async def test_duplicates_inside_batch_get_own_answer(dedup_store):
+    """Test that each caller gets its own processed/duplicate result"""
+    committer = GroupCommitter(AsyncDedupStore(dedup_store), max_batch=100, max_linger_ms=20)
+    row = ("gc.test", "evt-same", "2025-10-22T10:00:00Z", "pytest", "{}")
+    results = await asyncio.gather(committer.submit(row), committer.submit(row))
+    await committer.stop()
+
+    assert sorted(results) == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_processor_group_commit_counts(dedup_store):
+    """Test EventProcessor.publish with group commit enabled"""
+    stats = Stats()
+    processor = EventProcessor(dedup_store, stats, queue_size=100, group_commit=True,
+                               group_commit_max_linger_ms=10)
+    events = [make_event("evt-1"), make_event("evt-2"), make_event("evt-1")]
+    results = await asyncio.gather(*(processor.publish(e) for e in events))
+    await processor.stop()
+
+    statuses = [r["status"] for r in results]
+    assert statuses.count("processed") == 2
+    assert statuses.count("duplicate") == 1
+    data = stats.get_stats()
+    assert data["unique_processed"] == 2
+    assert data["duplicate_dropped"] == 1
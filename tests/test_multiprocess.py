@@ -0,0 +1,115 @@
+import json
+import multiprocessing
+import os
+import tempfile
+
+import pytest
+
+from src.async_store import AsyncDedupStore
+from src.bloom import BloomPrefilter
+from src.dedup_store import DedupStore
+from src.lease import FileLease
+from src.stats import Stats
+from src.worker_stats import WorkerStatsSync
+
+
+def make_row(event_id: str, topic: str = "mp.test") -> tuple:
+    return (topic, event_id, "2025-10-22T10:00:00Z", "pytest", json.dumps({"id": event_id}))
+
+
+@pytest.fixture
+def db_path():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield os.path.join(tmpdir, "test_multiprocess.db")
+
+
+def _worker(db_path: str, rows: list, results):
+    store = DedupStore(db_path=db_path, multiprocess=True)
+    unique = sum(store.store_events(rows[:len(rows) // 2]))
+    unique += sum(store.store_event(*row) for row in rows[len(rows) // 2:])
+    store.close()
+    results.put(unique)
+
+
+def test_store_event_two_instances_agree(db_path):
+    """Dua store (mewakili dua worker) di database yang sama: hanya satu yang menang"""
+    first = DedupStore(db_path=db_path, multiprocess=True, outbox=True)
+    second = DedupStore(db_path=db_path, multiprocess=True, outbox=True)
+
+    assert first.store_event(*make_row("a")) is True
+    # cache second kosong; INSERT OR IGNORE yang menentukan
+    assert second.store_event(*make_row("a")) is False
+    assert second.store_events([make_row("a"), make_row("b"), make_row("b")]) == [False, True, False]
+    assert first.store_events([make_row("b"), make_row("c")]) == [False, True]
+
+    assert len(first.get_events("mp.test")) == 3
+    # outbox hanya berisi event unik
+    assert [row[2] for row in first.get_outbox_batch(0, 10)] == ["a", "b", "c"]
+    first.close()
+    second.close()
+
+
+def test_concurrent_processes_count_each_event_once(db_path):
+    DedupStore(db_path=db_path, multiprocess=True).close()  # schema dibuat sekali di depan
+    rows = [make_row(f"evt-{i}", topic=f"mp.{i % 3}") for i in range(400)]
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(db_path, rows, results)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    assert sum(results.get(timeout=5) for _ in workers) == len(rows)
+    store = DedupStore(db_path=db_path)
+    assert len(store.get_events()) == len(rows)
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_stats_aggregated_across_workers(db_path):
+    storage = AsyncDedupStore(DedupStore(db_path=db_path, multiprocess=True))
+    stats_a, stats_b = Stats(), Stats()
+    for _ in range(3):
+        stats_a.increment_received(topic="t1")
+    stats_a.increment_unique(topic="t1")
+    stats_a.increment_duplicates(topic="t1")
+    stats_b.increment_received(topic="t2")
+    stats_b.increment_unique(topic="t2")
+
+    sync_a = WorkerStatsSync(storage, stats_a, run_id="run-1", worker_id="a")
+    sync_b = WorkerStatsSync(storage, stats_b, run_id="run-1", worker_id="b")
+    stale = WorkerStatsSync(storage, Stats(), run_id="run-0", worker_id="old")
+    await stale.flush()
+    await sync_b.flush()
+
+    data = await sync_a.aggregated()
+    assert data["received"] == 4
+    assert data["unique_processed"] == 2
+    assert data["duplicate_dropped"] == 1
+    assert data["per_topic"]["t1"]["received"] == 3
+    assert data["per_topic"]["t2"]["unique_processed"] == 1
+
+    # flush berulang = upsert, bukan penjumlahan ganda
+    await sync_b.flush()
+    assert (await sync_a.aggregated())["received"] == 4
+    assert await storage.purge_worker_stats("run-1") == 1
+    storage.close()
+
+
+def test_file_lease_is_exclusive(db_path):
+    first = FileLease(f"{db_path}.lock")
+    second = FileLease(f"{db_path}.lock")
+    assert first.try_acquire() is True
+    assert second.try_acquire() is False
+    first.release()
+    assert second.try_acquire() is True
+    second.release()
+
+
+def test_multiprocess_rejects_per_process_features(db_path):
+    with pytest.raises(ValueError):
+        DedupStore(multiprocess=True)
+    with pytest.raises(ValueError):
+        DedupStore(db_path=db_path, multiprocess=True, prefilter=BloomPrefilter(capacity=100))
@@ -0,0 +1,67 @@
+import asyncio
+import marshal
+
+import pytest
+from httpx import AsyncClient
+
+from src.config import Config
+from src.main import create_app
+from src.profiler import ProfilerBusy, ProfilerService
+
+
+async def busy_work(seconds):
+    loop = asyncio.get_running_loop()
+    end = loop.time() + seconds
+    while loop.time() < end:
+        sum(i * i for i in range(2000))
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_sampling_capture_returns_collapsed_stacks():
+    service = ProfilerService()
+    result, _ = await asyncio.gather(service.capture(0.2, mode="sampling", interval_ms=5), busy_work(0.2))
+    assert result["samples"] > 0
+    assert "busy_work" in result["collapsed"]
+    assert result["collapsed"].splitlines()[0].rsplit(" ", 1)[1].isdigit()
+
+
+@pytest.mark.asyncio
+async def test_cprofile_capture_with_tracemalloc():
+    service = ProfilerService()
+    result, _ = await asyncio.gather(service.capture(0.2, mode="cprofile", tracemalloc_top=5), busy_work(0.2))
+    assert isinstance(marshal.loads(result["pstats"]), dict)
+    assert "busy_work" in result["report"]
+    assert 0 < len(result["tracemalloc"]) <= 5
+
+
+@pytest.mark.asyncio
+async def test_only_one_capture_at_a_time():
+    service = ProfilerService()
+    first = asyncio.create_task(service.capture(0.2))
+    await asyncio.sleep(0.05)
+    with pytest.raises(ProfilerBusy):
+        await service.capture(0.1)
+    await first
+    assert not service.busy
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoint_disabled_by_default():
+    app = create_app(db_path=None)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/debug/profile", params={"seconds": 0.1})
+        assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoint_collapsed(monkeypatch):
+    monkeypatch.setattr(Config, "PROFILING_ENABLED", True)
+    app = create_app(db_path=None)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/debug/profile", params={"seconds": 0.1, "format": "collapsed"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+
+        response = await client.post("/debug/profile", params={"seconds": 0.1, "format": "pstats"})
+        assert response.status_code == 400
@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+import publisher
+
+
+def test_generate_events_duplicates_and_skew():
+    """Test duplicate = kirim ulang event lama, topic skew condong ke topic pertama"""
+    args = publisher.parse_args(["--events", "2000", "--dup-rate", "0.25", "--topics", "5",
+                                 "--topic-skew", "2"])
+    events = publisher.generate_events(args, random.Random(7))
+    keys = [(e["topic"], e["event_id"]) for e in events]
+    duplicates = len(keys) - len(set(keys))
+    assert 400 < duplicates < 600
+    topics = [e["topic"] for e in events]
+    assert topics.count("topic.0") > topics.count("topic.4") * 5
+
+
+def test_percentile_nearest_rank():
+    values = [i / 1000 for i in range(1, 1001)]
+    assert publisher.percentile(values, 0.5) == 0.5
+    assert publisher.percentile(values, 0.999) == 0.999
+    assert publisher.percentile([], 0.99) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_in_process_run_verifies_server_counts():
+    args = publisher.parse_args(["--in-process", "--events", "300", "--batch-size", "20",
+                                 "--concurrency", "4", "--seed", "3"])
+    result = await publisher.run_in_process(args)
+    assert result["verified"]
+    assert result["statuses"] == {"200": 15}
+    assert set(result["latency_ms"]) >= {"p50", "p95", "p99", "p999"}
@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+import pytest
+
+from src.async_store import AsyncDedupStore
+from src.dedup_store import DedupStore
+from src.retention import RetentionManager, parse_topic_limits
+
+
+@pytest.fixture
+def storage():
+    temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+    temp_db.close()
+    os.unlink(temp_db.name)  # biarkan SQLite membuat file baru (auto_vacuum aktif)
+    facade = AsyncDedupStore(DedupStore(temp_db.name))
+    yield facade
+    facade.close()
+    os.unlink(temp_db.name)
+
+
+def backdate(store, topic, seconds):
+    with store.connections.write() as conn:
+        conn.execute(
+            "UPDATE processed_events SET processed_at = datetime('now', ?) WHERE topic = ?",
+            (f"-{seconds} seconds", topic)
+        )
+
+
+def test_parse_topic_limits():
+    assert parse_topic_limits("a=10, b.c=2.5") == {"a": 10.0, "b.c": 2.5}
+    assert parse_topic_limits("") == {}
+    with pytest.raises(ValueError):
+        parse_topic_limits("no-value")
+
+
+@pytest.mark.asyncio
+async def test_prunes_by_age_in_chunks(storage):
+    """Test age-based retention deletes old rows across several chunks"""
+    store = storage.dedup_store
+    store.store_events([("old", f"evt-{i}", "", "", "{}") for i in range(25)])
+    store.store_events([("fresh", "evt-0", "", "", "{}")])
+    backdate(store, "old", 7200)
+
+    retention = RetentionManager(storage, max_age_seconds=3600, chunk_size=10)
+    assert await retention.run_once() == 25
+    assert store.get_all_topics() == ["fresh"]
+    assert retention.get_stats()["pruned_rows"] == 25
+    assert store.connections.writer.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+@pytest.mark.asyncio
+async def test_topic_rules_override_global_age(storage):
+    """Test per-topic age rules and per-topic row limits"""
+    store = storage.dedup_store
+    store.store_events([("keep", f"evt-{i}", "", "", "{}") for i in range(3)])
+    store.store_events([("capped", f"evt-{i}", "", "", "{}") for i in range(5)])
+    backdate(store, "keep", 7200)
+
+    retention = RetentionManager(storage, max_age_seconds=3600, topic_max_age={"keep": 86400},
+                                 max_rows_per_topic=2, chunk_size=2)
+    assert await retention.run_once() == 4
+    assert len(store.get_events("keep")) == 2
+    assert [row[1] for row in store.get_events("capped")] == ["evt-3", "evt-4"]
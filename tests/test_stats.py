@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from src.metrics import Histogram, RollingRate, ShardedCounter
+from src.stats import Stats
+
+
+def test_sharded_counter_across_threads():
+    """Test that per-thread cells sum to the exact total"""
+    counter = ShardedCounter()
+
+    def work():
+        for _ in range(10000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counter.value == 40000
+
+
+def test_rolling_rate_windows():
+    """Test 1m/5m rates from per-second buckets, excluding the current second"""
+    rate = RollingRate(horizon_seconds=300)
+    for second in range(1000, 1300):
+        rate.add(2, now=second)
+    assert rate.rate(60, now=1300) == pytest.approx(2.0)
+    assert rate.rate(300, now=1300) == 2.0
+    assert rate.rate(60, now=1320) == pytest.approx(2.0 * 40 / 60)
+    assert rate.rate(300, now=1330) == pytest.approx(2.0 * 270 / 300)
+    assert rate.rate(60, now=1400) == 0
+
+
+def test_rolling_rate_covers_only_elapsed_span():
+    """Test rate saat proses lebih muda dari jendela dibagi detik yang sudah berjalan"""
+    rate = RollingRate(horizon_seconds=300)
+    assert rate.rate(300, now=1000) == 0.0
+    for second in range(1000, 1010):
+        rate.add(3, now=second)
+    assert rate.rate(300, now=1010) == 3.0
+    assert rate.rate(60, now=1010) == 3.0
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+    for _ in range(90):
+        histogram.observe(0.0005)
+    for _ in range(10):
+        histogram.observe(0.05)
+    assert histogram.quantile(0.5) == 0.001
+    assert histogram.quantile(0.99) == 0.1
+    assert histogram.summary()["count"] == 100
+
+
+def test_per_topic_counters():
+    stats = Stats()
+    stats.increment_received(topic="a")
+    stats.increment_unique(topic="a")
+    stats.increment_received(2)
+    stats.record_topic("b", received=2, unique=1, duplicates=1)
+    stats.observe_latency("publish", 0.002)
+
+    data = stats.get_stats()
+    assert data["received"] == 3
+    assert data["per_topic"]["a"]["unique_processed"] == 1
+    assert data["per_topic"]["b"]["duplicate_dropped"] == 1
+    assert data["latency"]["publish"]["count"] == 1
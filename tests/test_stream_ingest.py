@@ -0,0 +1,111 @@
+import gzip
+import json
+
+import pytest
+
+from src.admission import AdmissionController
+from src.dedup_store import DedupStore
+from src.event_processor import EventProcessor
+from src.stats import Stats
+from src.stream_ingest import StreamTooLarge, ingest_ndjson, iter_lines
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def collect(lines) -> list[bytes]:
+    return [line async for line in lines]
+
+
+def ndjson(count: int, topic: str = "s") -> bytes:
+    return b"".join(
+        json.dumps({"topic": topic, "event_id": f"e-{i}", "timestamp": "2025-10-22T10:00:00Z",
+                    "source": "pytest", "payload": {"i": i}}).encode() + b"\n"
+        for i in range(count)
+    )
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_across_chunk_boundaries():
+    """Test baris yang terpotong antar chunk disambung, baris terakhir tanpa newline tetap ada"""
+    lines = await collect(iter_lines(chunked(b"one\ntwo\nthree", 2)))
+    assert lines == [b"one", b"two", b"three"]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_gzip_small_output_pieces():
+    """Test body gzip di-dekompresi bertahap per potongan kecil"""
+    data = ndjson(200)
+    lines = await collect(iter_lines(chunked(gzip.compress(data), 7), compressed=True, max_line_bytes=256))
+    assert b"\n".join(lines) + b"\n" == data
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_gzip_multi_member():
+    """Test body berisi dua member gzip (cat a.gz b.gz) terbaca sampai member terakhir"""
+    first, second = ndjson(50, topic="a"), ndjson(30, topic="b")
+    body = gzip.compress(first) + gzip.compress(second)
+    for size in (7, len(body)):
+        lines = await collect(iter_lines(chunked(body, size), compressed=True, max_line_bytes=256))
+        assert b"\n".join(lines) + b"\n" == first + second
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_rejects_long_line():
+    with pytest.raises(StreamTooLarge):
+        await collect(iter_lines(chunked(b"x" * 100, 10), max_line_bytes=50))
+
+
+@pytest.mark.asyncio
+async def test_ingest_commits_in_chunks_and_reports_lines():
+    """Test commit per chunk, duplicate dihitung, error dilaporkan per nomor baris"""
+    store = DedupStore()
+    processor = EventProcessor(store, Stats(), queue_size=0)
+    batches: list[int] = []
+    publish_batch = processor.publish_batch
+
+    async def recording(events, payloads=None):
+        batches.append(len(events))
+        return await publish_batch(events, payloads)
+
+    processor.publish_batch = recording
+    body = ndjson(5) + b"{broken\n\n" + ndjson(3) + b'{"topic": "", "event_id": "x"}\n'
+    totals = await ingest_ndjson(processor, iter_lines(chunked(body, 16)), chunk_size=2)
+
+    assert batches == [2, 2, 2, 2]
+    assert (totals["received"], totals["processed"], totals["duplicates"]) == (8, 5, 3)
+    assert totals["rejected"] == 2
+    assert [(err["line"], err["field"]) for err in totals["errors"]] == [(6, None), (11, "topic")]
+    assert totals["aborted"] is None
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_ingest_corrupt_gzip_keeps_committed_events():
+    store = DedupStore()
+    processor = EventProcessor(store, Stats(), queue_size=0)
+    body = gzip.compress(ndjson(10))
+    body = body[:len(body) // 2] + b"garbage" * 10
+
+    totals = await ingest_ndjson(processor, iter_lines(chunked(body, 64), compressed=True), chunk_size=1)
+    assert totals["aborted"]
+    assert totals["processed"] == totals["received"]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_ingest_applies_source_rate_limit_per_chunk():
+    """Test rate limit per source berlaku untuk stream: chunk ditahan, tidak ditolak"""
+    store = DedupStore()
+    processor = EventProcessor(store, Stats(), queue_size=0)
+    admission = AdmissionController(lambda: 0.0, source_rate=200, source_burst=10)
+
+    totals = await ingest_ndjson(processor, iter_lines(chunked(ndjson(30), 64)), chunk_size=10,
+                                 admission=admission)
+    assert totals["processed"] == 30
+    assert admission.admitted == 3
+    assert admission.throttled["waits"] == 2
+    assert admission.throttled["seconds"] >= 0.08
+    store.close()
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+
+from src.fast_ingest import RawEvent
+from src.subscriptions import SubscriptionClosed, SubscriptionManager, TooManySubscribers, encode_sse
+
+
+def make_events(topic: str, count: int, start: int = 0) -> list[RawEvent]:
+    return [RawEvent(topic, f"{topic}-{i}", "2025-10-22T10:00:00Z", "pytest", {"i": i})
+            for i in range(start, start + count)]
+
+
+def event_ids(messages: list) -> list[str]:
+    return [json.loads(m)["event_id"] for m in messages if type(m) is bytes]
+
+
+@pytest.mark.asyncio
+async def test_topic_filters_exact_prefix_and_all():
+    manager = SubscriptionManager()
+    exact = manager.subscribe(["orders.created"])
+    prefix = manager.subscribe(["orders.*"])
+    everything = manager.subscribe([])
+    other = manager.subscribe(["users.signup"])
+
+    await manager.handle_events(make_events("orders.created", 2))
+    await manager.handle_events(make_events("orders.eu.paid", 1))
+
+    assert manager.matching("orders.eu.paid") == {prefix, everything}
+    assert event_ids(await exact.get(timeout=0.1)) == ["orders.created-0", "orders.created-1"]
+    assert len(await prefix.get(timeout=0.1)) == 3
+    assert len(await everything.get(timeout=0.1)) == 3
+    assert await other.get(timeout=0.01) == []
+    # satu serialize per event, bukan per subscriber
+    assert manager.stats["published"] == 3
+    assert manager.stats["deliveries"] == 8
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_reports_gap_first():
+    manager = SubscriptionManager(buffer_size=3, policy="drop_oldest")
+    sub = manager.subscribe(["t"])
+    await manager.handle_events(make_events("t", 5))
+
+    messages = await sub.get(timeout=0.1)
+    assert messages[0] == {"type": "gap", "missed": 2}
+    assert event_ids(messages) == ["t-2", "t-3", "t-4"]
+    assert sub.stats["dropped"] == 2
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_closes_slow_subscriber():
+    manager = SubscriptionManager(buffer_size=2, policy="disconnect")
+    slow = manager.subscribe(["t"])
+    fast = manager.subscribe(["t"], buffer_size=10)
+    await manager.handle_events(make_events("t", 3))
+
+    assert manager.stats["disconnected"] == 1
+    assert slow.id not in manager.subscribers
+    assert manager.matching("t") == {fast}
+    # isi buffer tetap bisa dibaca sebelum SubscriptionClosed
+    assert event_ids(await slow.get(timeout=0.1)) == ["t-0", "t-1"]
+    with pytest.raises(SubscriptionClosed, match="overflow"):
+        await slow.get(timeout=0.1)
+    assert len(await fast.get(timeout=0.1)) == 3
+
+
+@pytest.mark.asyncio
+async def test_pause_resumes_after_drain_with_gap():
+    manager = SubscriptionManager(buffer_size=4, policy="pause")
+    sub = manager.subscribe(["t"])
+    await manager.handle_events(make_events("t", 6))
+    assert sub.paused
+
+    first = await sub.get(max_items=3, timeout=0.1)
+    assert event_ids(first) == ["t-0", "t-1", "t-2"]
+    assert not sub.paused
+    await manager.handle_events(make_events("t", 1, start=6))
+
+    rest = await sub.get(timeout=0.1)
+    assert event_ids(rest[:1]) == ["t-3"]
+    assert rest[1] == {"type": "gap", "missed": 2}
+    assert event_ids(rest[2:]) == ["t-6"]
+
+
+@pytest.mark.asyncio
+async def test_get_waits_for_events_and_limits():
+    manager = SubscriptionManager(max_subscribers=1)
+    sub = manager.subscribe(["t"])
+    with pytest.raises(TooManySubscribers):
+        manager.subscribe(["t"])
+    with pytest.raises(ValueError):
+        SubscriptionManager(policy="block")
+
+    waiter = asyncio.create_task(sub.get(timeout=1))
+    await asyncio.sleep(0)
+    await manager.handle_events(make_events("t", 1))
+    assert event_ids(await waiter) == ["t-0"]
+
+    manager.close_all()
+    with pytest.raises(SubscriptionClosed, match="shutdown"):
+        await sub.get(timeout=0.1)
+    assert encode_sse({"type": "gap", "missed": 1}) == 'event: gap\ndata: {"type":"gap","missed":1}\n\n'
@@ -0,0 +1,79 @@
+import json
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+from src.dedup_store import DedupStore
+
+
+def make_row(event_id: str, topic: str) -> tuple:
+    return (topic, event_id, "2025-10-22T10:00:00Z", "pytest", json.dumps({"id": event_id}))
+
+
+@pytest.fixture
+def db_path():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield os.path.join(tmpdir, "test_topics.db")
+
+
+def table_counts(db_path: str) -> dict:
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT topic, event_count FROM topics").fetchall())
+    finally:
+        conn.close()
+
+
+def registry_counts(store: DedupStore) -> dict:
+    return {info["topic"]: info["event_count"] for info in store.get_topics()}
+
+
+def test_registry_counts_unique_inserts_only(db_path):
+    store = DedupStore(db_path=db_path)
+    assert store.store_event(*make_row("a", "t1")) is True
+    assert store.store_event(*make_row("a", "t1")) is False
+    store.store_events([make_row("b", "t1"), make_row("c", "t2"), make_row("c", "t2"), make_row("a", "t1")])
+
+    assert registry_counts(store) == {"t1": 2, "t2": 1}
+    assert table_counts(db_path) == {"t1": 2, "t2": 1}
+    assert sorted(store.get_all_topics()) == ["t1", "t2"]
+    info = store.get_topics()[0]
+    assert info["first_seen"] <= info["last_seen"]
+    store.close()
+
+    # registry di-load dari tabel saat start
+    reopened = DedupStore(db_path=db_path)
+    assert registry_counts(reopened) == {"t1": 2, "t2": 1}
+    reopened.close()
+
+
+def test_retention_updates_registry(db_path):
+    store = DedupStore(db_path=db_path)
+    store.store_events([make_row(f"e{i}", "t1") for i in range(5)] + [make_row("x", "t2")])
+
+    assert store.prune_topic_overflow("t1", 2, 100) == 3
+    assert registry_counts(store) == {"t1": 2, "t2": 1}
+    with store.connections.write() as conn:
+        conn.execute("UPDATE processed_events SET processed_at = datetime('now', '-2 hours') WHERE topic = 't2'")
+    assert store.prune_older_than(3600, 100) == 1
+    assert registry_counts(store) == {"t1": 2}
+    assert table_counts(db_path) == {"t1": 2}
+    assert store.get_all_topics() == ["t1"]
+    store.close()
+
+
+def test_registry_backfilled_for_existing_database(db_path):
+    store = DedupStore(db_path=db_path)
+    store.store_events([make_row(f"e{i}", f"t{i % 3}") for i in range(9)])
+    store.close()
+    # simulasi database dari versi sebelum registry
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP TABLE topics")
+    conn.commit()
+    conn.close()
+
+    store = DedupStore(db_path=db_path)
+    assert registry_counts(store) == {"t0": 3, "t1": 3, "t2": 3}
+    store.close()